@@ -46,6 +46,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'equipment.middleware.UserRolesMiddleware',
+    'equipment.middleware.ReplicaRoutingMiddleware',
+    'equipment.middleware.SQLInstrumentationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,6 +83,89 @@ DATABASES = {
     }
 }
 
+# Produkcyjny profil SQLite: pragmy SQLITE_PRAGMAS na każdym połączeniu (WAL -
+# odczyty nie czekają na zapisy) i transakcje BEGIN IMMEDIATE - współbieżne
+# zapisy czekają w kolejce do busy_timeout zamiast kończyć się błędem
+# "database is locked" przy próbie podniesienia blokady
+SQLITE_PRODUCTION = False
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,  # B
+    'cache_size': -64 * 1024,  # ujemna wartość - KiB
+    'temp_store': 'MEMORY',
+}
+
+# Liczba ponowień operacji zapisu przerwanej blokadą bazy (equipment.sqlite.retry_on_lock)
+SQLITE_LOCK_RETRIES = 3
+
+if SQLITE_PRODUCTION:
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+
+# Replika bazy tylko do odczytu (equipment/routers.py): widoki z REPLICA_ROUTES
+# czytają z aliasu 'replica', zapisy i pozostałe widoki używają 'default'.
+# None - wszystko z 'default'. Lokalnie replika to np. druga baza SQLite
+# odświeżana poleceniem sync_replica:
+# REPLICA_DATABASE = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db_replica.sqlite3'}
+REPLICA_DATABASE = None
+
+REPLICA_ROUTES = [
+    'dashboard',
+    'equipment_list',
+    'export_equipment_excel',
+    'export_transfers_excel',
+    'export_equipment_csv',
+    'export_equipment_ndjson',
+    'transfer_protocols_batch',
+]
+
+# Przez tyle sekund po zapisie odczyty użytkownika trafiają do 'default'
+# (widzi własne zmiany mimo opóźnienia replikacji)
+REPLICA_STICKY_SECONDS = 15
+
+if REPLICA_DATABASE:
+    DATABASES['replica'] = {**REPLICA_DATABASE, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_ROUTERS = ['equipment.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Backend cache dashboardu: 'locmem' (jeden proces) lub 'file' (współdzielony między procesami)
+DASHBOARD_CACHE_BACKEND = 'locmem'
+
+DASHBOARD_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'assetstorm-dashboard',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'dashboard',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': DASHBOARD_CACHE_BACKENDS[DASHBOARD_CACHE_BACKEND],
+}
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+
+# Czas (s) przechowywania kontekstu dashboardu
+DASHBOARD_CACHE_TIMEOUT = 600
+
+# Cache rekordów skanera kodów QR / numerów seryjnych (equipment/scan.py) -
+# w pamięci każdego procesu. Zapis w innym procesie jest widoczny najpóźniej
+# po SCAN_CACHE_TIMEOUT sekundach.
+SCAN_CACHE_MAX_ENTRIES = 10000
+SCAN_CACHE_TIMEOUT = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,3 +219,50 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # Site URL for QR codes
 SITE_URL = 'http://127.0.0.1:8000'
+
+# Cache obrazów kodów QR renderowanych na żądanie (najdawniej używane są usuwane)
+QR_CACHE_DIR = BASE_DIR / 'cache' / 'qr'
+QR_CACHE_MAX_ENTRIES = 5000
+
+# Cache gotowych protokołów przekazania PDF (klucz: id przekazania + skrót treści)
+PROTOCOL_CACHE_DIR = BASE_DIR / 'cache' / 'protocols'
+PROTOCOL_CACHE_MAX_ENTRIES = 20000
+
+# Eksporty w tle: zadanie "w trakcie" bez sygnału workera przez tyle sekund
+# wraca do kolejki (worker zatrzymany w trakcie eksportu), najwyżej
+# EXPORT_JOB_MAX_ATTEMPTS razy - potem dostaje status "błąd"
+EXPORT_JOB_STALE_SECONDS = 300
+EXPORT_JOB_MAX_ATTEMPTS = 2
+
+# Cache ról użytkownika między żądaniami. Zmiana grup unieważnia wpis tylko
+# w cache współdzielonym - przy backendzie 'locmem' role są przechowywane
+# najwyżej kilka sekund (equipment.roles.LOCAL_ROLES_CACHE_TIMEOUT)
+USER_ROLES_CACHE_ALIAS = DASHBOARD_CACHE_ALIAS
+# Czas (s) przechowywania ról użytkownika w cache między żądaniami
+USER_ROLES_CACHE_TIMEOUT = 300
+
+# Paginacja list sprzętu: 'cursor' (keyset, bez COUNT/OFFSET) lub 'offset' (numerowane strony)
+EQUIPMENT_LIST_PAGINATION = 'cursor'
+
+# Pomiar zapytań SQL (SQLInstrumentationMiddleware): True - każde żądanie,
+# False - tylko żądania IT z nagłówkiem X-SQL-Instrumentation: 1
+SQL_INSTRUMENTATION = False
+# Tyle wykonań tego samego kształtu zapytania w jednym żądaniu to ostrzeżenie N+1
+SQL_NPLUS1_THRESHOLD = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'equipment.sql': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Equipment, EquipmentTransfer, MaintenanceSchedule
+from .models import (
+    Equipment, EquipmentAssignment, EquipmentImport, EquipmentTransfer, ExportJob, MaintenanceSchedule,
+)
 
 
 @admin.register(Equipment)
@@ -65,3 +67,26 @@ class MaintenanceScheduleAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'processed_rows', 'total_rows', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(EquipmentImport)
+class EquipmentImportAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'total_rows', 'created_rows', 'updated_rows', 'error_rows', 'created_by', 'created_at']
+    list_filter = ['created_at']
+    readonly_fields = ['created_at']
+
+
+@admin.register(EquipmentAssignment)
+class EquipmentAssignmentAdmin(admin.ModelAdmin):
+    list_display = ['equipment', 'user', 'started_at', 'transfer']
+    list_filter = ['started_at']
+    search_fields = ['equipment__name', 'equipment__serial_number', 'user__username']
+    list_select_related = ['equipment', 'user']
+    raw_id_fields = ['equipment', 'user', 'transfer']
@@ -0,0 +1,540 @@
+"""
+JSON API sprzętu, przekazań i harmonogramu konserwacji.
+
+Uwierzytelnianie sesją, jak na stronach aplikacji. Zapisy wymagają tokenu
+CSRF w nagłówku X-CSRFToken. Zakres danych jest taki sam jak na stronach:
+zwykły użytkownik widzi tylko swój sprzęt (get_user_equipment_queryset),
+a sprzęt i konserwacje zmienia tylko IT.
+
+Parametry list:
+- fields=a,b - tylko wybrane pola (values(), pozostałe kolumny nie są pobierane)
+- after=<id>&limit=N - paginacja kluczem (id rosnąco); odpowiedź zawiera 'next'
+- ids=1,2,3 lub serial_numbers=A,B (sprzęt) - wiele obiektów jednym żądaniem
+
+Skanery kodów QR / numerów seryjnych korzystają z api/scan/ - zwięzłe rekordy
+z cache w pamięci procesu (equipment.scan).
+
+ETag odpowiedzi wynika z id i daty zmiany zwracanych obiektów (oraz pól
+z powiązanych tabel, np. nazwy przypisanego użytkownika). Klient
+odpytujący z If-None-Match dostaje 304 po jednym lekkim zapytaniu, bez
+pobierania i serializacji danych.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .decorators import get_user_equipment_queryset
+from .filters import filter_equipment
+from .forms import EquipmentForm, EquipmentTransferApprovalForm, EquipmentTransferForm, MaintenanceScheduleForm
+from .models import Equipment, EquipmentTransfer, MaintenanceSchedule
+from .scan import SCAN_BATCH_LIMIT, resolve_codes
+from .transfers import create_transfers
+
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+# Najwięcej obiektów pobieranych naraz przez ids= / serial_numbers=
+API_BULK_LIMIT = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+class Resource:
+    """
+    Opis zasobu API: pola (nazwa w API -> ścieżka ORM), pola wersji
+    (wyznaczają ETag), parametry pobierania wielu obiektów i filtry listy.
+    """
+
+    def __init__(self, fields, version_fields, bulk_params, filter_queryset, detail_route):
+        self.fields = fields
+        self.version_fields = version_fields
+        self.bulk_params = bulk_params
+        self.filter_queryset = filter_queryset
+        self.detail_route = detail_route
+
+
+def _id_param(params, name):
+    value = params.get(name, '')
+    if value and not value.isdigit():
+        raise ApiError(f'Parametr {name} musi być liczbą całkowitą.')
+    return value
+
+
+def _filter_transfers(queryset, params, is_it_staff):
+    if params.get('approval_status'):
+        queryset = queryset.filter(approval_status=params['approval_status'])
+    for name in ('equipment', 'to_user'):
+        if _id_param(params, name):
+            queryset = queryset.filter(**{f'{name}_id': params[name]})
+    return queryset
+
+
+def _filter_maintenance(queryset, params, is_it_staff):
+    if _id_param(params, 'equipment'):
+        queryset = queryset.filter(equipment_id=params['equipment'])
+    if params.get('is_completed') in ('true', 'false'):
+        queryset = queryset.filter(is_completed=params['is_completed'] == 'true')
+    return queryset
+
+
+def _filter_equipment(queryset, params, is_it_staff):
+    return filter_equipment(queryset, params, is_it_staff)[0]
+
+
+EQUIPMENT_RESOURCE = Resource(
+    fields={
+        'id': 'id',
+        'name': 'name',
+        'type': 'type',
+        'serial_number': 'serial_number',
+        'invoice_number': 'invoice_number',
+        'purchase_date': 'purchase_date',
+        'purchase_price': 'purchase_price',
+        'location': 'location',
+        'supplier': 'supplier',
+        'warranty_end_date': 'warranty_end_date',
+        'status': 'status',
+        'assigned_to': 'assigned_to_id',
+        'assigned_to_username': 'assigned_to__username',
+        'notes': 'notes',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    },
+    # Nazwa przypisanego użytkownika jest w odpowiedzi, a jej zmiana nie zmienia updated_at
+    version_fields=['id', 'updated_at', 'assigned_to__username'],
+    bulk_params={'ids': 'pk', 'serial_numbers': 'serial_number'},
+    filter_queryset=_filter_equipment,
+    detail_route='equipment:api_equipment_detail',
+)
+
+TRANSFER_RESOURCE = Resource(
+    fields={
+        'id': 'id',
+        'equipment': 'equipment_id',
+        'equipment_serial_number': 'equipment__serial_number',
+        'from_user': 'from_user_id',
+        'to_user': 'to_user_id',
+        'transferred_by': 'transferred_by_id',
+        'transfer_date': 'transfer_date',
+        'reason': 'reason',
+        'approval_status': 'approval_status',
+        'approved_at': 'approved_at',
+        'approved_by': 'approved_by_id',
+        'rejection_reason': 'rejection_reason',
+    },
+    # Przekazanie nie ma daty aktualizacji - zmienia się tylko przy rozpatrzeniu;
+    # numer seryjny pochodzi ze sprzętu
+    version_fields=['id', 'approval_status', 'approved_at', 'equipment__serial_number'],
+    bulk_params={'ids': 'pk'},
+    filter_queryset=_filter_transfers,
+    detail_route='equipment:api_transfer_detail',
+)
+
+MAINTENANCE_RESOURCE = Resource(
+    fields={
+        'id': 'id',
+        'equipment': 'equipment_id',
+        'maintenance_type': 'maintenance_type',
+        'scheduled_date': 'scheduled_date',
+        'completed_date': 'completed_date',
+        'description': 'description',
+        'cost': 'cost',
+        'technician': 'technician',
+        'notes': 'notes',
+        'is_completed': 'is_completed',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    },
+    version_fields=['id', 'updated_at'],
+    bulk_params={'ids': 'pk'},
+    filter_queryset=_filter_maintenance,
+    detail_route='equipment:api_maintenance_detail',
+)
+
+
+def _error_response(message, status, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def api_view(methods):
+    """
+    Widok API: tylko zalogowani (401 zamiast przekierowania na logowanie),
+    dozwolone metody HTTP (405), ApiError zamieniany na odpowiedź JSON.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return _error_response('Wymagane zalogowanie.', 401)
+            if request.method not in methods:
+                response = _error_response('Niedozwolona metoda.', 405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return view_func(request, *args, **kwargs)
+            except ApiError as e:
+                return _error_response(e.message, e.status, **e.extra)
+        return _wrapped_view
+    return decorator
+
+
+def _require_it_staff(request):
+    if not request.user_roles.is_it_staff:
+        raise ApiError('Brak uprawnień do wykonania tej operacji.', 403)
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _parse_fields(request, resource):
+    """Pola z parametru fields= (domyślnie wszystkie)"""
+    if not request.GET.get('fields'):
+        return list(resource.fields)
+    fields = _split(request.GET['fields'])
+    unknown = [name for name in fields if name not in resource.fields]
+    if unknown:
+        raise ApiError(f'Nieznane pola: {", ".join(unknown)}.', available=list(resource.fields))
+    return fields
+
+
+def _parse_int(request, name, default, minimum=0, maximum=None):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(f'Parametr {name} musi być liczbą całkowitą.')
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(f'Parametr {name} poza zakresem.')
+    return value
+
+
+def _fetch(queryset, resource, fields, extra_lookups=()):
+    """
+    Wiersze z wybranymi polami (jedno zapytanie values()). Pola wersji są
+    pobierane zawsze - wyznaczają ETag.
+    """
+    lookups = list(dict.fromkeys(
+        [resource.fields[name] for name in fields] + resource.version_fields + list(extra_lookups)
+    ))
+    return list(queryset.values(*lookups))
+
+
+def _etag(versions):
+    digest = hashlib.md5(repr(versions).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+def _row_versions(rows, resource):
+    return [tuple(row[field] for field in resource.version_fields) for row in rows]
+
+
+def _output(row, resource, fields):
+    return {name: row[resource.fields[name]] for name in fields}
+
+
+def _finish(response, etag):
+    response['ETag'] = etag
+    # Klient zawsze pyta serwer, ale z If-None-Match odpowiedź to 304 bez treści
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+def _list_response(request, resource, queryset):
+    fields = _parse_fields(request, resource)
+    queryset = resource.filter_queryset(queryset, request.GET, request.user_roles.is_it_staff)
+
+    bulk = [(param, lookup) for param, lookup in resource.bulk_params.items() if request.GET.get(param)]
+    if bulk:
+        param, lookup = bulk[0]
+        values = list(dict.fromkeys(_split(request.GET[param])))
+        if len(values) > API_BULK_LIMIT:
+            raise ApiError(f'Najwyżej {API_BULK_LIMIT} wartości w parametrze {param}.')
+        if lookup == 'pk' and not all(value.isdigit() for value in values):
+            raise ApiError('Parametr ids musi zawierać liczby całkowite.')
+        page = queryset.filter(**{f'{lookup}__in': values}).order_by('pk')
+        limit = None
+    else:
+        after = _parse_int(request, 'after', 0)
+        limit = _parse_int(request, 'limit', API_PAGE_SIZE, minimum=1, maximum=API_MAX_PAGE_SIZE)
+        # Jeden wiersz zapasu mówi, czy istnieje następna strona
+        page = queryset.filter(pk__gt=after).order_by('pk')[:limit + 1]
+
+    # Zapytanie warunkowe - najpierw same wersje; zgodny ETag kończy żądanie na 304
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        etag = _etag(list(page.values_list(*resource.version_fields)))
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return _finish(response, etag)
+
+    rows = _fetch(page, resource, fields, [bulk[0][1]] if bulk else ())
+    etag = _etag(_row_versions(rows, resource))
+    data = {}
+    if bulk:
+        param, lookup = bulk[0]
+        found = {str(row[lookup]) for row in rows}
+        data['missing'] = [value for value in values if value not in found]
+    else:
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        data['next'] = None
+        if has_next:
+            params = request.GET.copy()
+            params['after'] = rows[-1]['id']
+            data['next'] = f'{request.path}?{params.urlencode()}'
+    data['results'] = [_output(row, resource, fields) for row in rows]
+    return _finish(JsonResponse(data), etag)
+
+
+def _current_etag(resource, queryset, pk):
+    version = queryset.filter(pk=pk).values_list(*resource.version_fields).first()
+    if version is None:
+        raise ApiError('Nie znaleziono.', 404)
+    return _etag([version])
+
+
+def _item_response(request, resource, queryset, pk, status=200):
+    fields = _parse_fields(request, resource)
+    if request.method == 'GET' and request.META.get('HTTP_IF_NONE_MATCH'):
+        etag = _current_etag(resource, queryset, pk)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return _finish(response, etag)
+
+    rows = _fetch(queryset.filter(pk=pk), resource, fields)
+    if not rows:
+        raise ApiError('Nie znaleziono.', 404)
+    response = JsonResponse(_output(rows[0], resource, fields), status=status)
+    if status == 201:
+        response['Location'] = reverse(resource.detail_route, args=[pk])
+    return _finish(response, _etag(_row_versions(rows, resource)))
+
+
+def _check_if_match(request, resource, queryset, pk):
+    """Zapis warunkowy: If-Match niezgodny z bieżącą wersją to 412"""
+    etag = _current_etag(resource, queryset, pk)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        raise ApiError('Obiekt został zmieniony przez kogoś innego.', 412)
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (UnicodeDecodeError, ValueError):
+        raise ApiError('Treść żądania musi być poprawnym JSON-em.')
+    if not isinstance(data, dict):
+        raise ApiError('Treść żądania musi być obiektem JSON.')
+    return data
+
+
+def _form_data(form_class, data, instance=None):
+    """Dane formularza z JSON; przy aktualizacji brakujące pola mają bieżące wartości"""
+    form_fields = form_class._meta.fields
+    unknown = [name for name in data if name not in form_fields]
+    if unknown:
+        raise ApiError(f'Nieznane lub niezmienialne pola: {", ".join(unknown)}.')
+    if instance is not None:
+        data = {**model_to_dict(instance, fields=form_fields), **data}
+    return data
+
+
+def _validate(form):
+    if not form.is_valid():
+        raise ApiError('Niepoprawne dane.', fields={
+            field: [error['message'] for error in errors]
+            for field, errors in form.errors.get_json_data().items()
+        })
+    return form.cleaned_data
+
+
+def _save_form(form):
+    _validate(form)
+    return form.save()
+
+
+# Sprzęt
+
+@api_view(['GET', 'POST'])
+def equipment_collection(request):
+    queryset = get_user_equipment_queryset(request.user)
+    if request.method == 'POST':
+        _require_it_staff(request)
+        equipment = _save_form(EquipmentForm(_form_data(EquipmentForm, _json_body(request))))
+        return _item_response(request, EQUIPMENT_RESOURCE, queryset, equipment.pk, status=201)
+    return _list_response(request, EQUIPMENT_RESOURCE, queryset)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+def equipment_item(request, pk):
+    queryset = get_user_equipment_queryset(request.user)
+    if request.method == 'GET':
+        return _item_response(request, EQUIPMENT_RESOURCE, queryset, pk)
+
+    _require_it_staff(request)
+    _check_if_match(request, EQUIPMENT_RESOURCE, queryset, pk)
+    equipment = queryset.get(pk=pk)
+    if request.method == 'DELETE':
+        equipment.delete()
+        return HttpResponse(status=204)
+    data = _form_data(EquipmentForm, _json_body(request), equipment)
+    _save_form(EquipmentForm(data, instance=equipment))
+    return _item_response(request, EQUIPMENT_RESOURCE, queryset, pk)
+
+
+# Przekazania
+
+def _transfer_queryset(request):
+    """IT widzi wszystkie przekazania, użytkownik - dotyczące jego sprzętu lub jego samego"""
+    if request.user_roles.is_it_staff:
+        return EquipmentTransfer.objects.all()
+    return EquipmentTransfer.objects.filter(
+        Q(equipment__in=get_user_equipment_queryset(request.user))
+        | Q(to_user=request.user) | Q(from_user=request.user)
+    )
+
+
+@api_view(['GET', 'POST'])
+def transfer_collection(request):
+    queryset = _transfer_queryset(request)
+    if request.method == 'GET':
+        return _list_response(request, TRANSFER_RESOURCE, queryset)
+
+    _require_it_staff(request)
+    data = _json_body(request)
+    cleaned = _validate(EquipmentTransferForm({'to_user': data.get('to_user'), 'reason': data.get('reason', '')}))
+    equipment_id = str(data.get('equipment', ''))
+    if not equipment_id.isdigit() or not Equipment.objects.filter(pk=equipment_id).exists():
+        raise ApiError('Niepoprawne dane.', fields={'equipment': ['Nie znaleziono sprzętu.']})
+    transfers = create_transfers([int(equipment_id)], cleaned['to_user'], request.user, cleaned['reason'])
+    if not transfers:
+        raise ApiError('Tego sprzętu nie można przekazać temu użytkownikowi.', 409)
+    return _item_response(request, TRANSFER_RESOURCE, queryset, transfers[0].pk, status=201)
+
+
+@api_view(['GET', 'PATCH'])
+def transfer_item(request, pk):
+    """PATCH {"approval_status": "approved" | "rejected", "rejection_reason": ...} - decyzja odbiorcy"""
+    queryset = _transfer_queryset(request)
+    if request.method == 'GET':
+        return _item_response(request, TRANSFER_RESOURCE, queryset, pk)
+
+    _check_if_match(request, TRANSFER_RESOURCE, queryset, pk)
+    transfer = queryset.get(pk=pk)
+    if transfer.to_user_id != request.user.pk:
+        raise ApiError('Tylko odbiorca może rozpatrzyć przekazanie.', 403)
+    if transfer.approval_status != 'pending':
+        raise ApiError('To przekazanie zostało już rozpatrzone.', 409)
+    data = _json_body(request)
+    action = {'approved': 'approve', 'rejected': 'reject'}.get(data.get('approval_status'))
+    if action is None:
+        raise ApiError('Pole approval_status musi mieć wartość "approved" lub "rejected".')
+    # Te same reguły co na stronie akceptacji (odrzucenie wymaga powodu)
+    form = EquipmentTransferApprovalForm({'action': action, 'reason': str(data.get('rejection_reason') or '')})
+    if not form.is_valid():
+        raise ApiError('Niepoprawne dane.', fields={
+            'rejection_reason': [error['message'] for error in form.errors.get_json_data().get('reason', [])],
+        })
+    if action == 'approve':
+        decided = transfer.approve(request.user)
+    else:
+        decided = transfer.reject(request.user, form.cleaned_data['reason'])
+    if not decided:
+        raise ApiError('To przekazanie zostało już rozpatrzone.', 409)
+    return _item_response(request, TRANSFER_RESOURCE, queryset, pk)
+
+
+# Harmonogram konserwacji
+
+def _maintenance_queryset(request):
+    return MaintenanceSchedule.objects.filter(equipment__in=get_user_equipment_queryset(request.user))
+
+
+@api_view(['GET', 'POST'])
+def maintenance_collection(request):
+    queryset = _maintenance_queryset(request)
+    if request.method == 'POST':
+        _require_it_staff(request)
+        data = _form_data(MaintenanceScheduleForm, _json_body(request))
+        maintenance = _save_form(MaintenanceScheduleForm(data))
+        return _item_response(request, MAINTENANCE_RESOURCE, queryset, maintenance.pk, status=201)
+    return _list_response(request, MAINTENANCE_RESOURCE, queryset)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+def maintenance_item(request, pk):
+    queryset = _maintenance_queryset(request)
+    if request.method == 'GET':
+        return _item_response(request, MAINTENANCE_RESOURCE, queryset, pk)
+
+    _require_it_staff(request)
+    _check_if_match(request, MAINTENANCE_RESOURCE, queryset, pk)
+    maintenance = queryset.get(pk=pk)
+    if request.method == 'DELETE':
+        maintenance.delete()
+        return HttpResponse(status=204)
+    data = _form_data(MaintenanceScheduleForm, _json_body(request), maintenance)
+    _save_form(MaintenanceScheduleForm(data, instance=maintenance))
+    return _item_response(request, MAINTENANCE_RESOURCE, queryset, pk)
+
+
+# Skaner kodów QR / numerów seryjnych
+
+def _scan_response(data, status=200):
+    response = JsonResponse(data, status=status)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _visible_scan_records(request, codes):
+    """Rekordy dla kodów; sprzęt spoza zakresu użytkownika jest traktowany jak nieznaleziony"""
+    records = resolve_codes(codes)
+    if request.user_roles.is_it_staff:
+        return records
+    return [
+        record if record is not None and record['assigned_to'] == request.user.pk else None
+        for record in records
+    ]
+
+
+@api_view(['GET', 'POST'])
+def scan_lookup(request):
+    """
+    GET ?code=<kod> - jeden zeskanowany kod (numer seryjny albo adres z kodu QR).
+    POST {"codes": [...]} - wiele kodów naraz, wyniki w kolejności kodów.
+    """
+    if request.method == 'GET':
+        code = request.GET.get('code', '').strip()
+        if not code:
+            raise ApiError('Podaj kod w parametrze code.')
+        record = _visible_scan_records(request, [code])[0]
+        if record is None:
+            raise ApiError('Nie znaleziono sprzętu o tym kodzie.', 404, code=code)
+        return _scan_response(record)
+
+    codes = _json_body(request).get('codes')
+    if not isinstance(codes, list) or not all(isinstance(code, str) and code.strip() for code in codes):
+        raise ApiError('Pole codes musi być listą niepustych kodów.')
+    if len(codes) > SCAN_BATCH_LIMIT:
+        raise ApiError(f'Najwyżej {SCAN_BATCH_LIMIT} kodów w jednym żądaniu.')
+    records = _visible_scan_records(request, codes)
+    return _scan_response({
+        'results': [{'code': code, 'equipment': record} for code, record in zip(codes, records)],
+        'missing': [code for code, record in zip(codes, records) if record is None],
+    })
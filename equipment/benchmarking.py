@@ -0,0 +1,158 @@
+"""
+Wywoływanie wszystkich widoków aplikacji przez klienta testowego.
+
+Wspólne dla poleceń benchmark_views (czasy, zapytania, pamięć) oraz
+index_advisor (plany zapytań). Widoki są wywoływane jako użytkownik IT
+i zwykły użytkownik, z parametrami wskazującymi na obiekty testowe.
+
+Użytkownicy i obiekty testowe oraz wszystko, co zapiszą widoki, powstają
+w transakcji wycofywanej na końcu (bench_session) - pomiar nie zmienia
+danych w bazie. Baza SQLite jest przez ten czas zablokowana do zapisu,
+dlatego pomiary najlepiej wykonywać na kopii bazy.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls as equipment_urls
+from .caching import bump_dashboard_version
+from .models import Equipment, EquipmentImport, EquipmentTransfer, ExportJob
+from .roles import IT_GROUP_NAME, invalidate_user_roles
+
+
+BENCH_IT_USERNAME = 'bench_it'
+BENCH_USER_USERNAME = 'bench_user'
+BENCH_REASON = 'Benchmark'
+
+# Widoki pomijane - wylogowanie przerwałoby sesję klienta
+SKIPPED_ROUTES = {'logout'}
+
+
+def bench_users():
+    """Użytkownik IT i zwykły użytkownik, w imieniu których wywoływane są widoki"""
+    it_group, _ = Group.objects.get_or_create(name=IT_GROUP_NAME)
+    it_user, _ = User.objects.get_or_create(username=BENCH_IT_USERNAME, defaults={'first_name': 'Benchmark', 'last_name': 'IT'})
+    it_user.groups.add(it_group)
+    regular_user, _ = User.objects.get_or_create(username=BENCH_USER_USERNAME, defaults={'first_name': 'Benchmark', 'last_name': 'Użytkownik'})
+    return it_user, regular_user
+
+
+def bench_fixtures(it_user, regular_user):
+    """
+    Sprzęt, przekazania, eksport i import użytkowników testowych - wartości
+    parametrów adresów widoków. Zmienia dane (przypisanie sprzętu, akceptacja
+    przekazania) - wywoływane tylko w bench_session.
+    Zwraca None, jeśli w bazie nie ma sprzętu.
+    """
+    equipment = Equipment.objects.filter(assigned_to=regular_user).order_by('pk').first()
+    if equipment is None:
+        equipment = Equipment.objects.order_by('pk').first()
+        if equipment is None:
+            return None
+        Equipment.objects.filter(pk=equipment.pk).update(assigned_to=regular_user, status='in_use')
+
+    approved = EquipmentTransfer.objects.filter(to_user=regular_user, reason=BENCH_REASON, approval_status='approved').first()
+    if approved is None:
+        approved = EquipmentTransfer.objects.create(
+            equipment=equipment, to_user=regular_user, transferred_by=it_user, reason=BENCH_REASON,
+        )
+        approved.approve(regular_user)
+    pending = EquipmentTransfer.objects.filter(to_user=regular_user, reason=BENCH_REASON, approval_status='pending').first()
+    if pending is None:
+        pending = EquipmentTransfer.objects.create(
+            equipment=equipment, from_user=regular_user, to_user=regular_user,
+            transferred_by=it_user, reason=BENCH_REASON,
+        )
+
+    job, _ = ExportJob.objects.get_or_create(created_by=it_user, kind='equipment_csv')
+    equipment_import, _ = EquipmentImport.objects.get_or_create(created_by=it_user, file_name='benchmark.csv')
+    return {
+        'pk': equipment.pk,
+        'transfer_id': approved.pk,
+        'pending_transfer_id': pending.pk,
+        'job_id': job.pk,
+        'import_id': equipment_import.pk,
+        'search': equipment.name.split()[0],
+        'serial_number': equipment.serial_number,
+    }
+
+
+@contextmanager
+def bench_session():
+    """
+    Użytkownicy i obiekty testowe w transakcji wycofywanej po wyjściu z bloku.
+    Zwraca (użytkownik IT, zwykły użytkownik, fixtures); fixtures to None,
+    jeśli w bazie nie ma sprzętu.
+    """
+    user_ids = []
+    try:
+        with transaction.atomic():
+            try:
+                it_user, regular_user = bench_users()
+                user_ids = [it_user.pk, regular_user.pk]
+                yield it_user, regular_user, bench_fixtures(it_user, regular_user)
+            finally:
+                transaction.set_rollback(True)
+    finally:
+        # Cache poza bazą nie jest wycofywany - role i dashboard mogły zostać
+        # zapisane dla obiektów, których po wycofaniu już nie ma
+        invalidate_user_roles(user_ids)
+        bump_dashboard_version()
+
+
+def route_cases(fixtures, only_routes=None):
+    """Żądania GET do wykonania: każdy widok z equipment/urls.py i kilka wariantów"""
+    cases = []
+    for pattern in equipment_urls.urlpatterns:
+        name = pattern.name
+        if name in SKIPPED_ROUTES or (only_routes and name not in only_routes):
+            continue
+
+        kwargs = {}
+        for param in pattern.pattern.converters:
+            if param == 'transfer_id':
+                key = 'pending_transfer_id' if name == 'approve_transfer' else 'transfer_id'
+                kwargs[param] = fixtures[key]
+            elif name == 'api_transfer_detail':
+                kwargs[param] = fixtures['transfer_id']
+            elif param == 'fmt':
+                kwargs[param] = 'svg'
+            else:
+                kwargs[param] = fixtures[param]
+        url = reverse(f'equipment:{name}', kwargs=kwargs)
+        # Przekazanie zbiorcze bez zaznaczonego sprzętu tylko przekierowuje
+        params = {'ids': fixtures['pk']} if name == 'equipment_bulk_transfer' else {}
+        if name == 'api_scan':
+            params = {'code': fixtures['serial_number']}
+        cases.append({'label': name, 'route': name, 'url': url, 'params': params})
+
+        # Dodatkowe warianty najczęściej używanych widoków
+        if name == 'equipment_list':
+            cases.append({'label': 'equipment_list?search', 'route': name, 'url': url, 'params': {'search': fixtures['search']}})
+            cases.append({'label': 'equipment_list?status', 'route': name, 'url': url, 'params': {'status': 'in_use'}})
+        elif name == 'equipment_qr':
+            url = reverse(f'equipment:{name}', kwargs={**kwargs, 'fmt': 'png'})
+            cases.append({'label': 'equipment_qr.png', 'route': name, 'url': url, 'params': {}})
+        elif name == 'transfer_protocols_batch':
+            week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+            cases.append({'label': 'transfer_protocols_batch?output=pdf', 'route': name, 'url': url,
+                          'params': {'output': 'pdf', 'date_from': week_ago}})
+    return cases
+
+
+def fetch(client, case):
+    """Wykonuje żądanie i odczytuje całą treść. Zwraca (odpowiedź, rozmiar w bajtach)."""
+    response = client.get(case['url'], case['params'])
+    # Odpowiedzi strumieniowe są generowane dopiero przy odczycie treści
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    # Klient testowy sam zamyka odpowiedź (strumieniową - po odczycie treści).
+    # Ponowne close() wysłałoby request_finished, które w transakcji
+    # bench_session zamknęłoby połączenie z bazą
+    return response, size
@@ -0,0 +1,85 @@
+"""
+Cache kontekstu dashboardu.
+
+Klucze zawierają numer wersji, który jest podbijany po każdej zmianie
+sprzętu lub przekazań - stare wpisy przestają być używane i wygasają same.
+Backend wybiera się ustawieniem DASHBOARD_CACHE_BACKEND ('locmem' lub 'file';
+przy wielu procesach serwera należy użyć 'file', który jest współdzielony).
+Kontekst zapisywany do cache jest liczony z 'default', nie z repliki -
+opóźniona replika zapisałaby stare dane pod kluczem nowej wersji.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .routers import primary_reads
+
+
+DASHBOARD_VERSION_KEY = 'equipment:dashboard:version'
+
+
+def get_dashboard_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _dashboard_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 600)
+
+
+def dashboard_version():
+    return get_dashboard_cache().get_or_set(DASHBOARD_VERSION_KEY, 1, None)
+
+
+def bump_dashboard_version():
+    cache = get_dashboard_cache()
+    cache.add(DASHBOARD_VERSION_KEY, 1, None)
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        # Klucz wygasł lub został usunięty między add() a incr()
+        cache.set(DASHBOARD_VERSION_KEY, 1, None)
+
+
+def invalidate_dashboard():
+    """Unieważnia cache dashboardu po zatwierdzeniu bieżącej transakcji"""
+    transaction.on_commit(bump_dashboard_version)
+
+
+def dashboard_cache_key(user, is_it_staff, version=None):
+    """
+    IT współdzieli jeden wpis (cała ewidencja), zwykły użytkownik ma własny.
+    Data jest częścią klucza, bo alerty gwarancyjne zależą od dnia.
+    """
+    if version is None:
+        version = dashboard_version()
+    scope = 'it' if is_it_staff else f'user:{user.pk}'
+    return (
+        f'equipment:dashboard:{scope}:'
+        f'v{version}:{timezone.localdate().isoformat()}'
+    )
+
+
+def get_or_build_dashboard_context(user, is_it_staff, build):
+    """Zwraca kontekst dashboardu z cache albo buduje go funkcją `build`"""
+    cache = get_dashboard_cache()
+    key = dashboard_cache_key(user, is_it_staff)
+    context = cache.get(key)
+    if context is None:
+        with primary_reads():
+            context = build()
+        cache.set(key, context, _dashboard_timeout())
+    return context
+
+
+async def aget_or_build_dashboard_context(user, is_it_staff, abuild):
+    """Asynchroniczna wersja get_or_build_dashboard_context; `abuild` to funkcja async"""
+    cache = get_dashboard_cache()
+    version = await cache.aget_or_set(DASHBOARD_VERSION_KEY, 1, None)
+    key = dashboard_cache_key(user, is_it_staff, version)
+    context = await cache.aget(key)
+    if context is None:
+        with primary_reads():
+            context = await abuild()
+        await cache.aset(key, context, _dashboard_timeout())
+    return context
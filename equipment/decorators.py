@@ -1,18 +1,31 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.contrib.auth.models import Group
+from .roles import aresolve_request_user, get_user_roles
 
 
 def it_staff_required(view_func):
     """
     Dekorator sprawdzający czy użytkownik należy do grupy IT
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_view(request, *args, **kwargs):
+            await aresolve_request_user(request)
+            if not request.user.is_authenticated:
+                return redirect('equipment:login')
+            if not request.user_roles.is_it_staff:
+                messages.error(request, 'Nie masz uprawnień do wykonania tej operacji.')
+                return redirect('equipment:my_equipment')
+            return await view_func(request, *args, **kwargs)
+        return _async_view
+
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         if request.user.is_authenticated:
             # Sprawdź czy użytkownik jest w grupie IT lub jest superuser
-            if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
+            if request.user_roles.is_it_staff:
                 return view_func(request, *args, **kwargs)
             else:
                 messages.error(request, 'Nie masz uprawnień do wykonania tej operacji.')
@@ -26,11 +39,33 @@ def can_access_equipment(view_func):
     """
     Dekorator sprawdzający czy użytkownik może uzyskać dostęp do konkretnego sprzętu
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_view(request, *args, **kwargs):
+            await aresolve_request_user(request)
+            if not request.user.is_authenticated:
+                return redirect('equipment:login')
+            equipment_id = kwargs.get('pk')
+            if request.user_roles.is_it_staff or not equipment_id:
+                return await view_func(request, *args, **kwargs)
+
+            from .models import Equipment
+            try:
+                assigned_to_id = await Equipment.objects.values_list('assigned_to_id', flat=True).aget(pk=equipment_id)
+            except Equipment.DoesNotExist:
+                messages.error(request, 'Sprzęt nie istnieje.')
+                return redirect('equipment:my_equipment')
+            if assigned_to_id != request.user.pk:
+                messages.error(request, 'Nie masz dostępu do tego sprzętu.')
+                return redirect('equipment:my_equipment')
+            return await view_func(request, *args, **kwargs)
+        return _async_view
+
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         if request.user.is_authenticated:
             # Superuser i IT mają pełny dostęp
-            if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
+            if request.user_roles.is_it_staff:
                 return view_func(request, *args, **kwargs)
             
             # Sprawdź czy użytkownik ma dostęp do konkretnego sprzętu
@@ -64,7 +99,7 @@ def get_user_equipment_queryset(user):
     if not user.is_authenticated:
         return Equipment.objects.none()
     
-    if user.is_superuser or user.groups.filter(name='IT').exists():
+    if get_user_roles(user).is_it_staff:
         # Pełny dostęp dla superuser i IT
         return Equipment.objects.all()
     else:
@@ -78,7 +113,7 @@ def can_transfer_equipment(user, equipment):
     Tylko użytkownicy z grupy IT mogą przekazywać sprzęt
     """
     # Tylko IT i superuser mogą przekazywać sprzęt
-    if user.is_superuser or user.groups.filter(name='IT').exists():
+    if get_user_roles(user).is_it_staff:
         return equipment.can_be_transferred()
     else:
         # Zwykli użytkownicy nie mogą przekazywać sprzętu
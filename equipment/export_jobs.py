@@ -0,0 +1,165 @@
+"""
+Eksporty w tle.
+
+Widok tworzy ExportJob w stanie 'pending', a `manage.py run_export_worker`
+przejmuje oczekujące zadania i wykonuje je w puli procesów. Plik wynikowy
+trafia do MEDIA_ROOT/exports/ pod losową nazwą i jest pobierany wyłącznie
+przez widok export_job_download (z kontrolą uprawnień).
+
+Worker odświeża heartbeat_at swoich zadań przy każdym sprawdzeniu kolejki.
+Zadanie 'running' bez sygnału dłużej niż EXPORT_JOB_STALE_SECONDS (worker
+zatrzymany w trakcie eksportu) wraca do kolejki, a po EXPORT_JOB_MAX_ATTEMPTS
+próbach jest oznaczane jako błąd.
+"""
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .exports import (
+    EXPORT_CHUNK_SIZE, equipment_export_queryset, equipment_values, iter_csv, iter_ndjson,
+    transfers_export_queryset, write_equipment_xlsx, write_transfers_xlsx,
+)
+from .filters import filter_equipment
+from .models import Equipment, ExportJob
+
+
+FILE_EXTENSIONS = {
+    'equipment_xlsx': 'xlsx',
+    'transfers_xlsx': 'xlsx',
+    'equipment_csv': 'csv',
+    'equipment_ndjson': 'ndjson',
+}
+
+DOWNLOAD_PREFIXES = {
+    'equipment_xlsx': 'sprzet_it',
+    'transfers_xlsx': 'transfery_sprzetu',
+    'equipment_csv': 'sprzet_it',
+    'equipment_ndjson': 'sprzet_it',
+}
+
+
+def download_filename(job):
+    extension = FILE_EXTENSIONS[job.kind]
+    return f'{DOWNLOAD_PREFIXES[job.kind]}_{job.created_at.strftime("%Y%m%d_%H%M")}.{extension}'
+
+
+def claim_pending_jobs(limit):
+    """Przejmuje do `limit` oczekujących zadań (bezpieczne przy wielu workerach)"""
+    claimed = []
+    pending = ExportJob.objects.filter(status='pending').order_by('created_at')
+    for job_id in pending.values_list('pk', flat=True)[:limit]:
+        now = timezone.now()
+        won = ExportJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+        )
+        if won:
+            claimed.append(job_id)
+    return claimed
+
+
+def touch_jobs(job_ids):
+    """Odświeża heartbeat_at zadań wykonywanych przez bieżący worker"""
+    if job_ids:
+        ExportJob.objects.filter(pk__in=job_ids, status='running').update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Zadania 'running' bez sygnału workera od `stale_after` sekund wracają do
+    kolejki (lub dostają status 'failed' po wyczerpaniu prób).
+    Zwraca (liczba ponowionych, liczba oznaczonych jako błąd).
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'EXPORT_JOB_STALE_SECONDS', 300)
+    max_attempts = getattr(settings, 'EXPORT_JOB_MAX_ATTEMPTS', 2)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    stale = ExportJob.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed', error='Worker eksportów przerwał pracę w trakcie eksportu.', finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status='pending', started_at=None, heartbeat_at=None, processed_rows=0, total_rows=None,
+    )
+    return requeued, failed
+
+
+def init_worker(settings_module):
+    """Inicjalizacja procesu puli - własne połączenia z bazą"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+    # Połączenia odziedziczone po procesie nadrzędnym (fork) nie mogą być współdzielone
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+
+
+def _write_lines(fileobj, lines, progress):
+    """Zapisuje linie tekstu (UTF-8). Zwraca liczbę zapisanych linii."""
+    count = 0
+    for count, line in enumerate(lines, 1):
+        fileobj.write(line.encode('utf-8'))
+        if count % EXPORT_CHUNK_SIZE == 0:
+            progress(count)
+    return count
+
+
+def _equipment_queryset(job):
+    queryset, _ = filter_equipment(Equipment.objects.all(), job.filters, True)
+    return queryset
+
+
+def run_export_job(job_id):
+    """Wykonuje zadanie eksportu (w procesie puli). Zwraca status zadania."""
+    job = ExportJob.objects.get(pk=job_id)
+
+    def progress(count):
+        ExportJob.objects.filter(pk=job_id).update(processed_rows=count)
+
+    name = f'exports/{job.kind}_{uuid.uuid4().hex}.{FILE_EXTENSIONS[job.kind]}'
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    try:
+        if job.kind == 'transfers_xlsx':
+            queryset = transfers_export_queryset()
+        elif job.kind == 'equipment_xlsx':
+            queryset = equipment_export_queryset(_equipment_queryset(job))
+        else:
+            queryset = _equipment_queryset(job)
+        ExportJob.objects.filter(pk=job_id).update(total_rows=queryset.count())
+
+        with open(path, 'wb') as fileobj:
+            if job.kind == 'equipment_xlsx':
+                rows = write_equipment_xlsx(fileobj, queryset, progress)
+            elif job.kind == 'transfers_xlsx':
+                rows = write_transfers_xlsx(fileobj, queryset, progress)
+            elif job.kind == 'equipment_csv':
+                # Pierwsza linia CSV to nagłówek
+                rows = _write_lines(fileobj, iter_csv(equipment_values(queryset)), progress) - 1
+            else:
+                rows = _write_lines(fileobj, iter_ndjson(equipment_values(queryset)), progress)
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        mark_job_failed(job_id, e)
+        return 'failed'
+
+    ExportJob.objects.filter(pk=job_id).update(
+        status='done', file=name, processed_rows=rows, finished_at=timezone.now()
+    )
+    return 'done'
+
+
+def mark_job_failed(job_id, error):
+    ExportJob.objects.filter(pk=job_id).update(
+        status='failed', error=str(error), finished_at=timezone.now()
+    )
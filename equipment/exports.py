@@ -0,0 +1,175 @@
+"""
+Eksport sprzętu i przekazań do plików.
+
+Skoroszyty są tworzone w trybie write-only openpyxl, a wiersze pobierane
+iteratorem w porcjach, więc zużycie pamięci nie zależy od liczby rekordów.
+Eksporty CSV/NDJSON czytają wiersze prosto z values() - bez tworzenia
+obiektów modelu - i są generowane w trakcie wysyłania odpowiedzi.
+"""
+import csv
+import json
+import tempfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from .models import Equipment, EquipmentTransfer
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+EQUIPMENT_HEADERS = [
+    'Nazwa', 'Typ', 'Numer seryjny', 'Numer faktury', 'Data zakupu',
+    'Cena zakupu', 'Lokalizacja', 'Dostawca', 'Koniec gwarancji',
+    'Status', 'Przypisany do', 'Uwagi', 'Data utworzenia'
+]
+EQUIPMENT_COLUMN_WIDTHS = [25, 20, 20, 15, 12, 12, 15, 15, 12, 12, 20, 30, 18]
+
+TRANSFER_HEADERS = [
+    'Sprzęt', 'Numer seryjny', 'Od użytkownika', 'Do użytkownika',
+    'Data transferu', 'Przekazane przez', 'Powód'
+]
+TRANSFER_COLUMN_WIDTHS = [25, 20, 20, 20, 18, 20, 40]
+
+# Styl nagłówków
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+
+def equipment_export_queryset(queryset=None):
+    queryset = Equipment.objects.all() if queryset is None else queryset
+    return queryset.select_related('assigned_to').order_by('name')
+
+
+def transfers_export_queryset():
+    return EquipmentTransfer.objects.select_related(
+        'equipment', 'from_user', 'to_user', 'transferred_by'
+    ).order_by('-transfer_date')
+
+
+def equipment_row(equipment):
+    return [
+        equipment.name,
+        equipment.type,
+        equipment.serial_number,
+        equipment.invoice_number or '',
+        equipment.purchase_date.strftime('%d.%m.%Y') if equipment.purchase_date else '',
+        float(equipment.purchase_price) if equipment.purchase_price else '',
+        equipment.location,
+        equipment.supplier or '',
+        equipment.warranty_end_date.strftime('%d.%m.%Y') if equipment.warranty_end_date else '',
+        equipment.get_status_display(),
+        equipment.assigned_to.get_full_name() if equipment.assigned_to else '',
+        equipment.notes or '',
+        equipment.created_at.strftime('%d.%m.%Y %H:%M'),
+    ]
+
+
+def transfer_row(transfer):
+    return [
+        transfer.equipment.name,
+        transfer.equipment.serial_number,
+        transfer.from_user.get_full_name() if transfer.from_user else 'System',
+        transfer.to_user.get_full_name() if transfer.to_user else 'System',
+        transfer.transfer_date.strftime('%d.%m.%Y %H:%M'),
+        transfer.transferred_by.get_full_name() if transfer.transferred_by else 'System',
+        transfer.reason or '',
+    ]
+
+
+def write_xlsx(fileobj, title, headers, column_widths, rows, progress=None):
+    """
+    Zapisuje skoroszyt do pliku w trybie write-only.
+    `progress` (opcjonalnie) jest wywoływane z liczbą zapisanych wierszy.
+    Zwraca liczbę wierszy danych.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    # Szerokości kolumn muszą być ustawione przed pierwszym wierszem
+    for col, width in enumerate(column_widths, 1):
+        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        cell.alignment = HEADER_ALIGNMENT
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    count = 0
+    for count, row in enumerate(rows, 1):
+        ws.append(row)
+        if progress and count % EXPORT_CHUNK_SIZE == 0:
+            progress(count)
+
+    wb.save(fileobj)
+    if progress:
+        progress(count)
+    return count
+
+
+def write_equipment_xlsx(fileobj, queryset=None, progress=None):
+    queryset = equipment_export_queryset() if queryset is None else queryset
+    rows = (equipment_row(equipment) for equipment in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    return write_xlsx(fileobj, "Sprzęt IT", EQUIPMENT_HEADERS, EQUIPMENT_COLUMN_WIDTHS, rows, progress)
+
+
+def write_transfers_xlsx(fileobj, queryset=None, progress=None):
+    queryset = transfers_export_queryset() if queryset is None else queryset
+    rows = (transfer_row(transfer) for transfer in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    return write_xlsx(fileobj, "Transfery sprzętu", TRANSFER_HEADERS, TRANSFER_COLUMN_WIDTHS, rows, progress)
+
+
+def spooled_export(writer, **kwargs):
+    """
+    Zapisuje eksport do pliku tymczasowego na dysku i zwraca go otwartego
+    na początku - gotowego do przesłania przez FileResponse.
+    """
+    fileobj = tempfile.TemporaryFile()
+    writer(fileobj, **kwargs)
+    fileobj.seek(0)
+    return fileobj
+
+
+# Pola eksportów CSV/NDJSON (wartości surowe, daty w ISO 8601)
+EQUIPMENT_VALUES_FIELDS = [
+    'id', 'name', 'type', 'serial_number', 'invoice_number', 'purchase_date',
+    'purchase_price', 'location', 'supplier', 'warranty_end_date', 'status',
+    'assigned_to__username', 'notes', 'created_at', 'updated_at',
+]
+
+
+def equipment_values(queryset):
+    """Wiersze sprzętu jako słowniki, pobierane porcjami"""
+    if 'search_rank' not in queryset.query.annotations:
+        # Bez wyszukiwania - stabilna kolejność po kluczu głównym
+        queryset = queryset.order_by('pk')
+    return queryset.values(*EQUIPMENT_VALUES_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class _Echo:
+    """Pseudo-bufor dla csv.writer - zwraca zapisany wiersz zamiast go przechowywać"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields=EQUIPMENT_VALUES_FIELDS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
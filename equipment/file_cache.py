@@ -0,0 +1,85 @@
+"""
+Ograniczony cache plików na dysku z usuwaniem najdawniej używanych (LRU).
+
+Klucz to skrót (hex) treści wejściowej, więc wpis nigdy się nie
+dezaktualizuje - zmienia się tylko klucz. Czas modyfikacji pliku służy
+jako znacznik ostatniego użycia; po przekroczeniu limitu usuwane są
+najdawniej używane wpisy.
+"""
+import os
+import tempfile
+
+
+class LRUFileCache:
+
+    # Ułamek wpisów usuwanych przy przekroczeniu limitu (jak CULL_FREQUENCY w cache Django)
+    CULL_FRACTION = 0.1
+
+    def __init__(self, directory, max_entries, suffix=''):
+        self.directory = str(directory)
+        self.max_entries = max_entries
+        self.suffix = suffix
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}{self.suffix}')
+
+    def get(self, key):
+        """Ścieżka pliku z cache (i odnotowanie użycia) albo None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def read(self, key):
+        """Zawartość wpisu (bajty) albo None"""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as cached:
+                return cached.read()
+        except FileNotFoundError:
+            # Wpis usunięty w międzyczasie przez inny proces
+            return None
+
+    def set(self, key, content):
+        """Zapisuje wpis atomowo (plik tymczasowy + rename) i zwraca jego ścieżkę"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.cull()
+        return self.path(key)
+
+    def cull(self):
+        """Usuwa najdawniej używane wpisy, jeśli cache przekroczył limit"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix) and not entry.name.endswith('.tmp'):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        if len(entries) <= self.max_entries:
+            return 0
+
+        entries.sort()
+        excess = len(entries) - self.max_entries
+        to_remove = excess + int(self.max_entries * self.CULL_FRACTION)
+        removed = 0
+        for _, path in entries[:to_remove]:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
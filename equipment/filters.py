@@ -0,0 +1,41 @@
+from django.db.models import Q
+
+from .search import search_equipment
+
+
+EQUIPMENT_FILTER_PARAMS = ('search', 'status', 'user', 'location', 'supplier')
+
+
+def filter_equipment(equipment_list, params, is_it_staff):
+    """
+    Nakłada filtry listy sprzętu (parametry GET: search, status, user,
+    location, supplier) na queryset. Zwraca (queryset, słownik filtrów).
+    Wspólne dla listy sprzętu i eksportów.
+    """
+    filters = {name: params.get(name, '') for name in EQUIPMENT_FILTER_PARAMS}
+
+    # Wyszukiwanie - indeks pełnotekstowy (oraz ID, jeśli tekst to liczba), wyniki wg trafności
+    if filters['search']:
+        equipment_list = search_equipment(equipment_list, filters['search'])
+
+    # Filtrowanie po statusie
+    if filters['status']:
+        equipment_list = equipment_list.filter(status=filters['status'])
+
+    # Filtrowanie po użytkowniku (tylko dla IT)
+    if filters['user'] and is_it_staff:
+        equipment_list = equipment_list.filter(
+            Q(assigned_to__username__icontains=filters['user']) |
+            Q(assigned_to__first_name__icontains=filters['user']) |
+            Q(assigned_to__last_name__icontains=filters['user'])
+        )
+
+    # Filtrowanie po lokalizacji
+    if filters['location']:
+        equipment_list = equipment_list.filter(location__icontains=filters['location'])
+
+    # Filtrowanie po dostawcy
+    if filters['supplier']:
+        equipment_list = equipment_list.filter(supplier__icontains=filters['supplier'])
+
+    return equipment_list, filters
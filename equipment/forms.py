@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import AuthenticationForm
-from .models import Equipment, EquipmentTransfer
+from .models import Equipment, EquipmentTransfer, MaintenanceSchedule
 
 
 class EquipmentForm(forms.ModelForm):
@@ -61,6 +61,15 @@ class EquipmentTransferForm(forms.ModelForm):
         return to_user
 
 
+class MaintenanceScheduleForm(forms.ModelForm):
+    class Meta:
+        model = MaintenanceSchedule
+        fields = [
+            'equipment', 'maintenance_type', 'scheduled_date', 'completed_date',
+            'description', 'cost', 'technician', 'notes', 'is_completed',
+        ]
+
+
 class CustomLoginForm(AuthenticationForm):
     """Niestandardowy formularz logowania z Bootstrap styling"""
     username = forms.CharField(
@@ -119,4 +128,20 @@ class EquipmentTransferApprovalForm(forms.Form):
         if action == 'reject' and not reason:
             raise forms.ValidationError('Powód odrzucenia jest wymagany.')
         
-        return reason 
\ No newline at end of file
+        return reason
+
+
+class EquipmentImportUploadForm(forms.Form):
+    """Plik z listą sprzętu do importu"""
+    file = forms.FileField(
+        label='Plik CSV lub XLSX',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+    )
+
+    def clean_file(self):
+        from .imports import IMPORT_EXTENSIONS
+
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(IMPORT_EXTENSIONS):
+            raise forms.ValidationError('Obsługiwane formaty plików to CSV i XLSX.')
+        return uploaded
@@ -0,0 +1,254 @@
+"""
+Import sprzętu z plików CSV i XLSX.
+
+Plik jest czytany strumieniowo (csv.reader lub openpyxl w trybie
+read-only), a wiersze walidowane regułami EquipmentForm w porcjach po
+IMPORT_CHUNK_SIZE. Poprawne wiersze każdej porcji trafiają do bazy jednym
+bulk_create z update_conflicts - istniejący sprzęt (ten sam numer
+seryjny) jest aktualizowany, nowy dodawany. Błędne wiersze są zapisywane
+na bieżąco do raportu CSV, więc zużycie pamięci nie zależy od wielkości
+pliku (poza zbiorem numerów seryjnych, który wykrywa duplikaty w pliku).
+"""
+import csv
+import io
+import itertools
+import os
+from datetime import date, datetime
+
+from django import forms
+from django.contrib.auth.models import User
+
+import openpyxl
+
+from .forms import EquipmentForm
+from .models import Equipment
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+ERROR_REPORT_HEADERS = ['Wiersz', 'Numer seryjny', 'Pole', 'Błąd']
+
+# Pole modelu -> akceptowane nagłówki kolumn (oprócz nazwy pola)
+COLUMN_ALIASES = {
+    'name': ['Nazwa'],
+    'type': ['Typ'],
+    'serial_number': ['Numer seryjny'],
+    'invoice_number': ['Numer faktury'],
+    'purchase_date': ['Data zakupu'],
+    'purchase_price': ['Cena zakupu'],
+    'location': ['Lokalizacja'],
+    'supplier': ['Dostawca'],
+    'warranty_end_date': ['Koniec gwarancji'],
+    'status': ['Status'],
+    'assigned_to': ['assigned_to__username', 'Przypisany użytkownik', 'Login użytkownika'],
+    'notes': ['Uwagi'],
+}
+
+STATUS_LABELS = {label.lower(): value for value, label in Equipment.STATUS_CHOICES}
+
+
+class ImportFileError(Exception):
+    """Plik nie nadaje się do importu (format, brak wymaganych kolumn)"""
+
+
+class EquipmentImportForm(EquipmentForm):
+    """
+    Reguły EquipmentForm dla jednego wiersza importu. Użytkownik jest
+    podawany loginem (słownik `users` pobrany raz dla całej porcji),
+    a unikalność numeru seryjnego nie jest sprawdzana - to upsert.
+    """
+    assigned_to = forms.CharField(required=False)
+
+    class Meta(EquipmentForm.Meta):
+        fields = [name for name in EquipmentForm.Meta.fields if name != 'assigned_to']
+
+    def __init__(self, *args, users=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.users = users or {}
+
+    def clean_assigned_to(self):
+        username = self.cleaned_data['assigned_to']
+        if not username:
+            return None
+        if username not in self.users:
+            raise forms.ValidationError(f'Nie znaleziono użytkownika "{username}".')
+        return self.users[username]
+
+    def validate_unique(self):
+        pass
+
+    def rebind(self, data):
+        """
+        Ponowne użycie formularza dla kolejnego wiersza. Konstruktor
+        kopiuje (deepcopy) wszystkie pola i widżety - przy dziesiątkach
+        tysięcy wierszy to większość czasu walidacji.
+        """
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        self._bound_fields_cache = {}
+        self.instance = Equipment()
+        return self
+
+
+IMPORT_FIELDS = list(EquipmentImportForm.base_fields)
+REQUIRED_FIELDS = [name for name, field in EquipmentImportForm.base_fields.items() if field.required]
+
+
+def _header_map():
+    mapping = {}
+    for field in IMPORT_FIELDS:
+        for header in [field, *COLUMN_ALIASES.get(field, [])]:
+            mapping[header.strip().lower()] = field
+    return mapping
+
+
+def map_columns(header):
+    """Indeksy kolumn pliku dla pól importu; brak wymaganej kolumny to ImportFileError"""
+    known = _header_map()
+    columns = {}
+    for index, title in enumerate(header):
+        field = known.get(_cell_text(title).lower())
+        if field and field not in columns:
+            columns[field] = index
+    missing = [field for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        labels = ', '.join(str(Equipment._meta.get_field(field).verbose_name) for field in missing)
+        raise ImportFileError(f'Brak wymaganych kolumn: {labels}.')
+    return columns
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    first_line = text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(first_line, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(itertools.chain([first_line], text), dialect)
+
+
+def _iter_xlsx(fileobj):
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'Nie można odczytać pliku XLSX: {e}')
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Wiersze pliku (pierwszy to nagłówek) czytane strumieniowo"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _iter_csv(fileobj)
+    if extension == '.xlsx':
+        return _iter_xlsx(fileobj)
+    raise ImportFileError('Obsługiwane formaty plików to CSV i XLSX.')
+
+
+def _row_data(row, columns):
+    data = {}
+    for field, index in columns.items():
+        data[field] = _cell_text(row[index]) if index < len(row) else ''
+    if 'status' in data:
+        data['status'] = STATUS_LABELS.get(data['status'].lower(), data['status'])
+    if data.get('purchase_price'):
+        data['purchase_price'] = data['purchase_price'].replace(' ', '').replace(',', '.')
+    return data
+
+
+class EquipmentImporter:
+    """
+    Import jednego pliku. `error_file` to otwarty plik tekstowy na raport
+    błędów CSV; po run() liczniki wierszy są dostępne jako atrybuty.
+    """
+
+    def __init__(self, error_file, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, progress=None):
+        self.errors = csv.writer(error_file)
+        self.errors.writerow(ERROR_REPORT_HEADERS)
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.total_rows = self.created_rows = self.updated_rows = self.error_rows = 0
+        self._seen_serials = {}
+
+    def run(self, fileobj, filename):
+        rows = iter_rows(fileobj, filename)
+        header = next(rows, None)
+        if header is None:
+            raise ImportFileError('Plik jest pusty.')
+        columns = map_columns(header)
+        # Aktualizowane są tylko kolumny obecne w pliku (updated_at zawsze)
+        self.update_fields = [field for field in columns if field != 'serial_number'] + ['updated_at']
+
+        numbered = ((number, row) for number, row in enumerate(rows, 2) if any(_cell_text(v) for v in row))
+        while True:
+            chunk = list(itertools.islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk([(number, _row_data(row, columns)) for number, row in chunk])
+            if self.progress:
+                self.progress(self)
+        return self
+
+    def _error(self, number, serial_number, field, message):
+        label = Equipment._meta.get_field(field).verbose_name if field in IMPORT_FIELDS else ''
+        self.errors.writerow([number, serial_number, label, message])
+
+    def _import_chunk(self, chunk):
+        usernames = {data['assigned_to'] for _, data in chunk if data.get('assigned_to')}
+        users = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+        valid = []
+        form = EquipmentImportForm(users=users)
+        for number, data in chunk:
+            self.total_rows += 1
+            serial_number = data.get('serial_number', '')
+            if not form.rebind(data).is_valid():
+                self.error_rows += 1
+                for field, messages in form.errors.items():
+                    for message in messages:
+                        self._error(number, serial_number, field, message)
+                continue
+            if serial_number in self._seen_serials:
+                self.error_rows += 1
+                self._error(
+                    number, serial_number, 'serial_number',
+                    f'Numer seryjny powtórzony w pliku (pierwszy raz w wierszu {self._seen_serials[serial_number]}).',
+                )
+                continue
+            self._seen_serials[serial_number] = number
+            instance = form.instance
+            instance.assigned_to_id = form.cleaned_data['assigned_to']
+            valid.append(instance)
+
+        if not valid:
+            return
+        serial_numbers = [instance.serial_number for instance in valid]
+        existing = Equipment.objects.filter(serial_number__in=serial_numbers).count()
+        self.updated_rows += existing
+        self.created_rows += len(valid) - existing
+        if not self.dry_run:
+            Equipment.objects.bulk_create(
+                valid,
+                update_conflicts=True,
+                unique_fields=['serial_number'],
+                update_fields=self.update_fields,
+            )
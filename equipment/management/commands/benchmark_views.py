@@ -0,0 +1,157 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from equipment.benchmarking import bench_session, fetch, route_cases
+from equipment.models import Equipment, EquipmentTransfer
+from equipment.sql_instrumentation import QueryRecorder
+from equipment.synthetic import ensure_dataset
+
+
+def percentile(values, percent):
+    """Percentyl metodą najbliższej rangi"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = 'Mierzy czas odpowiedzi, liczbę zapytań i pamięć widoków aplikacji (raport JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipment', type=int, default=1000, help='Liczba sprzętu w bazie (domyślnie: 1000)')
+        parser.add_argument('--users', type=int, default=200, help='Liczba użytkowników w bazie (domyślnie: 200)')
+        parser.add_argument('--transfers', type=int, default=2000, help='Liczba przekazań w bazie (domyślnie: 2000)')
+        parser.add_argument('--seed', type=int, default=0, help='Ziarno generatora danych (domyślnie: 0)')
+        parser.add_argument(
+            '--today', type=date.fromisoformat, metavar='RRRR-MM-DD',
+            help='Dzień odniesienia dat danych syntetycznych - to samo ziarno i dzień dają te same dane (domyślnie: dzisiaj)',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Liczba pomiarów każdego widoku (domyślnie: 20)')
+        parser.add_argument('--warmup', type=int, default=1, help='Liczba rozgrzewkowych żądań (domyślnie: 1)')
+        parser.add_argument(
+            '--routes', nargs='+', metavar='NAZWA',
+            help='Mierz tylko wybrane widoki (nazwy z equipment/urls.py)',
+        )
+        parser.add_argument('--output', help='Zapisz raport JSON do pliku zamiast na standardowe wyjście')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Nie pytaj o potwierdzenie przed dodaniem danych do bazy',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations musi być większe od zera.')
+
+        self._seed_dataset(options)
+
+        results = []
+        # Tylko dane syntetyczne (po potwierdzeniu) zostają w bazie - obiekty
+        # testowe i zapisy widoków są wycofywane
+        with bench_session() as (it_user, regular_user, fixtures), override_settings(ALLOWED_HOSTS=['testserver']):
+            if fixtures is None:
+                raise CommandError('Brak sprzętu w bazie - podaj --equipment większe od zera.')
+            cases = route_cases(fixtures, options['routes'])
+            if not cases:
+                raise CommandError('Brak widoków do zmierzenia.')
+
+            for role, user in (('it', it_user), ('user', regular_user)):
+                client = Client()
+                client.force_login(user)
+                for case in cases:
+                    self.stderr.write(f'{role:>4} {case["label"]}')
+                    results.append(self._measure(client, role, case, options))
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {
+                'users': User.objects.count(),
+                'equipment': Equipment.objects.count(),
+                'transfers': EquipmentTransfer.objects.count(),
+            },
+            'seed': options['seed'],
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Zapisano raport: {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def _seed_dataset(self, options):
+        missing = {
+            'users': max(0, options['users'] - User.objects.count()),
+            'equipment': max(0, options['equipment'] - Equipment.objects.count()),
+            'transfers': max(0, options['transfers'] - EquipmentTransfer.objects.count()),
+        }
+        if not any(missing.values()):
+            return
+
+        if options['interactive']:
+            answer = input(
+                f'Do bazy "{connection.settings_dict["NAME"]}" zostaną dodane dane syntetyczne '
+                f'(użytkownicy: {missing["users"]}, sprzęt: {missing["equipment"]}, '
+                f'przekazania: {missing["transfers"]}). Kontynuować? [t/N] '
+            )
+            if answer.strip().lower() not in ('t', 'tak', 'y', 'yes'):
+                raise CommandError('Przerwano.')
+
+        def progress(kind, done, total):
+            self.stderr.write(f'  {kind}: {done}/{total}')
+
+        started = time.perf_counter()
+        ensure_dataset(
+            users=options['users'], equipment=options['equipment'],
+            transfers=options['transfers'], seed=options['seed'], today=options['today'], progress=progress,
+        )
+        self.stderr.write(f'Dane przygotowane w {time.perf_counter() - started:.1f} s')
+
+    def _measure(self, client, role, case, options):
+        for _ in range(options['warmup']):
+            fetch(client, case)
+
+        timings = []
+        query_counts = []
+        for _ in range(options['iterations']):
+            with QueryRecorder(capture_origin=False) as recorder:
+                started = time.perf_counter()
+                response, size = fetch(client, case)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(recorder.count)
+
+        # Pamięć mierzona osobno - tracemalloc spowalnia wykonanie
+        tracemalloc.start()
+        try:
+            fetch(client, case)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'route': case['route'],
+            'label': case['label'],
+            'role': role,
+            'url': case['url'],
+            'params': case['params'],
+            'status': response.status_code,
+            'bytes': size,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries': max(query_counts),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
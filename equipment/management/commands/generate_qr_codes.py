@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from equipment.models import Equipment
+from equipment.qr import equipment_qr_url, qr_filename, render_qr_item
+
+
+class Command(BaseCommand):
+    help = 'Generuje kody QR sprzętu równolegle (pula procesów, zapis partiami)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Liczba procesów renderujących (domyślnie: liczba rdzeni)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Liczba sprzętów w jednej partii (domyślnie: 500)',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Wygeneruj ponownie również istniejące kody QR',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+
+        queryset = Equipment.objects.order_by('pk')
+        if not options['force']:
+            queryset = queryset.filter(Q(qr_code__isnull=True) | Q(qr_code=''))
+        total = queryset.count()
+        self.stdout.write(f"Kody QR do wygenerowania: {total} (procesy robocze: {workers})")
+        if not total:
+            return
+
+        field = Equipment._meta.get_field('qr_code')
+        storage = field.storage
+        generated = 0
+        last_pk = 0
+
+        # Procesy potomne nie mogą dziedziczyć otwartych połączeń z bazą
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = list(
+                    queryset.filter(pk__gt=last_pk).values_list('pk', 'serial_number', 'qr_code')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+
+                items = [(pk, equipment_qr_url(pk)) for pk, _, _ in batch]
+                chunksize = max(1, len(items) // (workers * 4))
+                images = dict(executor.map(render_qr_item, items, chunksize=chunksize))
+
+                updated = []
+                for pk, serial_number, old_name in batch:
+                    if old_name:
+                        storage.delete(old_name)
+                    equipment = Equipment(pk=pk, serial_number=serial_number)
+                    name = field.generate_filename(equipment, qr_filename(serial_number))
+                    equipment.qr_code = storage.save(name, ContentFile(images[pk]))
+                    updated.append(equipment)
+
+                # Jedno zapytanie UPDATE na partię zamiast save() dla każdego sprzętu
+                Equipment.objects.bulk_update(updated, ['qr_code'], batch_size=batch_size)
+                generated += len(updated)
+                self.stdout.write(f"  {generated}/{total}")
+
+        self.stdout.write(self.style.SUCCESS(f"Wygenerowano {generated} kodów QR"))
@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from equipment.protocols import (
+    filter_protocol_transfers, protocol_data, write_protocols_pdf, write_protocols_zip,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generuje zbiorczo protokoły przekazań (jeden PDF lub archiwum ZIP)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='Przekazania od dnia (RRRR-MM-DD)')
+        parser.add_argument('--date-to', help='Przekazania do dnia (RRRR-MM-DD)')
+        parser.add_argument('--approved-by', help='Login użytkownika, który zaakceptował przekazanie')
+        parser.add_argument('--user', help='Login nadawcy lub odbiorcy sprzętu')
+        parser.add_argument(
+            '--status', default='approved',
+            help='Status akceptacji przekazań (domyślnie: approved)',
+        )
+        parser.add_argument(
+            '--format', choices=['pdf', 'zip'], default='zip',
+            help='Jeden wielostronicowy PDF lub ZIP z osobnymi plikami (domyślnie: zip)',
+        )
+        parser.add_argument('--output', help='Ścieżka pliku wynikowego')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Liczba procesów renderujących dla formatu zip (domyślnie: liczba rdzeni)',
+        )
+
+    def handle(self, *args, **options):
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'approved_by': options['approved_by'],
+            'user': options['user'],
+            'status': options['status'],
+        }
+        datas = [protocol_data(transfer) for transfer in filter_protocol_transfers(params)]
+        if not datas:
+            raise CommandError('Brak przekazań spełniających kryteria.')
+
+        output = options['output'] or f'protokoly_przekazania_{timezone.now().strftime("%Y%m%d_%H%M")}.{options["format"]}'
+        self.stdout.write(f"Generowanie {len(datas)} protokołów do {output}...")
+        with open(output, 'wb') as fileobj:
+            if options['format'] == 'zip':
+                write_protocols_zip(fileobj, datas, workers=max(1, options['workers']))
+            else:
+                write_protocols_pdf(fileobj, datas)
+        self.stdout.write(self.style.SUCCESS(f"Zapisano {len(datas)} protokołów: {output}"))
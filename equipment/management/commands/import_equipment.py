@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment.imports import IMPORT_CHUNK_SIZE, EquipmentImporter, ImportFileError
+
+
+class Command(BaseCommand):
+    help = 'Importuje sprzęt z pliku CSV lub XLSX (aktualizacja istniejącego po numerze seryjnym)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Plik CSV lub XLSX; pierwszy wiersz to nagłówek')
+        parser.add_argument(
+            '--errors',
+            help='Ścieżka raportu błędów CSV (domyślnie: <plik>_bledy.csv)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+            help=f'Liczba wierszy walidowanych i zapisywanych naraz (domyślnie: {IMPORT_CHUNK_SIZE})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Tylko walidacja - bez zapisu do bazy')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        errors_path = options['errors'] or f'{os.path.splitext(path)[0]}_bledy.csv'
+
+        def progress(importer):
+            self.stdout.write(f"  przetworzono wierszy: {importer.total_rows}")
+
+        if not os.path.isfile(path):
+            raise CommandError(f'Plik {path} nie istnieje.')
+
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as fileobj, open(errors_path, 'w', encoding='utf-8-sig', newline='') as error_file:
+                importer = EquipmentImporter(
+                    error_file,
+                    chunk_size=max(1, options['chunk_size']),
+                    dry_run=options['dry_run'],
+                    progress=progress,
+                ).run(fileobj, path)
+        except ImportFileError as e:
+            os.remove(errors_path)
+            raise CommandError(str(e))
+
+        prefix = 'Walidacja zakończona' if options['dry_run'] else 'Import zakończony'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} w {time.perf_counter() - started:.1f} s - wierszy: {importer.total_rows}, "
+            f"nowe: {importer.created_rows}, zaktualizowane: {importer.updated_rows}, "
+            f"błędne: {importer.error_rows}"
+        ))
+        if importer.error_rows:
+            self.stdout.write(self.style.WARNING(f"Raport błędów: {errors_path}"))
+        else:
+            os.remove(errors_path)
@@ -0,0 +1,148 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from equipment.benchmarking import bench_session, fetch, route_cases
+from equipment.sql_instrumentation import QueryRecorder, normalize_sql
+
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+# Pełny odczyt tabeli: "SCAN tabela" bez indeksu (SQLite), "Seq Scan on tabela" (PostgreSQL)
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\S+)(?: AS (\S+))?$')
+_POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\S+)')
+# Aliasy tabel nadawane przez ORM w złączeniach ("equipment_equipment" T3)
+_ALIAS_RE = re.compile(r'"(\w+)" (\w+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Wywołuje widoki aplikacji, sprawdza plany wykonanych zapytań (EXPLAIN) '
+        'i wskazuje pełne odczyty dużych tabel'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--routes', nargs='+', metavar='NAZWA',
+            help='Sprawdź tylko wybrane widoki (nazwy z equipment/urls.py)',
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Pomijaj tabele mniejsze niż podana liczba wierszy (domyślnie: 1000)',
+        )
+        parser.add_argument('--json', action='store_true', help='Wypisz wynik jako JSON')
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Zakończ z błędem, jeśli znaleziono pełny odczyt tabeli',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in EXPLAIN_PREFIXES:
+            raise CommandError(f'Baza {connection.vendor} nie jest obsługiwana (tylko SQLite i PostgreSQL).')
+        self.explain_prefix = EXPLAIN_PREFIXES[connection.vendor]
+        self.min_rows = options['min_rows']
+        self._row_counts = {}
+        self._tables = set(connection.introspection.table_names())
+
+        findings = []
+        seen_shapes = set()
+        # Obiekty testowe i zapisy widoków są wycofywane - polecenie nie zmienia danych
+        with bench_session() as (it_user, regular_user, fixtures), override_settings(ALLOWED_HOSTS=['testserver']):
+            if fixtures is None:
+                raise CommandError('Brak sprzętu w bazie - dodaj dane poleceniem add_sample_data.')
+            cases = route_cases(fixtures, options['routes'])
+            if not cases:
+                raise CommandError('Brak widoków do sprawdzenia.')
+
+            for role, user in (('it', it_user), ('user', regular_user)):
+                client = Client()
+                client.force_login(user)
+                for case in cases:
+                    with QueryRecorder() as recorder:
+                        fetch(client, case)
+                    for query in recorder.queries:
+                        shape = normalize_sql(query['sql'])
+                        if shape in seen_shapes or query['many'] or not self._is_select(query['sql']):
+                            continue
+                        seen_shapes.add(shape)
+                        for table, detail in self._full_scans(query):
+                            findings.append({
+                                'route': case['label'],
+                                'role': role,
+                                'table': table,
+                                'rows': self._row_count(table),
+                                'plan': detail,
+                                'shape': shape,
+                                'code_origin': query['code_origin'],
+                                'template_origin': query['template_origin'],
+                            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(findings, indent=2, ensure_ascii=False))
+        else:
+            self._write_report(findings, len(seen_shapes))
+
+        if findings and options['fail_on_scan']:
+            raise CommandError(f'Znaleziono pełne odczyty tabel: {len(findings)}.')
+
+    def _is_select(self, sql):
+        return sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+    def _explain(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(self.explain_prefix + query['sql'], query['params'])
+            return cursor.fetchall()
+
+    def _full_scans(self, query):
+        """Tabele (co najmniej min_rows wierszy) odczytywane w całości - (tabela, linia planu)"""
+        scans = []
+        aliases = dict((alias, table) for table, alias in _ALIAS_RE.findall(query['sql']))
+        for row in self._explain(query):
+            # SQLite: (id, parent, notused, detail); PostgreSQL: (linia planu,)
+            detail = row[-1].strip()
+            if connection.vendor == 'sqlite':
+                match = _SQLITE_SCAN_RE.match(detail)
+            else:
+                match = _POSTGRES_SCAN_RE.search(detail)
+            if not match:
+                continue
+            table = aliases.get(match.group(1), match.group(1))
+            # Podzapytania, tabele wirtualne (FTS) i tymczasowe nie są tabelami z indeksami
+            if table not in self._tables or table.endswith('_fts'):
+                continue
+            if self._row_count(table) >= self.min_rows:
+                scans.append((table, detail))
+        return scans
+
+    def _row_count(self, table):
+        if table not in self._row_counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self._row_counts[table] = cursor.fetchone()[0]
+        return self._row_counts[table]
+
+    def _write_report(self, findings, checked):
+        self.stdout.write(f'Sprawdzone kształty zapytań: {checked}')
+        if not findings:
+            self.stdout.write(self.style.SUCCESS(
+                f'Brak pełnych odczytów tabel mających co najmniej {self.min_rows} wierszy.'
+            ))
+            return
+        self.stdout.write(self.style.WARNING(f'Pełne odczyty tabel: {len(findings)}'))
+        for finding in findings:
+            self.stdout.write('')
+            self.stdout.write(self.style.WARNING(
+                f'{finding["route"]} ({finding["role"]}): {finding["table"]} - {finding["rows"]} wierszy'
+            ))
+            self.stdout.write(f'  plan:    {finding["plan"]}')
+            self.stdout.write(f'  kod:     {finding["code_origin"]}')
+            if finding['template_origin']:
+                self.stdout.write(f'  szablon: {finding["template_origin"]}')
+            self.stdout.write(f'  SQL:     {finding["shape"]}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from equipment.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = 'Przelicza od nowa tabelę statystyk sprzętu używaną przez dashboard'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Przeliczanie statystyk sprzętu...")
+        rows = rebuild_statistics()
+        self.stdout.write(self.style.SUCCESS(f"Zapisano {rows} wierszy statystyk"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from equipment.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Odbudowuje indeks pełnotekstowy sprzętu (FTS5 / tsvector)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Alias bazy danych (domyślnie: default)',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        self.stdout.write(f"Odbudowa indeksu wyszukiwania ({backend.__class__.__name__})...")
+        with transaction.atomic(using=options['database']):
+            backend.create_index()
+            indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Zaindeksowano {indexed} sprzętów"))
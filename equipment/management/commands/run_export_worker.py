@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from equipment.export_jobs import (
+    claim_pending_jobs, init_worker, mark_job_failed, requeue_stale_jobs, run_export_job, touch_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = 'Wykonuje oczekujące eksporty w tle (pula procesów)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Liczba procesów roboczych (domyślnie: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Odstęp między sprawdzeniami kolejki w sekundach (domyślnie: 2)',
+        )
+        parser.add_argument(
+            '--stale-after', type=float, default=None,
+            help='Po ilu sekundach bez sygnału workera zadanie "w trakcie" wraca do kolejki '
+                 '(domyślnie: EXPORT_JOB_STALE_SECONDS)',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Wykonaj oczekujące eksporty i zakończ',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'assetstorm.settings')
+        self.stdout.write(f"Worker eksportów uruchomiony (procesy robocze: {workers})")
+
+        # Procesy potomne nie mogą dziedziczyć otwartych połączeń z bazą
+        connections.close_all()
+        running = {}
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(settings_module,)
+        ) as executor:
+            try:
+                while True:
+                    # Zadania przerwane przez zatrzymany worker (także przy starcie)
+                    touch_jobs(list(running.values()))
+                    self._requeue_stale(options['stale_after'])
+                    free_slots = workers - len(running)
+                    if free_slots:
+                        for job_id in claim_pending_jobs(free_slots):
+                            self.stdout.write(f"Eksport #{job_id}: start")
+                            running[executor.submit(run_export_job, job_id)] = job_id
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._report(running.pop(future), future)
+            except KeyboardInterrupt:
+                self.stdout.write("Zatrzymywanie workera...")
+
+        self.stdout.write(self.style.SUCCESS("Worker eksportów zakończył pracę"))
+
+    def _requeue_stale(self, stale_after):
+        requeued, failed = requeue_stale_jobs(stale_after)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Przerwane eksporty ponownie w kolejce: {requeued}"))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"Przerwane eksporty oznaczone jako błąd: {failed}"))
+
+    def _report(self, job_id, future):
+        try:
+            status = future.result()
+        except Exception as e:
+            # Np. awaria procesu roboczego - zadanie nie może zostać w stanie 'running'
+            mark_job_failed(job_id, e)
+            status = 'failed'
+        if status == 'done':
+            self.stdout.write(self.style.SUCCESS(f"Eksport #{job_id}: gotowy"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Eksport #{job_id}: błąd"))
@@ -0,0 +1,120 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from equipment.export_jobs import init_worker
+from equipment.models import Equipment
+from equipment.sqlite import is_lock_error
+from equipment.stats import get_inventory_summary
+from equipment.transfers import approve_transfers, create_transfers
+
+
+LOAD_REASON = 'Test obciążenia'
+
+# Udział operacji w obciążeniu: odczyty, przekazania (utworzenie i akceptacja), edycja sprzętu
+READ_SHARE = 0.5
+TRANSFER_SHARE = 0.3
+
+
+def run_load(worker_id, duration, user_ids, equipment_ids):
+    """Proces roboczy: losowe odczyty i zapisy przez `duration` sekund. Zwraca (zapisy, odczyty, blokady)."""
+    rng = random.Random(worker_id)
+    writes = reads = lock_errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        draw = rng.random()
+        try:
+            if draw < READ_SHARE:
+                list(Equipment.objects.filter(status='in_use').order_by('-created_at')[:25])
+                get_inventory_summary()
+                reads += 1
+                continue
+            if draw < READ_SHARE + TRANSFER_SHARE:
+                user = User.objects.get(pk=rng.choice(user_ids))
+                transfers = create_transfers([rng.choice(equipment_ids)], user, user, LOAD_REASON)
+                if transfers:
+                    approve_transfers([transfer.pk for transfer in transfers], user)
+            else:
+                equipment = Equipment.objects.get(pk=rng.choice(equipment_ids))
+                equipment.notes = f'{LOAD_REASON} {worker_id}'
+                equipment.save()
+            writes += 1
+        except OperationalError as e:
+            if not is_lock_error(e):
+                raise
+            lock_errors += 1
+    connection.close()
+    return writes, reads, lock_errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Test obciążenia SQLite: kilka procesów równolegle czyta dane, tworzy i akceptuje '
+        'przekazania oraz edytuje sprzęt; wypisuje zapisy/s, odczyty/s i błędy blokady. '
+        'Zmienia dane - uruchamiaj na kopii bazy, raz bez i raz z SQLITE_PRODUCTION'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Liczba procesów (domyślnie: 8)')
+        parser.add_argument('--duration', type=float, default=15, help='Czas trwania w sekundach (domyślnie: 15)')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Nie pytaj o potwierdzenie przed zmianą danych w bazie',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Test obciążenia dotyczy tylko bazy SQLite.')
+        if options['processes'] < 1 or options['duration'] <= 0:
+            raise CommandError('--processes i --duration muszą być większe od zera.')
+
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True)[:500])
+        equipment_ids = list(
+            Equipment.objects.filter(status__in=['available', 'in_use'])
+            .order_by('pk').values_list('pk', flat=True)[:5000]
+        )
+        if not user_ids or not equipment_ids:
+            raise CommandError('Brak użytkowników lub sprzętu w bazie - dodaj dane poleceniem benchmark_views.')
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        profile = 'produkcyjny' if settings.SQLITE_PRODUCTION else 'domyślny'
+
+        if options['interactive']:
+            answer = input(
+                f'Test doda przekazania i zmieni sprzęt w bazie "{connection.settings_dict["NAME"]}". '
+                f'Kontynuować? [t/N] '
+            )
+            if answer.strip().lower() not in ('t', 'tak', 'y', 'yes'):
+                raise CommandError('Przerwano.')
+
+        processes = options['processes']
+        duration = options['duration']
+        self.stderr.write(f'Profil: {profile} (dziennik: {journal_mode}), procesy: {processes}, czas: {duration:g} s')
+
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'assetstorm.settings')
+        # Procesy potomne nie mogą dziedziczyć otwartych połączeń z bazą
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=init_worker, initargs=(settings_module,)
+        ) as executor:
+            futures = [
+                executor.submit(run_load, worker_id, duration, user_ids, equipment_ids)
+                for worker_id in range(processes)
+            ]
+            results = [future.result() for future in futures]
+
+        writes = sum(result[0] for result in results)
+        reads = sum(result[1] for result in results)
+        lock_errors = sum(result[2] for result in results)
+        self.stdout.write(
+            f'zapisy/s: {writes / duration:.1f}, odczyty/s: {reads / duration:.1f}, '
+            f'błędy blokady: {lock_errors}'
+        )
@@ -0,0 +1,77 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+CHECKPOINT_MODES = ['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE']
+
+
+class Command(BaseCommand):
+    help = (
+        'Konserwacja bazy SQLite: checkpoint dziennika WAL, PRAGMA optimize i ANALYZE '
+        '(bez opcji wykonywane są wszystkie trzy)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checkpoint', nargs='?', const='TRUNCATE', choices=CHECKPOINT_MODES, metavar='TRYB',
+            help=f'Przenieś dziennik WAL do pliku bazy; tryb: {", ".join(CHECKPOINT_MODES)} (domyślnie: TRUNCATE)',
+        )
+        parser.add_argument('--optimize', action='store_true', help='PRAGMA optimize - statystyki tam, gdzie są potrzebne')
+        parser.add_argument('--analyze', action='store_true', help='ANALYZE - pełne odświeżenie statystyk planera')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias bazy danych z ustawień (domyślnie: default)',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'Baza "{options["database"]}" nie jest bazą SQLite.')
+
+        run_all = not (options['checkpoint'] or options['optimize'] or options['analyze'])
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+            self.stdout.write(f'Baza: {connection.settings_dict["NAME"]} (dziennik: {journal_mode})')
+            self._write_sizes(connection)
+
+            if options['checkpoint'] or run_all:
+                if journal_mode.lower() != 'wal':
+                    self.stdout.write('Checkpoint pominięty - baza nie używa dziennika WAL.')
+                else:
+                    mode = options['checkpoint'] or 'TRUNCATE'
+                    busy, log_pages, checkpointed = self._timed(
+                        cursor, f'PRAGMA wal_checkpoint({mode})', f'Checkpoint {mode}',
+                    )
+                    if busy:
+                        self.stdout.write(self.style.WARNING(
+                            f'  checkpoint niepełny - baza była zajęta ({checkpointed}/{log_pages} stron)'
+                        ))
+                    else:
+                        self.stdout.write(f'  przeniesione strony: {checkpointed}/{log_pages}')
+            if options['analyze'] or run_all:
+                self._timed(cursor, 'ANALYZE', 'ANALYZE')
+            if options['optimize'] or run_all:
+                self._timed(cursor, 'PRAGMA optimize', 'PRAGMA optimize')
+
+        self._write_sizes(connection)
+        self.stdout.write(self.style.SUCCESS('Konserwacja zakończona.'))
+
+    def _timed(self, cursor, sql, label):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.2f} s')
+        return row
+
+    def _write_sizes(self, connection):
+        path = str(connection.settings_dict['NAME'])
+        sizes = []
+        for suffix, label in (('', 'baza'), ('-wal', 'WAL')):
+            if os.path.exists(path + suffix):
+                sizes.append(f'{label}: {os.path.getsize(path + suffix) / 1024 / 1024:.1f} MB')
+        if sizes:
+            self.stdout.write('  ' + ', '.join(sizes))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from equipment.routers import REPLICA_DB_ALIAS, replica_enabled
+
+
+class Command(BaseCommand):
+    help = (
+        'Kopiuje bazę default do repliki SQLite (lokalne testy REPLICA_DATABASE; '
+        'replikę PostgreSQL utrzymuje replikacja strumieniowa)'
+    )
+
+    def handle(self, *args, **options):
+        if not replica_enabled():
+            raise CommandError('Replika nie jest skonfigurowana - ustaw REPLICA_DATABASE w ustawieniach.')
+        source, target = connections[DEFAULT_DB_ALIAS], connections[REPLICA_DB_ALIAS]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise CommandError(
+                'Polecenie kopiuje tylko bazy SQLite. Dla PostgreSQL utwórz replikę '
+                'replikacją strumieniową albo lokalnie: createdb --template=<baza> <replika>.'
+            )
+
+        started = time.perf_counter()
+        source.ensure_connection()
+        target.ensure_connection()
+        # API kopii zapasowej SQLite - spójna kopia także przy trwających zapisach
+        source.connection.backup(target.connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'Replika {target.settings_dict["NAME"]} zsynchronizowana '
+            f'({time.perf_counter() - started:.1f} s)'
+        ))
@@ -0,0 +1,162 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .roles import aresolve_request_user, get_user_roles
+from .routers import replica_enabled, request_wrote, start_request, use_replica
+from .sql_instrumentation import DEFAULT_NPLUS1_THRESHOLD, QueryRecorder
+
+
+sql_logger = logging.getLogger('equipment.sql')
+
+
+class SyncAndAsyncMiddleware:
+    """
+    Podstawa middleware działającego w obu trybach: pod WSGI wywoływane jest
+    __call__, pod ASGI (gdy cały łańcuch jest asynchroniczny) __acall__ -
+    żądanie nie przełącza się wtedy do wątku tylko z powodu middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class UserRolesMiddleware(SyncAndAsyncMiddleware):
+    """
+    Udostępnia request.user_roles - role zalogowanego użytkownika.
+    Musi znajdować się za AuthenticationMiddleware. W trybie async użytkownik
+    i role są pobierane od razu (leniwe odczyty z bazy w kodzie async są
+    niedozwolone), w trybie sync - przy pierwszym użyciu.
+    """
+
+    def handle(self, request):
+        request.user_roles = SimpleLazyObject(lambda: get_user_roles(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await aresolve_request_user(request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(SyncAndAsyncMiddleware):
+    """
+    Oznacza żądania, które mogą czytać z repliki bazy (GET/HEAD widoków z
+    settings.REPLICA_ROUTES), i po zapisie ustawia ciasteczko, które przez
+    REPLICA_STICKY_SECONDS kieruje odczyty użytkownika do 'default'.
+    Bez skonfigurowanej repliki nic nie robi.
+    """
+
+    COOKIE_NAME = 'use_primary'
+
+    def handle(self, request):
+        start_request()
+        return self._pin_after_write(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        start_request()
+        return self._pin_after_write(request, await self.get_response(request))
+
+    def _pin_after_write(self, request, response):
+        if replica_enabled() and (request.method not in ('GET', 'HEAD', 'OPTIONS') or request_wrote()):
+            response.set_cookie(
+                self.COOKIE_NAME, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 15),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        use_replica(
+            request.method in ('GET', 'HEAD')
+            and match is not None and match.url_name in getattr(settings, 'REPLICA_ROUTES', ())
+            and self.COOKIE_NAME not in request.COOKIES
+        )
+
+
+class SQLInstrumentationMiddleware(SyncAndAsyncMiddleware):
+    """
+    Mierzy zapytania SQL żądania: liczba i czas w nagłówku Server-Timing
+    oraz wpis JSON w logu 'equipment.sql' (z ostrzeżeniem o N+1).
+
+    Włączana dla wszystkich żądań ustawieniem SQL_INSTRUMENTATION albo dla
+    pojedynczego żądania nagłówkiem X-SQL-Instrumentation: 1 (tylko IT).
+    Musi znajdować się za UserRolesMiddleware.
+    """
+
+    HEADER = 'HTTP_X_SQL_INSTRUMENTATION'
+
+    def _enabled(self, request):
+        if getattr(settings, 'SQL_INSTRUMENTATION', False):
+            return True
+        if request.META.get(self.HEADER) != '1':
+            return False
+        return request.user.is_authenticated and request.user_roles.is_it_staff
+
+    def handle(self, request):
+        if not self._enabled(request):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self._report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self._enabled(request):
+            return await self.get_response(request)
+
+        # async with - wrapper na połączeniach wątku, w którym async ORM wykonuje zapytania
+        start = time.perf_counter()
+        async with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self._report(request, response, recorder, time.perf_counter() - start)
+
+    def _report(self, request, response, recorder, total):
+        threshold = getattr(settings, 'SQL_NPLUS1_THRESHOLD', DEFAULT_NPLUS1_THRESHOLD)
+        match = request.resolver_match
+        repeated = recorder.repeated_shapes(threshold)
+        record = {
+            'view': match.view_name if match else None,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.total_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'nplus1': repeated,
+        }
+        if repeated:
+            sql_logger.warning('%s', json.dumps(record, ensure_ascii=False))
+        else:
+            sql_logger.info('%s', json.dumps(record, ensure_ascii=False))
+
+        timings = [
+            f'sql;dur={record["sql_ms"]};desc="{recorder.count} queries"',
+            f'app;dur={record["total_ms"]}',
+        ]
+        if repeated:
+            timings.append(f'nplus1;desc="{len(repeated)} repeated shapes"')
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + timings)
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+def build_statistics(apps, schema_editor):
+    from equipment.stats import rebuild_statistics
+
+    Equipment = apps.get_model('equipment', 'Equipment')
+    EquipmentStatistic = apps.get_model('equipment', 'EquipmentStatistic')
+    rebuild_statistics(Equipment.objects.all(), EquipmentStatistic)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_equipmenttransfer_approval_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('type', 'Typ'), ('supplier', 'Dostawca'), ('location', 'Lokalizacja')], max_length=20, verbose_name='Wymiar')),
+                ('value', models.CharField(blank=True, max_length=100, verbose_name='Wartość')),
+                ('equipment_count', models.IntegerField(default=0, verbose_name='Liczba urządzeń')),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Suma cen zakupu')),
+                ('priced_count', models.IntegerField(default=0, verbose_name='Liczba urządzeń z ceną')),
+            ],
+            options={
+                'verbose_name': 'Statystyka sprzętu',
+                'verbose_name_plural': 'Statystyki sprzętu',
+                'unique_together': {('dimension', 'value')},
+            },
+        ),
+        migrations.RunPython(build_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_equipment_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('equipment_xlsx', 'Sprzęt (Excel)'), ('transfers_xlsx', 'Przekazania (Excel)'), ('equipment_csv', 'Sprzęt (CSV)'), ('equipment_ndjson', 'Sprzęt (NDJSON)')], max_length=30, verbose_name='Rodzaj eksportu')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtry')),
+                ('status', models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('done', 'Gotowy'), ('failed', 'Błąd')], default='pending', max_length=20, verbose_name='Status')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Przetworzone wiersze')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Liczba wierszy')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='Plik')),
+                ('error', models.TextField(blank=True, verbose_name='Błąd')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data utworzenia')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Rozpoczęto')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Zakończono')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Zlecone przez')),
+            ],
+            options={
+                'verbose_name': 'Eksport w tle',
+                'verbose_name_plural': 'Eksporty w tle',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_assignments(apps, schema_editor):
+    """Oś czasu z dotychczas zaakceptowanych przekazań"""
+    EquipmentTransfer = apps.get_model('equipment', 'EquipmentTransfer')
+    EquipmentAssignment = apps.get_model('equipment', 'EquipmentAssignment')
+    transfers = EquipmentTransfer.objects.filter(
+        approval_status='approved', to_user__isnull=False
+    ).order_by('pk')
+    EquipmentAssignment.objects.bulk_create(
+        (
+            EquipmentAssignment(
+                equipment_id=transfer.equipment_id,
+                user_id=transfer.to_user_id,
+                transfer_id=transfer.pk,
+                started_at=transfer.approved_at or transfer.transfer_date,
+            )
+            for transfer in transfers.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Od')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='equipment.equipment', verbose_name='Sprzęt')),
+                ('transfer', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assignment', to='equipment.equipmenttransfer', verbose_name='Przekazanie')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='equipment_assignments', to=settings.AUTH_USER_MODEL, verbose_name='Użytkownik')),
+            ],
+            options={
+                'verbose_name': 'Przypisanie sprzętu',
+                'verbose_name_plural': 'Przypisania sprzętu',
+                'ordering': ['-started_at', '-id'],
+                'indexes': [models.Index(fields=['equipment', '-started_at', '-id'], name='equipment_assign_timeline')],
+            },
+        ),
+        migrations.RunPython(backfill_assignments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0010_equipmentassignment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Plik')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Liczba wierszy')),
+                ('created_rows', models.PositiveIntegerField(default=0, verbose_name='Dodane')),
+                ('updated_rows', models.PositiveIntegerField(default=0, verbose_name='Zaktualizowane')),
+                ('error_rows', models.PositiveIntegerField(default=0, verbose_name='Błędne wiersze')),
+                ('error_report', models.FileField(blank=True, upload_to='imports/', verbose_name='Raport błędów')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data importu')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='equipment_imports', to=settings.AUTH_USER_MODEL, verbose_name='Zaimportował')),
+            ],
+            options={
+                'verbose_name': 'Import sprzętu',
+                'verbose_name_plural': 'Importy sprzętu',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0011_equipmentimport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['-created_at', 'id'], name='equipment_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['status', '-created_at', 'id'], name='equipment_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['assigned_to', 'status'], name='equipment_assigned_status'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('warranty_end_date__isnull', False)), fields=['warranty_end_date'], name='equipment_warranty_end'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('status', 'service')), fields=['updated_at'], name='equipment_service_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmenttransfer',
+            index=models.Index(fields=['to_user', 'approval_status', '-transfer_date'], name='transfer_inbox'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmenttransfer',
+            index=models.Index(fields=['equipment', '-transfer_date', '-id'], name='transfer_equipment_history'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmenttransfer',
+            index=models.Index(fields=['-transfer_date'], name='transfer_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceschedule',
+            index=models.Index(fields=['is_completed', 'scheduled_date'], name='maintenance_due'),
+        ),
+    ]
@@ -1,10 +1,93 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
-import qrcode
-from io import BytesIO
 from django.core.files.base import ContentFile
 
+from .sqlite import retry_on_lock
+
+
+class EquipmentQuerySet(models.QuerySet):
+    """
+    QuerySet sprzętu utrzymujący tabelę statystyk i indeks wyszukiwania
+    przy operacjach masowych, które nie wysyłają sygnałów save/delete.
+    """
+
+    def _stats_snapshot(self, **lookup):
+        from .stats import collect_deltas
+        return collect_deltas(self.model._base_manager.using(self.db).filter(**lookup))
+
+    def _invalidate_caches(self):
+        from .caching import invalidate_dashboard
+        from .scan import clear_scan_cache
+        invalidate_dashboard()
+        clear_scan_cache()
+
+    def _apply_stats_change(self, before, after):
+        from .stats import apply_deltas, merge_deltas
+        apply_deltas(merge_deltas(after, before, signs=[1, -1]), using=self.db)
+
+    def _reindex(self, pks):
+        from .search import get_search_backend
+        get_search_backend(self.db).index_ids(pks)
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False,
+                    update_conflicts=False, update_fields=None, unique_fields=None):
+        from .stats import apply_deltas, instance_deltas, merge_deltas
+
+        objs = list(objs)
+        options = {
+            'batch_size': batch_size,
+            'ignore_conflicts': ignore_conflicts,
+            'update_conflicts': update_conflicts,
+            'update_fields': update_fields,
+            'unique_fields': unique_fields,
+        }
+        serial_numbers = [obj.serial_number for obj in objs]
+        with transaction.atomic(using=self.db):
+            if ignore_conflicts or update_conflicts:
+                # Część wierszy mogła już istnieć - porównaj stan przed i po
+                before = self._stats_snapshot(serial_number__in=serial_numbers)
+                result = super().bulk_create(objs, **options)
+                after = self._stats_snapshot(serial_number__in=serial_numbers)
+                self._apply_stats_change(before, after)
+            else:
+                result = super().bulk_create(objs, **options)
+                apply_deltas(merge_deltas(*[instance_deltas(obj) for obj in objs]), using=self.db)
+            # Nie każdy backend zwraca klucze główne z bulk_create
+            self._reindex(
+                self.model._base_manager.using(self.db)
+                .filter(serial_number__in=serial_numbers)
+                .values_list('pk', flat=True)
+            )
+            self._invalidate_caches()
+        return result
+
+    def update(self, **kwargs):
+        # Obsługuje również bulk_update(), które wewnętrznie wywołuje update()
+        from .search import SEARCH_FIELDS
+        from .stats import TRACKED_FIELDS
+
+        track_stats = bool(TRACKED_FIELDS.intersection(kwargs))
+        reindex = bool(set(SEARCH_FIELDS).intersection(kwargs))
+        if not (track_stats or reindex):
+            rows = super().update(**kwargs)
+        else:
+            with transaction.atomic(using=self.db):
+                pks = list(self.values_list('pk', flat=True))
+                if track_stats:
+                    before = self._stats_snapshot(pk__in=pks)
+                rows = super().update(**kwargs)
+                if track_stats:
+                    self._apply_stats_change(before, self._stats_snapshot(pk__in=pks))
+                if reindex:
+                    self._reindex(pks)
+        # Po zapisie - unieważnienie przed nim pozwoliłoby równoległemu odczytowi
+        # zapisać do cache stary wiersz
+        self._invalidate_caches()
+        return rows
+
+    update.alters_data = True
+
 
 class Equipment(models.Model):
     STATUS_CHOICES = [
@@ -45,10 +128,29 @@ class Equipment(models.Model):
     created_at = models.DateTimeField('Data utworzenia', auto_now_add=True)
     updated_at = models.DateTimeField('Data aktualizacji', auto_now=True)
 
+    objects = EquipmentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Sprzęt'
         verbose_name_plural = 'Sprzęt'
         ordering = ['-created_at']
+        indexes = [
+            # Domyślna kolejność i paginacja kursorowa (-created_at, id); status - filtr listy
+            models.Index(fields=['-created_at', 'id'], name='equipment_created_id'),
+            models.Index(fields=['status', '-created_at', 'id'], name='equipment_status_created'),
+            # Sprzęt użytkownika (moje urządzenia, dashboard zwykłego użytkownika)
+            models.Index(fields=['assigned_to', 'status'], name='equipment_assigned_status'),
+            # Alerty gwarancyjne - zakres dat; sprzęt bez gwarancji nie trafia do indeksu
+            models.Index(
+                fields=['warranty_end_date'], name='equipment_warranty_end',
+                condition=models.Q(warranty_end_date__isnull=False),
+            ),
+            # Dashboard: sprzęt najdłużej w serwisie
+            models.Index(
+                fields=['updated_at'], name='equipment_service_updated',
+                condition=models.Q(status='service'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
@@ -68,41 +170,58 @@ class Equipment(models.Model):
         return self.status in ['available', 'in_use']
     
     def get_transfer_history(self):
-        """Zwraca historię przekazań sprzętu"""
-        return self.transfers.all().order_by('-transfer_date')
+        """Zwraca historię przekazań sprzętu (z użytkownikami pobranymi w jednym zapytaniu)"""
+        return self.transfers.select_related(
+            'from_user', 'to_user', 'transferred_by', 'approved_by'
+        ).order_by('-transfer_date', '-id')
+
+    def holder_at(self, moment):
+        """Przypisanie obowiązujące w danej chwili (EquipmentAssignment) albo None"""
+        return self.assignments.filter(started_at__lte=moment).select_related('user').first()
+
+    def current_assignment(self):
+        """Ostatnie przypisanie - kto i od kiedy ma sprzęt"""
+        return self.assignments.select_related('user').first()
     
     def generate_qr_code(self):
         """Generuje kod QR dla sprzętu"""
         if not self.qr_code:  # Generuj tylko jeśli nie ma już kodu
-            # Utwórz URL do szczegółów sprzętu
-            from django.urls import reverse
-            from django.conf import settings
-            
-            # Użyj bezwzględnego URL
-            url = f"{settings.SITE_URL or 'http://127.0.0.1:8000'}{reverse('equipment:equipment_detail', args=[self.pk])}"
-            
-            # Utwórz kod QR
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            # Utwórz obraz
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Zapisz do BytesIO
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            # Zapisz jako pole ImageField
-            filename = f'qr_{self.serial_number}.png'
-            self.qr_code.save(filename, ContentFile(buffer.getvalue()), save=False)
-            self.save()
+            from .qr import equipment_qr_url, qr_filename, render_qr_png
+
+            # Zapisz jako pole ImageField (masowo: manage.py generate_qr_codes)
+            png = render_qr_png(equipment_qr_url(self.pk))
+            self.qr_code.save(qr_filename(self.serial_number), ContentFile(png), save=False)
+            self.save(update_fields=['qr_code', 'updated_at'])
+
+
+class EquipmentStatistic(models.Model):
+    """Zmaterializowane statystyki sprzętu (patrz equipment/stats.py)"""
+    DIMENSION_CHOICES = [
+        ('status', 'Status'),
+        ('type', 'Typ'),
+        ('supplier', 'Dostawca'),
+        ('location', 'Lokalizacja'),
+    ]
+
+    dimension = models.CharField('Wymiar', max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField('Wartość', max_length=100, blank=True)
+    equipment_count = models.IntegerField('Liczba urządzeń', default=0)
+    price_total = models.DecimalField(
+        'Suma cen zakupu', max_digits=14, decimal_places=2, default=0
+    )
+    priced_count = models.IntegerField('Liczba urządzeń z ceną', default=0)
+
+    class Meta:
+        verbose_name = 'Statystyka sprzętu'
+        verbose_name_plural = 'Statystyki sprzętu'
+        unique_together = [('dimension', 'value')]
+
+    def __str__(self):
+        return f'{self.get_dimension_display()}: {self.value or "-"} ({self.equipment_count})'
+
+
+# Powód zapisywany przy automatycznym anulowaniu konkurujących przekazań
+CANCELLED_REASON = 'Anulowane - zaakceptowano inne przekazanie tego sprzętu.'
 
 
 class EquipmentTransfer(models.Model):
@@ -167,6 +286,13 @@ class EquipmentTransfer(models.Model):
         verbose_name = 'Przekazanie sprzętu'
         verbose_name_plural = 'Przekazania sprzętu'
         ordering = ['-transfer_date']
+        indexes = [
+            # Przekazania oczekujące na akceptację użytkownika
+            models.Index(fields=['to_user', 'approval_status', '-transfer_date'], name='transfer_inbox'),
+            # Historia przekazań sprzętu i ostatnie przekazania na dashboardzie
+            models.Index(fields=['equipment', '-transfer_date', '-id'], name='transfer_equipment_history'),
+            models.Index(fields=['-transfer_date'], name='transfer_recent'),
+        ]
     
     def __str__(self):
         from_user = (self.from_user.get_full_name()
@@ -175,26 +301,70 @@ class EquipmentTransfer(models.Model):
                    if self.to_user else "System")
         return f"{self.equipment.name} - od {from_user} do {to_user}"
     
+    @retry_on_lock
     def approve(self, approved_by):
-        """Akceptuje przekazanie sprzętu"""
-        self.approval_status = 'approved'
-        self.approved_at = timezone.now()
-        self.approved_by = approved_by
-        self.save()
-        
-        # Aktualizuj przypisanie sprzętu
-        if self.to_user:
-            self.equipment.assigned_to = self.to_user
-            self.equipment.status = 'in_use'
-            self.equipment.save()
-    
+        """
+        Akceptuje przekazanie warunkowym UPDATE (tylko jeśli nadal oczekuje).
+        Zwraca False, gdy przekazanie zostało już rozpatrzone - np. przez
+        równoległe żądanie. Pozostałe oczekujące przekazania tego sprzętu
+        są anulowane w tej samej transakcji.
+        """
+        from .caching import invalidate_dashboard
+
+        now = timezone.now()
+        with transaction.atomic():
+            won = EquipmentTransfer.objects.filter(pk=self.pk, approval_status='pending').update(
+                approval_status='approved', approved_at=now, approved_by=approved_by,
+            )
+            if not won:
+                return False
+            self.approval_status = 'approved'
+            self.approved_at = now
+            self.approved_by = approved_by
+            EquipmentTransfer.cancel_pending_for([self.equipment_id], now)
+
+            # Aktualizuj przypisanie sprzętu (wiersz zablokowany do końca transakcji)
+            if self.to_user_id:
+                equipment = Equipment.objects.select_for_update().get(pk=self.equipment_id)
+                equipment.assigned_to_id = self.to_user_id
+                equipment.status = 'in_use'
+                equipment.save(update_fields=['assigned_to', 'status', 'updated_at'])
+                self.equipment = equipment
+                EquipmentAssignment.objects.create(
+                    equipment=equipment,
+                    user_id=self.to_user_id,
+                    transfer=self,
+                    started_at=now,
+                )
+            invalidate_dashboard()
+        return True
+
+    @retry_on_lock
     def reject(self, rejected_by, reason=''):
-        """Odrzuca przekazanie sprzętu"""
-        self.approval_status = 'rejected'
-        self.rejection_reason = reason
-        self.approved_at = timezone.now()
-        self.approved_by = rejected_by
-        self.save()
+        """Odrzuca przekazanie (warunkowo, jak approve). Zwraca False, jeśli było już rozpatrzone."""
+        from .caching import invalidate_dashboard
+
+        now = timezone.now()
+        with transaction.atomic():
+            won = EquipmentTransfer.objects.filter(pk=self.pk, approval_status='pending').update(
+                approval_status='rejected', rejection_reason=reason,
+                approved_at=now, approved_by=rejected_by,
+            )
+            if not won:
+                return False
+            self.approval_status = 'rejected'
+            self.rejection_reason = reason
+            self.approved_at = now
+            self.approved_by = rejected_by
+            invalidate_dashboard()
+        return True
+
+    @classmethod
+    def cancel_pending_for(cls, equipment_ids, moment):
+        """Anuluje oczekujące przekazania sprzętu, który właśnie zmienił właściciela"""
+        return cls.objects.filter(equipment_id__in=equipment_ids, approval_status='pending').update(
+            approval_status='cancelled', approved_at=moment, rejection_reason=CANCELLED_REASON,
+        )
     
     def is_pending(self):
         """Sprawdza czy przekazanie czeka na akceptację"""
@@ -205,6 +375,49 @@ class EquipmentTransfer(models.Model):
         return self.to_user == user and self.is_pending()
 
 
+class EquipmentAssignment(models.Model):
+    """
+    Oś czasu przypisań sprzętu (tylko dopisywana - przy akceptacji przekazania).
+    Przypisanie obowiązuje od started_at do started_at następnego wpisu.
+    """
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='assignments',
+        verbose_name='Sprzęt'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='equipment_assignments',
+        verbose_name='Użytkownik'
+    )
+    transfer = models.OneToOneField(
+        EquipmentTransfer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='assignment',
+        verbose_name='Przekazanie'
+    )
+    started_at = models.DateTimeField('Od')
+
+    class Meta:
+        verbose_name = 'Przypisanie sprzętu'
+        verbose_name_plural = 'Przypisania sprzętu'
+        ordering = ['-started_at', '-id']
+        indexes = [
+            # "Kto miał sprzęt w chwili X" i "aktualny użytkownik od" - jedno wyszukiwanie w indeksie
+            models.Index(fields=['equipment', '-started_at', '-id'], name='equipment_assign_timeline'),
+        ]
+
+    def __str__(self):
+        user = self.user.get_full_name() if self.user else 'System'
+        return f'{self.equipment_id}: {user} od {self.started_at:%d.%m.%Y %H:%M}'
+
+
 class MaintenanceSchedule(models.Model):
     """Model do zarządzania harmonogramem konserwacji sprzętu"""
     MAINTENANCE_TYPES = [
@@ -237,7 +450,94 @@ class MaintenanceSchedule(models.Model):
         verbose_name = 'Harmonogram konserwacji'
         verbose_name_plural = 'Harmonogramy konserwacji'
         ordering = ['scheduled_date']
+        indexes = [
+            models.Index(fields=['is_completed', 'scheduled_date'], name='maintenance_due'),
+        ]
 
     def __str__(self):
         status = "✓" if self.is_completed else "⏳"
         return f'{status} {self.equipment.name} - {self.get_maintenance_type_display()} ({self.scheduled_date})'
+
+
+class ExportJob(models.Model):
+    """Eksport wykonywany w tle przez `manage.py run_export_worker`"""
+    KIND_CHOICES = [
+        ('equipment_xlsx', 'Sprzęt (Excel)'),
+        ('transfers_xlsx', 'Przekazania (Excel)'),
+        ('equipment_csv', 'Sprzęt (CSV)'),
+        ('equipment_ndjson', 'Sprzęt (NDJSON)'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Oczekuje'),
+        ('running', 'W trakcie'),
+        ('done', 'Gotowy'),
+        ('failed', 'Błąd'),
+    ]
+
+    kind = models.CharField('Rodzaj eksportu', max_length=30, choices=KIND_CHOICES)
+    filters = models.JSONField('Filtry', default=dict, blank=True)
+    status = models.CharField(
+        'Status', max_length=20, choices=STATUS_CHOICES, default='pending'
+    )
+    processed_rows = models.PositiveIntegerField('Przetworzone wiersze', default=0)
+    total_rows = models.PositiveIntegerField('Liczba wierszy', null=True, blank=True)
+    file = models.FileField('Plik', upload_to='exports/', blank=True)
+    error = models.TextField('Błąd', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs',
+        verbose_name='Zlecone przez'
+    )
+    created_at = models.DateTimeField('Data utworzenia', auto_now_add=True)
+    started_at = models.DateTimeField('Rozpoczęto', null=True, blank=True)
+    finished_at = models.DateTimeField('Zakończono', null=True, blank=True)
+    # Worker odświeża znacznik co --poll-interval; stary znacznik = worker przerwał pracę
+    heartbeat_at = models.DateTimeField('Ostatni sygnał workera', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Liczba prób', default=0)
+
+    class Meta:
+        verbose_name = 'Eksport w tle'
+        verbose_name_plural = 'Eksporty w tle'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} - {self.get_status_display()} ({self.created_at:%d.%m.%Y %H:%M})'
+
+    def progress_percent(self):
+        """Postęp w procentach (None, jeśli liczba wierszy nie jest jeszcze znana)"""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return None
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+
+class EquipmentImport(models.Model):
+    """Import sprzętu z pliku CSV/XLSX (podsumowanie i raport błędów)"""
+    file_name = models.CharField('Plik', max_length=255)
+    total_rows = models.PositiveIntegerField('Liczba wierszy', default=0)
+    created_rows = models.PositiveIntegerField('Dodane', default=0)
+    updated_rows = models.PositiveIntegerField('Zaktualizowane', default=0)
+    error_rows = models.PositiveIntegerField('Błędne wiersze', default=0)
+    error_report = models.FileField('Raport błędów', upload_to='imports/', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='equipment_imports',
+        verbose_name='Zaimportował'
+    )
+    created_at = models.DateTimeField('Data importu', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Import sprzętu'
+        verbose_name_plural = 'Importy sprzętu'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.file_name} ({self.created_at:%d.%m.%Y %H:%M})'
@@ -0,0 +1,132 @@
+"""
+Paginacja kursorowa (keyset) list sprzętu.
+
+Zamiast OFFSET i COUNT(*) kolejna strona jest pobierana warunkiem
+"starsze niż ostatni wiersz poprzedniej strony" po (-created_at, id),
+więc koszt każdej strony jest stały. Kursor jest nieprzezroczystym,
+podpisanym tokenem - uszkodzony lub podrobiony oznacza pierwszą stronę.
+"""
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.db.models import Q
+
+
+CURSOR_SALT = 'equipment.pagination.cursor'
+
+
+def encode_cursor(obj, direction):
+    return signing.dumps(
+        {'c': obj.created_at.isoformat(), 'i': obj.pk, 'd': direction},
+        salt=CURSOR_SALT, compress=True,
+    )
+
+
+def decode_cursor(token):
+    """Zwraca (created_at, id, kierunek) albo None dla niepoprawnego kursora"""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        return datetime.fromisoformat(data['c']), int(data['i']), data['d']
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+class CursorPage:
+    """Strona wyników o interfejsie zbliżonym do django.core.paginator.Page"""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, has_next, has_previous, total=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        # Liczba wszystkich wyników - tylko jeśli jest tania do ustalenia
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page:
+            return encode_cursor(self.object_list[-1], 'n')
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page:
+            return encode_cursor(self.object_list[0], 'p')
+        return None
+
+
+class CursorPaginator:
+    """Paginacja po kolejności (-created_at, id)"""
+
+    def __init__(self, queryset, per_page, total=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.total = total
+
+    def _page_query(self, position):
+        """Zapytanie o stronę (z jednym wierszem zapasu, który mówi, czy jest dalej)"""
+        if position is None:
+            return self.queryset.order_by('-created_at', 'id')[:self.per_page + 1]
+        created_at, pk, direction = position
+        if direction == 'p':
+            # Strona wstecz: pobierz w odwrotnej kolejności i odwróć
+            return self.queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            ).order_by('created_at', '-id')[:self.per_page + 1]
+        return self.queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        ).order_by('-created_at', 'id')[:self.per_page + 1]
+
+    def _make_page(self, position, rows):
+        if position is None:
+            return CursorPage(rows[:self.per_page], len(rows) > self.per_page, False, self.total)
+        if position[2] == 'p':
+            has_previous = len(rows) > self.per_page
+            return CursorPage(rows[:self.per_page][::-1], True, has_previous, self.total)
+        return CursorPage(rows[:self.per_page], len(rows) > self.per_page, True, self.total)
+
+    def get_page(self, cursor):
+        position = decode_cursor(cursor)
+        rows = list(self._page_query(position))
+        if not rows and position and position[2] == 'p':
+            return self.get_page(None)
+        return self._make_page(position, rows)
+
+    async def aget_page(self, cursor):
+        position = decode_cursor(cursor)
+        rows = [obj async for obj in self._page_query(position)]
+        if not rows and position and position[2] == 'p':
+            return await self.aget_page(None)
+        return self._make_page(position, rows)
+
+
+async def aget_paginator_page(paginator, number):
+    """
+    Strona django.core.paginator.Paginator w kodzie async - Paginator nie ma
+    API async, więc liczenie i pobranie strony wykonuje się w wątku, a lista
+    obiektów jest od razu wyliczana (szablon nie może już pytać bazy).
+    """
+    def get_page():
+        page = paginator.get_page(number)
+        page.object_list = list(page.object_list)
+        return page
+    return await sync_to_async(get_page)()
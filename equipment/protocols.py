@@ -0,0 +1,335 @@
+"""
+Protokoły przekazania sprzętu w PDF.
+
+Style akapitów i tabel są tworzone raz, przy imporcie modułu - koszt
+jednego protokołu to tylko dane. Renderowanie działa na zwykłych
+słownikach (protocol_data), więc można je wykonywać w puli procesów:
+wiele protokołów naraz jako jeden wielostronicowy PDF albo archiwum ZIP.
+Pulę uruchamia tylko `manage.py generate_transfer_protocols` - widok
+transfer_protocols_batch renderuje w procesie serwera (fork wielowątkowego
+procesu z otwartymi połączeniami do bazy w trakcie żądania nie jest bezpieczny).
+
+Gotowe PDF są przechowywane na dysku pod kluczem: id przekazania + skrót
+danych protokołu. Data w stopce jest deterministyczna (data akceptacji),
+więc ten sam protokół zawsze daje ten sam plik i ten sam ETag.
+"""
+import hashlib
+import json
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .file_cache import LRUFileCache
+
+
+# Czcionki z obsługą polskich znaków (wbudowane w ReportLab)
+FONT_NAME = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    fontName=FONT_BOLD,
+    fontSize=14,
+    spaceAfter=15,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    fontName=FONT_BOLD,
+    fontSize=10,
+    spaceAfter=8,
+    spaceBefore=8,
+    textColor=colors.darkblue
+)
+
+NORMAL_STYLE = ParagraphStyle(
+    'CustomNormal',
+    fontName=FONT_NAME,
+    fontSize=9,
+    spaceAfter=4,
+    alignment=TA_LEFT
+)
+
+FOOTER_STYLE = ParagraphStyle('Footer', fontName=FONT_NAME, fontSize=7, alignment=TA_CENTER)
+
+BASIC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BACKGROUND', (0, 0), (0, -1), colors.grey),
+    ('FONTNAME', (0, 0), (0, -1), FONT_BOLD),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+BASIC_TABLE_WIDTHS = [3.5*cm, 10*cm]
+
+# Podpisy w jednej linii
+SIGNATURES_DATA = [
+    ['Odbiorca sprzętu:', '', 'Data:', ''],
+    ['', '', '', ''],
+    ['Podpis:', '', 'Podpis:', ''],
+    ['', '', '', ''],
+]
+SIGNATURES_TABLE_STYLE = TableStyle([
+    ('LINEBELOW', (1, 1), (1, 1), 1, colors.black),
+    ('LINEBELOW', (1, 3), (1, 3), 1, colors.black),
+    ('LINEBELOW', (3, 1), (3, 1), 1, colors.black),
+    ('LINEBELOW', (3, 3), (3, 3), 1, colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+SIGNATURES_TABLE_WIDTHS = [3*cm, 4*cm, 2*cm, 4*cm]
+
+# Maksymalna liczba protokołów w jednym pliku zbiorczym
+PROTOCOL_BATCH_LIMIT = 1000
+
+# Mniejsze partie są renderowane w bieżącym procesie (start puli kosztuje więcej)
+PROTOCOL_POOL_THRESHOLD = 8
+
+PROTOCOL_FILTER_PARAMS = ('date_from', 'date_to', 'approved_by', 'user', 'status')
+
+# Zmiana wyglądu protokołu wymaga nowej wersji - inaczej cache zwracałby stare pliki
+PROTOCOL_RENDER_VERSION = 1
+
+
+def protocol_transfers_queryset():
+    from .models import EquipmentTransfer
+    return EquipmentTransfer.objects.select_related(
+        'equipment', 'from_user', 'to_user', 'transferred_by', 'approved_by'
+    )
+
+
+def filter_protocol_transfers(params):
+    """
+    Przekazania do protokołów zbiorczych wg parametrów: date_from, date_to
+    (RRRR-MM-DD), approved_by (login akceptującego), user (login nadawcy
+    lub odbiorcy) i status (domyślnie tylko zaakceptowane).
+    """
+    from django.db.models import Q
+    from django.utils.dateparse import parse_date
+
+    transfers = protocol_transfers_queryset()
+    transfers = transfers.filter(approval_status=params.get('status') or 'approved')
+
+    date_from = parse_date(params.get('date_from') or '')
+    if date_from:
+        transfers = transfers.filter(transfer_date__date__gte=date_from)
+    date_to = parse_date(params.get('date_to') or '')
+    if date_to:
+        transfers = transfers.filter(transfer_date__date__lte=date_to)
+    if params.get('approved_by'):
+        transfers = transfers.filter(approved_by__username=params['approved_by'])
+    if params.get('user'):
+        transfers = transfers.filter(
+            Q(from_user__username=params['user']) | Q(to_user__username=params['user'])
+        )
+    return transfers.order_by('transfer_date', 'pk')
+
+
+def _full_name(user):
+    return user.get_full_name() if user else 'System'
+
+
+def protocol_generated_at(transfer):
+    """Data w stopce - akceptacja (lub utworzenie) przekazania, nie chwila pobrania"""
+    return transfer.approved_at or transfer.transfer_date
+
+
+def protocol_data(transfer):
+    """Wszystkie wartości potrzebne do protokołu, jako tekst (bez obiektów ORM)"""
+    equipment = transfer.equipment
+    return {
+        'id': transfer.id,
+        'serial_number': equipment.serial_number,
+        'basic_rows': [
+            ['Data przekazania:', transfer.transfer_date.strftime('%d.%m.%Y %H:%M')],
+            ['Numer protokołu:', f'PP/{transfer.id:04d}/{transfer.transfer_date.year}'],
+            ['Sprzęt:', equipment.name],
+            ['Numer seryjny:', equipment.serial_number],
+            ['Typ sprzętu:', equipment.type],
+            ['Od użytkownika:', _full_name(transfer.from_user)],
+            ['Do użytkownika:', _full_name(transfer.to_user)],
+            ['Przekazane przez:', _full_name(transfer.transferred_by)],
+            ['Lokalizacja:', equipment.location],
+            ['Dostawca:', equipment.supplier or 'Nie podano'],
+            ['Data zakupu:', equipment.purchase_date.strftime('%d.%m.%Y') if equipment.purchase_date else 'Nie podano'],
+            ['Cena zakupu:', f'{equipment.purchase_price} PLN' if equipment.purchase_price else 'Nie podano'],
+            ['Koniec gwarancji:', equipment.warranty_end_date.strftime('%d.%m.%Y') if equipment.warranty_end_date else 'Nie podano'],
+            ['Status:', equipment.get_status_display()],
+        ],
+        'reason': transfer.reason,
+        'approved_by': _full_name(transfer.approved_by),
+        'approved_at': transfer.approved_at.strftime('%d.%m.%Y %H:%M') if transfer.approved_at else 'Nie zaakceptowano',
+        'generated_at': protocol_generated_at(transfer).strftime('%d.%m.%Y %H:%M'),
+    }
+
+
+def protocol_filename(data):
+    return f'protokol_przekazania_{data["serial_number"]}.pdf'
+
+
+def protocol_hash(data):
+    """Skrót treści protokołu - zmienia się razem z dowolnym polem protokołu"""
+    content = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f'{PROTOCOL_RENDER_VERSION}|{content}'.encode('utf-8')).hexdigest()
+
+
+def protocol_cache_key(data):
+    return f'{data["id"]}_{protocol_hash(data)}'
+
+
+def get_protocol_cache():
+    return LRUFileCache(
+        settings.PROTOCOL_CACHE_DIR, settings.PROTOCOL_CACHE_MAX_ENTRIES, suffix='.pdf'
+    )
+
+
+def get_protocol_pdf(data):
+    """PDF protokołu z cache na dysku (renderowany i zapisywany przy braku)"""
+    cache = get_protocol_cache()
+    key = protocol_cache_key(data)
+    pdf = cache.read(key)
+    if pdf is None:
+        pdf = render_protocol(data)
+        cache.set(key, pdf)
+    return pdf
+
+
+def protocol_story(data):
+    """Elementy (flowables) jednego protokołu"""
+    story = [
+        Paragraph("PROTOKÓŁ PRZEKAZANIA SPRZĘTU IT", TITLE_STYLE),
+        Spacer(1, 10),
+    ]
+
+    # Dane przekazania w jednej tabeli
+    basic_table = Table(data['basic_rows'], colWidths=BASIC_TABLE_WIDTHS)
+    basic_table.setStyle(BASIC_TABLE_STYLE)
+    story.append(basic_table)
+    story.append(Spacer(1, 10))
+
+    # Powód przekazania (jeśli istnieje)
+    if data['reason']:
+        story.append(Paragraph("Powód przekazania:", HEADING_STYLE))
+        story.append(Paragraph(data['reason'], NORMAL_STYLE))
+        story.append(Spacer(1, 8))
+
+    # Status akceptacji
+    status_text = f"Zaakceptowane przez: {data['approved_by']}<br/>"
+    status_text += f"Data akceptacji: {data['approved_at']}"
+    story.append(Paragraph("Status akceptacji:", HEADING_STYLE))
+    story.append(Paragraph(status_text, NORMAL_STYLE))
+    story.append(Spacer(1, 15))
+
+    signatures_table = Table(SIGNATURES_DATA, colWidths=SIGNATURES_TABLE_WIDTHS)
+    signatures_table.setStyle(SIGNATURES_TABLE_STYLE)
+    story.append(signatures_table)
+    story.append(Spacer(1, 10))
+
+    # Stopka
+    story.append(Paragraph(
+        f"Protokół wygenerowany automatycznie przez system AssetStorm • "
+        f"Data wygenerowania: {data['generated_at']}",
+        FOOTER_STYLE
+    ))
+    return story
+
+
+def _build_pdf(fileobj, story):
+    # Dokument PDF z marginesami
+    doc = SimpleDocTemplate(
+        fileobj,
+        pagesize=A4,
+        rightMargin=2*cm,
+        leftMargin=2*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm,
+        # Bez daty utworzenia i losowego ID w metadanych - te same dane dają identyczny plik
+        invariant=True,
+    )
+    doc.build(story)
+
+
+def render_protocol(data):
+    """PDF jednego protokołu (bajty)"""
+    buffer = BytesIO()
+    _build_pdf(buffer, protocol_story(data))
+    return buffer.getvalue()
+
+
+def _render_protocol_chunk(chunk):
+    """Zadanie dla puli procesów: lista danych -> lista (nazwa pliku, PDF)"""
+    return [(protocol_filename(data), render_protocol(data)) for data in chunk]
+
+
+def _chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def render_protocols(datas, workers=1):
+    """
+    Protokoły jako osobne PDF - z cache, a brakujące renderowane i dopisywane
+    do cache. workers > 1 - większe partie w puli procesów (tylko poza
+    serwerem WWW, np. w poleceniu zarządzania).
+    Zwraca listę (nazwa pliku, PDF) w kolejności danych wejściowych.
+    """
+    cache = get_protocol_cache()
+    keys = [protocol_cache_key(data) for data in datas]
+    pdfs = [cache.read(key) for key in keys]
+    missing = [index for index, pdf in enumerate(pdfs) if pdf is None]
+    to_render = [datas[index] for index in missing]
+
+    if workers <= 1 or len(to_render) < PROTOCOL_POOL_THRESHOLD:
+        rendered = _render_protocol_chunk(to_render)
+    else:
+        rendered = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Kilka porcji na proces - mniej przesyłania danych niż zadanie na protokół
+            for chunk_result in executor.map(_render_protocol_chunk, _chunks(to_render, workers * 4)):
+                rendered.extend(chunk_result)
+
+    for index, (_, pdf) in zip(missing, rendered):
+        cache.set(keys[index], pdf)
+        pdfs[index] = pdf
+    return [(protocol_filename(data), pdf) for data, pdf in zip(datas, pdfs)]
+
+
+def write_protocols_zip(fileobj, datas, workers=1):
+    """Archiwum ZIP z osobnym PDF dla każdego protokołu"""
+    used_names = set()
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for data, (filename, pdf) in zip(datas, render_protocols(datas, workers)):
+            # Kilka przekazań tego samego sprzętu - numer protokołu w nazwie
+            if filename in used_names:
+                filename = filename.replace('.pdf', f'_{data["id"]}.pdf')
+            used_names.add(filename)
+            archive.writestr(filename, pdf)
+
+
+def write_protocols_pdf(fileobj, datas):
+    """
+    Jeden wielostronicowy PDF ze wszystkimi protokołami (każdy od nowej strony).
+    Budowany jednym przebiegiem - łączenie gotowych PDF wymagałoby dodatkowej biblioteki.
+    """
+    story = []
+    for data in datas:
+        if story:
+            story.append(PageBreak())
+        story.extend(protocol_story(data))
+    _build_pdf(fileobj, story)
@@ -0,0 +1,116 @@
+"""
+Kody QR sprzętu.
+
+Renderowanie jest czystą funkcją (URL -> obraz), dzięki czemu można je
+wykonywać w puli procesów - patrz `manage.py generate_qr_codes` - albo
+na żądanie w widoku equipment_qr, z ograniczonym cache na dysku.
+"""
+import hashlib
+import re
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.urls import reverse
+
+from .file_cache import LRUFileCache
+
+
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Zakres rozmiarów (px) obrazów renderowanych na żądanie
+QR_DEFAULT_SIZE = 290
+QR_MIN_SIZE = 64
+QR_MAX_SIZE = 2048
+
+# Zmiana sposobu renderowania wymaga nowej wersji - inaczej ETag wskazywałby stary obraz
+QR_RENDER_VERSION = 1
+
+QR_BORDER = 4
+
+# Czas przechowywania obrazu przez przeglądarkę (rok - obraz pod danym ETag nie zmienia się)
+QR_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def equipment_qr_url(pk):
+    """Bezwzględny URL szczegółów sprzętu zakodowany w kodzie QR"""
+    return f"{settings.SITE_URL or 'http://127.0.0.1:8000'}{reverse('equipment:equipment_detail', args=[pk])}"
+
+
+def qr_filename(serial_number):
+    return f'qr_{serial_number}.png'
+
+
+def _make_qr(url, box_size=10, **kwargs):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=QR_BORDER,
+        **kwargs
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_png(url, size=None):
+    """Zwraca obraz PNG kodu QR dla podanego URL (opcjonalnie o szerokości do `size` px)"""
+    qr = _make_qr(url)
+    if size:
+        qr.box_size = max(1, size // (qr.modules_count + 2 * QR_BORDER))
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_qr_svg(url, size=QR_DEFAULT_SIZE):
+    """Zwraca obraz SVG (jedna ścieżka) kodu QR o wymiarach `size` px"""
+    qr = _make_qr(url, image_factory=qrcode.image.svg.SvgPathImage)
+    svg = qr.make_image().to_string(encoding='unicode')
+    # Wektor skaluje się dowolnie - ustaw tylko wymiary wyświetlania
+    return re.sub(
+        r'width="[^"]*" height="[^"]*"', f'width="{size}" height="{size}"', svg, count=1
+    ).encode('utf-8')
+
+
+def clamp_qr_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return QR_DEFAULT_SIZE
+    return min(QR_MAX_SIZE, max(QR_MIN_SIZE, size))
+
+
+def qr_cache_key(url, fmt, size):
+    """Klucz obrazu - zależy tylko od zakodowanego URL, formatu i rozmiaru"""
+    data = f'{QR_RENDER_VERSION}|{fmt}|{size}|{url}'.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_qr_cache():
+    return LRUFileCache(settings.QR_CACHE_DIR, settings.QR_CACHE_MAX_ENTRIES)
+
+
+def get_qr_image(url, fmt, size):
+    """Obraz kodu QR (bajty) - z cache na dysku lub świeżo wyrenderowany"""
+    cache = get_qr_cache()
+    key = qr_cache_key(url, fmt, size)
+    content = cache.read(key)
+    if content is not None:
+        return content
+    content = render_qr_svg(url, size) if fmt == 'svg' else render_qr_png(url, size)
+    cache.set(key, content)
+    return content
+
+
+def render_qr_item(item):
+    """Zadanie dla puli procesów: (pk, url) -> (pk, PNG)"""
+    pk, url = item
+    return pk, render_qr_png(url)
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+IT_GROUP_NAME = 'IT'
+
+ROLES_CACHE_KEY = 'equipment:roles:{user_id}'
+
+
+class UserRoles:
+    """Role użytkownika wyliczane raz na żądanie"""
+
+    def __init__(self, is_authenticated=False, is_superuser=False, in_it_group=False):
+        self.is_authenticated = is_authenticated
+        self.is_superuser = is_superuser
+        self.in_it_group = in_it_group
+
+    @property
+    def is_it_staff(self):
+        """Pełny dostęp mają superuserzy i członkowie grupy IT"""
+        return self.is_superuser or self.in_it_group
+
+    def __repr__(self):
+        return f'<UserRoles it_staff={self.is_it_staff} superuser={self.is_superuser}>'
+
+
+# Cache w pamięci procesu nie widzi unieważnień z innych procesów serwera -
+# wtedy role są przechowywane najwyżej tyle sekund
+LOCAL_ROLES_CACHE_TIMEOUT = 5
+
+
+def get_roles_cache():
+    return caches[getattr(settings, 'USER_ROLES_CACHE_ALIAS', 'default')]
+
+
+def _roles_cache_timeout(cache):
+    timeout = getattr(settings, 'USER_ROLES_CACHE_TIMEOUT', 300)
+    if isinstance(cache, LocMemCache):
+        return min(timeout, LOCAL_ROLES_CACHE_TIMEOUT)
+    return timeout
+
+
+def get_user_roles(user):
+    """
+    Zwraca role użytkownika.
+    Wynik jest zapamiętywany na obiekcie użytkownika (czyli na czas żądania)
+    oraz w cache USER_ROLES_CACHE_ALIAS między żądaniami, więc zapytanie
+    o grupy wykonuje się rzadko.
+    """
+    roles = getattr(user, '_equipment_roles', None)
+    if roles is not None:
+        return roles
+
+    if not user.is_authenticated:
+        roles = UserRoles()
+    else:
+        cache = get_roles_cache()
+        key = ROLES_CACHE_KEY.format(user_id=user.pk)
+        in_it_group = cache.get(key)
+        if in_it_group is None:
+            in_it_group = user.groups.filter(name=IT_GROUP_NAME).exists()
+            cache.set(key, in_it_group, _roles_cache_timeout(cache))
+        roles = UserRoles(
+            is_authenticated=True,
+            is_superuser=user.is_superuser,
+            in_it_group=in_it_group,
+        )
+
+    user._equipment_roles = roles
+    return roles
+
+
+async def aget_user_roles(user):
+    """Asynchroniczna wersja get_user_roles (widoki async pod ASGI)"""
+    roles = getattr(user, '_equipment_roles', None)
+    if roles is not None:
+        return roles
+
+    if not user.is_authenticated:
+        roles = UserRoles()
+    else:
+        cache = get_roles_cache()
+        key = ROLES_CACHE_KEY.format(user_id=user.pk)
+        in_it_group = await cache.aget(key)
+        if in_it_group is None:
+            in_it_group = await user.groups.filter(name=IT_GROUP_NAME).aexists()
+            await cache.aset(key, in_it_group, _roles_cache_timeout(cache))
+        roles = UserRoles(
+            is_authenticated=True,
+            is_superuser=user.is_superuser,
+            in_it_group=in_it_group,
+        )
+
+    user._equipment_roles = roles
+    return roles
+
+
+async def aresolve_request_user(request):
+    """
+    Pobiera użytkownika i role żądania w kodzie async - ustawia request.user
+    i request.user_roles na gotowe obiekty zamiast leniwych. Zwraca role.
+    """
+    request.user = await request.auser()
+    request.user_roles = await aget_user_roles(request.user)
+    return request.user_roles
+
+
+def invalidate_user_roles(user_ids):
+    """Usuwa z cache role podanych użytkowników"""
+    keys = [ROLES_CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    if keys:
+        get_roles_cache().delete_many(keys)
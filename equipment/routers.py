@@ -0,0 +1,85 @@
+"""
+Kierowanie odczytów raportowych do repliki bazy (settings.REPLICA_DATABASE).
+
+ReplicaRoutingMiddleware włącza odczyt z repliki tylko dla żądań GET/HEAD
+widoków z settings.REPLICA_ROUTES. Zapisy zawsze trafiają do 'default',
+a po zapisie użytkownik przez REPLICA_STICKY_SECONDS czyta z 'default'
+(ciasteczko) - widzi własne zmiany mimo opóźnienia replikacji.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+# Aplikacje czytane zawsze z 'default' - sesja zapisana przy logowaniu musi
+# być widoczna od razu, niezależnie od opóźnienia replikacji
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# Czy bieżące żądanie może czytać z repliki / czy coś w nim zapisano
+_use_replica = ContextVar('use_replica', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+
+def replica_enabled():
+    return REPLICA_DB_ALIAS in connections.databases
+
+
+def start_request():
+    _use_replica.set(False)
+    _wrote.set(False)
+
+
+def use_replica(enabled=True):
+    """Odczyty bieżącego żądania z repliki (jeśli jest skonfigurowana)"""
+    _use_replica.set(enabled and replica_enabled())
+
+
+@contextmanager
+def primary_reads():
+    """Odczyty w bloku `with` z 'default' - np. dane zapisywane do cache"""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def request_wrote():
+    return _wrote.get()
+
+
+@receiver(request_finished)
+def _finish_request(sender, **kwargs):
+    # Po odczytaniu całej odpowiedzi - także strumieniowej (eksport CSV)
+    _use_replica.set(False)
+
+
+class ReplicaRouter:
+    """
+    Odczyty z repliki tylko w żądaniach oznaczonych przez middleware, poza
+    sesjami i poza transakcją (w transakcji odczyt musi widzieć jej własne
+    zapisy).
+    """
+
+    def db_for_read(self, model, **hints):
+        if (_use_replica.get() and model._meta.app_label not in PRIMARY_ONLY_APPS
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika zawiera te same dane co 'default'
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Schemat repliki pochodzi z replikacji, nie z migracji
+        return db != REPLICA_DB_ALIAS
@@ -0,0 +1,167 @@
+"""
+Rozpoznawanie zeskanowanych kodów: numerów seryjnych i treści kodów QR.
+
+Kod QR zawiera adres szczegółów sprzętu (equipment_qr_url), starsze naklejki
+i skanery podają sam numer seryjny. Zwięzłe rekordy sprzętu są trzymane w
+pamięci procesu (LRU, także wynik "nie znaleziono"). Zapis sprzętu usuwa
+jego wpisy po zatwierdzeniu transakcji. Operacje masowe (update, bulk_create)
+czyszczą cały cache. Inne procesy serwera widzą zmianę najpóźniej po
+SCAN_CACHE_TIMEOUT sekundach.
+"""
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import Resolver404, resolve, reverse
+
+from .models import Equipment
+
+
+SCAN_FIELDS = (
+    'id', 'serial_number', 'name', 'type', 'status', 'location',
+    'assigned_to_id', 'assigned_to__username',
+)
+
+# Najwięcej kodów rozpoznawanych jednym żądaniem
+SCAN_BATCH_LIMIT = 1000
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Słownik o ograniczonej liczbie wpisów i czasie życia, bezpieczny dla wątków"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = LRUCache(
+    getattr(settings, 'SCAN_CACHE_MAX_ENTRIES', 10000),
+    getattr(settings, 'SCAN_CACHE_TIMEOUT', 30),
+)
+
+
+def parse_code(code):
+    """
+    Klucz wyszukiwania dla zeskanowanego kodu: ('pk', id) dla adresu z kodu QR
+    (niezależnie od hosta - naklejki mogły być drukowane pod innym SITE_URL),
+    w pozostałych przypadkach ('serial', numer seryjny).
+    """
+    code = code.strip()
+    if '/' in code:
+        try:
+            match = resolve(urlsplit(code).path)
+        except Resolver404:
+            match = None
+        if match is not None and match.view_name == 'equipment:equipment_detail':
+            return ('pk', match.kwargs['pk'])
+    return ('serial', code)
+
+
+def _record(row):
+    return {
+        'id': row['id'],
+        'serial_number': row['serial_number'],
+        'name': row['name'],
+        'type': row['type'],
+        'status': row['status'],
+        'location': row['location'],
+        'assigned_to': row['assigned_to_id'],
+        'assigned_to_username': row['assigned_to__username'],
+        'url': reverse('equipment:equipment_detail', args=[row['id']]),
+    }
+
+
+def resolve_codes(codes):
+    """
+    Rekordy sprzętu dla listy kodów (w tej samej kolejności, None - nie
+    znaleziono). Kody spoza cache są pobierane najwyżej dwoma zapytaniami.
+    """
+    keys = [parse_code(code) for code in codes]
+    found = {}
+    missing = set()
+    for key in keys:
+        if key not in found:
+            record = _cache.get(key, _MISSING)
+            if record is _MISSING:
+                missing.add(key)
+            else:
+                found[key] = record
+
+    if missing:
+        pks = [value for kind, value in missing if kind == 'pk']
+        serials = [value for kind, value in missing if kind == 'serial']
+        rows = []
+        if pks:
+            rows += Equipment.objects.filter(pk__in=pks).values(*SCAN_FIELDS)
+        if serials:
+            rows += Equipment.objects.filter(serial_number__in=serials).values(*SCAN_FIELDS)
+        for row in rows:
+            record = _record(row)
+            for key in (('pk', record['id']), ('serial', record['serial_number'])):
+                _cache.set(key, record)
+                found[key] = record
+        for key in missing:
+            if key not in found:
+                _cache.set(key, None)
+                found[key] = None
+
+    return [found[key] for key in keys]
+
+
+def _forget(pk, serial_numbers):
+    keys = [('pk', pk)] + [('serial', serial) for serial in serial_numbers]
+    # Rekord mógł trafić do cache pod poprzednim numerem seryjnym
+    cached = _cache.get(('pk', pk))
+    if cached:
+        keys.append(('serial', cached['serial_number']))
+    _cache.delete_many(keys)
+
+
+def invalidate_scan_cache(pk, serial_number):
+    """Usuwa wpisy sprzętu - od razu i po zatwierdzeniu bieżącej transakcji"""
+    _forget(pk, [serial_number])
+    transaction.on_commit(lambda: _forget(pk, [serial_number]))
+
+
+def clear_scan_cache():
+    """Czyści cały cache (operacje masowe), także po zatwierdzeniu bieżącej transakcji"""
+    _cache.clear()
+    transaction.on_commit(_cache.clear)
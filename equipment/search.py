@@ -0,0 +1,250 @@
+"""
+Indeks pełnotekstowy sprzętu.
+
+Na SQLite jest to tabela FTS5, na PostgreSQL tabela z kolumną tsvector
+i indeksem GIN. Indeks jest aktualizowany sygnałami Equipment oraz przez
+operacje masowe EquipmentQuerySet, a w całości odbudowywany poleceniem
+`manage.py rebuild_search_index`. Dla innych baz wyszukiwanie działa
+jak dawniej, przez filtry icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'equipment_search'
+
+# Pola indeksowane (kolejność = kolumny tabeli FTS5)
+SEARCH_FIELDS = (
+    'name', 'serial_number', 'type', 'invoice_number', 'location', 'supplier', 'notes',
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _equipment_table():
+    from .models import Equipment
+    return Equipment._meta.db_table
+
+
+class IContainsSearchBackend:
+    """Wyszukiwanie bez indeksu - skanuje wszystkie wiersze (LIKE '%...%')"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def index_ids(self, ids):
+        pass
+
+    def remove_ids(self, ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search_filter(self, query):
+        search_filters = Q()
+        for field in SEARCH_FIELDS:
+            search_filters |= Q(**{f'{field}__icontains': query})
+        return search_filters
+
+    def rank_expression(self, model, query):
+        return None
+
+
+class SQLiteSearchBackend(IContainsSearchBackend):
+    """Indeks FTS5 z dopasowaniem prefiksowym i sortowaniem po bm25"""
+
+    def create_index(self):
+        columns = ', '.join(SEARCH_FIELDS)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                f"{columns}, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def _insert_sql(self, where=''):
+        columns = ', '.join(SEARCH_FIELDS)
+        values = ', '.join(f"COALESCE({field}, '')" for field in SEARCH_FIELDS)
+        return (
+            f'INSERT INTO {SEARCH_TABLE} (rowid, {columns}) '
+            f'SELECT id, {values} FROM {_equipment_table()} {where}'
+        )
+
+    def index_ids(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', ids)
+            cursor.execute(self._insert_sql(f'WHERE id IN ({placeholders})'), ids)
+
+    def remove_ids(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', ids)
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            cursor.execute(self._insert_sql())
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+            return cursor.fetchone()[0]
+
+    def _match(self, query):
+        # Każde słowo jako prefiks: "lapt"* AND "dell"*
+        return ' AND '.join(f'"{token}"*' for token in _tokens(query))
+
+    def search_filter(self, query):
+        if not _tokens(query):
+            return Q(pk__in=[])
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+            [self._match(query)],
+        ))
+
+    def rank_expression(self, model, query):
+        # bm25 w FTS5: im mniejsza wartość, tym lepsze dopasowanie
+        return RawSQL(
+            f'SELECT rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = {model._meta.db_table}.id',
+            [self._match(query)],
+        )
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """Tabela tsvector z indeksem GIN, dopasowanie prefiksowe i ts_rank"""
+
+    # Wagi: nazwa i numer seryjny są ważniejsze niż uwagi
+    WEIGHTS = {
+        'name': 'A', 'serial_number': 'A',
+        'type': 'B', 'invoice_number': 'B', 'location': 'B', 'supplier': 'B',
+        'notes': 'C',
+    }
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+                f'equipment_id bigint PRIMARY KEY '
+                f'REFERENCES {_equipment_table()} (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx '
+                f'ON {SEARCH_TABLE} USING GIN (document)'
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def _upsert_sql(self, where=''):
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', COALESCE({field}, '')), '{weight}')"
+            for field, weight in self.WEIGHTS.items()
+        )
+        return (
+            f'INSERT INTO {SEARCH_TABLE} (equipment_id, document) '
+            f'SELECT id, {document} FROM {_equipment_table()} {where} '
+            f'ON CONFLICT (equipment_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+
+    def index_ids(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._upsert_sql('WHERE id = ANY(%s)'), [ids])
+
+    def remove_ids(self, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE equipment_id = ANY(%s)', [ids])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+            cursor.execute(self._upsert_sql())
+            cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+            return cursor.fetchone()[0]
+
+    def _tsquery(self, query):
+        return ' & '.join(f'{token}:*' for token in _tokens(query))
+
+    def search_filter(self, query):
+        if not _tokens(query):
+            return Q(pk__in=[])
+        return Q(pk__in=RawSQL(
+            f"SELECT equipment_id FROM {SEARCH_TABLE} "
+            f"WHERE document @@ to_tsquery('simple', %s)",
+            [self._tsquery(query)],
+        ))
+
+    def rank_expression(self, model, query):
+        # Ujemny ts_rank, aby sortowanie rosnące (jak w FTS5) dawało najlepsze wyniki
+        return RawSQL(
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {SEARCH_TABLE} "
+            f"WHERE equipment_id = {model._meta.db_table}.id",
+            [self._tsquery(query)],
+        )
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    connection = connections[using]
+    backend_class = SEARCH_BACKENDS.get(connection.vendor, IContainsSearchBackend)
+    return backend_class(connection)
+
+
+def search_equipment(queryset, query):
+    """
+    Filtruje queryset sprzętu po frazie wyszukiwania.
+    Jeśli fraza jest liczbą, dopasowuje również ID sprzętu.
+    Wyniki z indeksu są sortowane od najlepiej dopasowanych.
+    """
+    backend = get_search_backend(queryset.db)
+    search_filters = backend.search_filter(query)
+
+    # Dodaj wyszukiwanie po ID jeśli tekst to liczba
+    try:
+        search_filters |= Q(id=int(query))
+    except ValueError:
+        pass
+
+    results = queryset.filter(search_filters)
+    rank = backend.rank_expression(queryset.model, query)
+    if rank is not None:
+        # Dopasowanie po ID (bez rankingu) na początku listy
+        results = results.annotate(search_rank=rank).order_by(
+            F('search_rank').asc(nulls_first=True), '-created_at', '-id'
+        )
+    return results
@@ -0,0 +1,113 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import invalidate_dashboard
+from .models import Equipment, EquipmentTransfer
+from .roles import invalidate_user_roles
+from .scan import clear_scan_cache, invalidate_scan_cache
+from .search import SEARCH_FIELDS, get_search_backend
+from .stats import TRACKED_FIELDS, apply_deltas, instance_deltas, merge_deltas
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Unieważnia cache ról po zmianie członkostwa w grupach"""
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_user_roles([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # group.user_set.add/remove(...)
+        invalidate_user_roles(pk_set or [])
+    elif action == 'pre_clear':
+        # group.user_set.clear() - po wyczyszczeniu nie znamy już użytkowników
+        invalidate_user_roles(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_user_roles(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Logowanie zapisuje tylko last_login - nie ma wpływu na role
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_user_roles([instance.pk])
+    # Zwięzłe rekordy skanera zawierają nazwę przypisanego użytkownika
+    clear_scan_cache()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # on_delete=SET_NULL zmienia assigned_to z pominięciem EquipmentQuerySet.update
+    clear_scan_cache()
+
+
+@receiver(pre_save, sender=Equipment)
+def equipment_pre_save(sender, instance, update_fields, using, **kwargs):
+    """Zapamiętuje wartości sprzed zapisu potrzebne do aktualizacji statystyk"""
+    instance._stats_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not TRACKED_FIELDS.intersection(update_fields):
+        return
+    instance._stats_previous = (
+        Equipment._base_manager.using(using)
+        .filter(pk=instance.pk)
+        .values(*TRACKED_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Equipment)
+def equipment_post_save(sender, instance, created, using, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if created:
+        apply_deltas(instance_deltas(instance), using=using)
+    elif previous is not None:
+        apply_deltas(
+            merge_deltas(instance_deltas(instance), instance_deltas(previous, sign=-1)),
+            using=using,
+        )
+    instance._stats_previous = None
+
+
+@receiver(pre_delete, sender=Equipment)
+def equipment_pre_delete(sender, instance, **kwargs):
+    # Wartości odczytujemy przed usunięciem wiersza (pola mogą być odroczone)
+    instance._stats_previous = instance_deltas(instance, sign=-1)
+
+
+@receiver(post_delete, sender=Equipment)
+def equipment_post_delete(sender, instance, using, **kwargs):
+    deltas = getattr(instance, '_stats_previous', None)
+    if deltas is None:
+        deltas = instance_deltas(instance, sign=-1)
+    apply_deltas(deltas, using=using)
+    instance._stats_previous = None
+
+
+@receiver([post_save, post_delete], sender=Equipment)
+@receiver([post_save, post_delete], sender=EquipmentTransfer)
+def invalidate_dashboard_cache(sender, **kwargs):
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=Equipment)
+def update_search_index(sender, instance, update_fields, using, **kwargs):
+    if update_fields is not None and not set(SEARCH_FIELDS).intersection(update_fields):
+        return
+    get_search_backend(using).index_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Equipment)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    get_search_backend(using).remove_ids([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Equipment)
+def invalidate_scan_lookup(sender, instance, **kwargs):
+    invalidate_scan_cache(instance.pk, instance.serial_number)
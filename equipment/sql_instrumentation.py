@@ -0,0 +1,195 @@
+"""
+Pomiar zapytań SQL: liczba, czas i powtarzające się kształty (N+1).
+
+QueryRecorder podpina się pod wszystkie połączenia (execute_wrapper) na czas
+bloku `with`. Używają go SQLInstrumentationMiddleware (log i nagłówek
+Server-Timing) oraz query_budget - pomocnik do testów limitów zapytań.
+
+Połączenia są osobne dla każdego wątku, a async ORM wykonuje zapytania
+w wątku sync_to_async. W kodzie async trzeba używać `async with
+QueryRecorder()` / `aquery_budget` - wrapper jest wtedy instalowany w tym
+wątku (zwykłe `with` w pętli zdarzeń nie zobaczyłoby żadnego zapytania).
+"""
+import asyncio
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+
+# Liczba wykonań tego samego kształtu zapytania uznawana za N+1
+DEFAULT_NPLUS1_THRESHOLD = 5
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def normalize_sql(sql):
+    """Kształt zapytania - bez wartości stałych i długości list IN"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _LITERAL_RE.sub('?', sql)
+
+
+def _project_dir():
+    return str(settings.BASE_DIR)
+
+
+def find_query_origin():
+    """
+    Miejsce wywołania zapytania: najgłębszy węzeł szablonu (plik:linia)
+    i najgłębsza ramka kodu projektu (poza tym modułem i bibliotekami).
+    """
+    project_dir = _project_dir()
+    this_file = os.path.abspath(__file__)
+    code_origin = template_origin = None
+    frame = sys._getframe(1)
+    while frame is not None and not (code_origin and template_origin):
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if template_origin is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template_origin = f'{origin.template_name}:{token.lineno}'
+        if (code_origin is None and filename != this_file
+                and filename.startswith(project_dir) and 'site-packages' not in filename):
+            code_origin = f'{os.path.relpath(filename, project_dir)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return code_origin, template_origin
+
+
+class QueryRecorder:
+    """Zbiera zapytania wykonane na wszystkich połączeniach w bloku `with`"""
+
+    def __init__(self, using=None, capture_origin=True):
+        self.using = using
+        self.capture_origin = capture_origin
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        aliases = [self.using] if self.using else list(connections)
+        for alias in aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    async def __aenter__(self):
+        return await sync_to_async(self.__enter__, thread_sensitive=True)()
+
+    async def __aexit__(self, *exc_info):
+        await sync_to_async(self.__exit__, thread_sensitive=True)(*exc_info)
+
+    def _record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            origin = find_query_origin() if self.capture_origin else (None, None)
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duration': time.perf_counter() - start,
+                'alias': context['connection'].alias,
+                'code_origin': origin[0],
+                'template_origin': origin[1],
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['duration'] for query in self.queries)
+
+    def repeated_shapes(self, threshold=DEFAULT_NPLUS1_THRESHOLD):
+        """Kształty wykonane co najmniej `threshold` razy (podejrzenie N+1)"""
+        shapes = Counter(normalize_sql(query['sql']) for query in self.queries)
+        repeated = []
+        for shape, count in shapes.most_common():
+            if count < threshold:
+                break
+            first = next(q for q in self.queries if normalize_sql(q['sql']) == shape)
+            repeated.append({
+                'shape': shape,
+                'count': count,
+                'code_origin': first['code_origin'],
+                'template_origin': first['template_origin'],
+            })
+        return repeated
+
+
+def format_queries(recorder, threshold=DEFAULT_NPLUS1_THRESHOLD):
+    lines = [f'{i}. {query["sql"]}' for i, query in enumerate(recorder.queries, 1)]
+    for repeated in recorder.repeated_shapes(threshold):
+        lines.append(
+            f'N+1: {repeated["count"]}x {repeated["shape"]} '
+            f'(kod: {repeated["code_origin"]}, szablon: {repeated["template_origin"]})'
+        )
+    return '\n'.join(lines)
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@contextmanager
+def query_budget(max_queries, using=None, nplus1_threshold=None):
+    """
+    Pomocnik do testów: blok może wykonać najwyżej `max_queries` zapytań
+    i (opcjonalnie) żadnego kształtu `nplus1_threshold` lub więcej razy.
+
+        with query_budget(10, nplus1_threshold=3):
+            self.client.get(reverse('equipment:equipment_list'))
+
+    W teście async (AsyncClient) należy użyć `async with aquery_budget(...)`.
+    """
+    if _in_event_loop():
+        raise RuntimeError(
+            'query_budget w kodzie async nie widzi zapytań async ORM - użyj "async with aquery_budget(...)".'
+        )
+    with QueryRecorder(using=using) as recorder:
+        yield recorder
+    _check_budget(recorder, max_queries, nplus1_threshold)
+
+
+@asynccontextmanager
+async def aquery_budget(max_queries, using=None, nplus1_threshold=None):
+    """
+    Asynchroniczna wersja query_budget (testy z AsyncClient):
+
+        async with aquery_budget(10):
+            await self.async_client.get(reverse('equipment:equipment_list'))
+    """
+    async with QueryRecorder(using=using) as recorder:
+        yield recorder
+    _check_budget(recorder, max_queries, nplus1_threshold)
+
+
+def _check_budget(recorder, max_queries, nplus1_threshold):
+    if recorder.count > max_queries:
+        raise AssertionError(
+            f'Wykonano {recorder.count} zapytań, limit to {max_queries}:\n'
+            f'{format_queries(recorder, nplus1_threshold or DEFAULT_NPLUS1_THRESHOLD)}'
+        )
+    if nplus1_threshold and recorder.repeated_shapes(nplus1_threshold):
+        raise AssertionError(
+            f'Wykryto powtarzające się zapytania (N+1):\n'
+            f'{format_queries(recorder, nplus1_threshold)}'
+        )
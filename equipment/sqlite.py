@@ -0,0 +1,68 @@
+"""
+Produkcyjny profil SQLite (settings.SQLITE_PRODUCTION).
+
+Każde nowe połączenie SQLite dostaje pragmy z settings.SQLITE_PRAGMAS
+(sygnał connection_created), a transakcje zaczynają się od BEGIN IMMEDIATE
+(OPTIONS['transaction_mode'] w DATABASES). Zapis, który mimo to przekroczy
+busy_timeout, można ponowić dekoratorem retry_on_lock.
+"""
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger('equipment.sql')
+
+# Opóźnienie (s) przed pierwszym ponowieniem; kolejne są dwa razy dłuższe
+RETRY_DELAY = 0.05
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_PRODUCTION', False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(error):
+    """Błąd SQLite wynikający z blokady bazy (database is locked / table is locked)"""
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def retry_on_lock(func=None, *, using='default'):
+    """
+    Ponawia funkcję (z rosnącym opóźnieniem) po błędzie blokady bazy, najwyżej
+    settings.SQLITE_LOCK_RETRIES razy. Funkcja musi być całą transakcją - w
+    zewnętrznym atomic() błąd jest przekazywany dalej, bo wycofać i powtórzyć
+    trzeba całą zewnętrzną transakcję.
+
+        @retry_on_lock
+        def approve_transfers(transfer_ids, user):
+            with transaction.atomic():
+                ...
+    """
+    if func is None:
+        return functools.partial(retry_on_lock, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = connections[using]
+        retries = getattr(settings, 'SQLITE_LOCK_RETRIES', 0)
+        delay = RETRY_DELAY
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e) or connection.in_atomic_block or attempt == retries:
+                    raise
+                logger.warning('%s: baza zablokowana, ponowienie %d/%d', func.__qualname__, attempt + 1, retries)
+                time.sleep(delay)
+                delay *= 2
+    return wrapper
@@ -0,0 +1,179 @@
+"""
+Zmaterializowane statystyki sprzętu dla dashboardu.
+
+Tabela EquipmentStatistic przechowuje liczbę urządzeń i sumę cen zakupu
+dla każdej wartości statusu, typu, dostawcy i lokalizacji. Jest
+aktualizowana przyrostowo (sygnały Equipment oraz operacje masowe
+EquipmentQuerySet), a w całości przeliczana poleceniem
+`manage.py rebuild_equipment_stats`.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+
+STAT_DIMENSIONS = ('status', 'type', 'supplier', 'location')
+
+# Pola Equipment, których zmiana wpływa na statystyki
+TRACKED_FIELDS = frozenset(STAT_DIMENSIONS + ('purchase_price',))
+
+
+def _new_delta():
+    return [0, Decimal('0'), 0]
+
+
+def instance_deltas(values, sign=1):
+    """
+    Zmiany statystyk dla pojedynczego sprzętu.
+    `values` to słownik (lub obiekt Equipment) z wartościami śledzonych pól.
+    """
+    if not isinstance(values, dict):
+        values = {field: getattr(values, field) for field in TRACKED_FIELDS}
+    price = values.get('purchase_price')
+    deltas = defaultdict(_new_delta)
+    for dimension in STAT_DIMENSIONS:
+        delta = deltas[(dimension, values.get(dimension) or '')]
+        delta[0] += sign
+        if price is not None:
+            delta[1] += sign * Decimal(price)
+            delta[2] += sign
+    return deltas
+
+
+def collect_deltas(queryset):
+    """Statystyki dla querysetu sprzętu - jedno zapytanie GROUP BY na wymiar"""
+    deltas = defaultdict(_new_delta)
+    for dimension in STAT_DIMENSIONS:
+        rows = queryset.order_by().values(dimension).annotate(
+            equipment_count=Count('pk'),
+            price_total=Sum('purchase_price'),
+            priced_count=Count('purchase_price'),
+        )
+        for row in rows:
+            delta = deltas[(dimension, row[dimension] or '')]
+            delta[0] += row['equipment_count']
+            delta[1] += row['price_total'] or Decimal('0')
+            delta[2] += row['priced_count']
+    return deltas
+
+
+def merge_deltas(*parts, signs=None):
+    """Sumuje słowniki zmian z podanymi znakami (domyślnie +1)"""
+    merged = defaultdict(_new_delta)
+    signs = signs or [1] * len(parts)
+    for part, sign in zip(parts, signs):
+        for key, (count, total, priced) in part.items():
+            delta = merged[key]
+            delta[0] += sign * count
+            delta[1] += sign * total
+            delta[2] += sign * priced
+    return merged
+
+
+def apply_deltas(deltas, using=None):
+    """Nanosi zmiany na tabelę statystyk za pomocą UPDATE ... SET x = x + delta"""
+    from .models import EquipmentStatistic
+
+    manager = EquipmentStatistic.objects.db_manager(using)
+    with transaction.atomic(using=using):
+        for (dimension, value), (count, total, priced) in deltas.items():
+            if not (count or total or priced):
+                continue
+            changes = {
+                'equipment_count': F('equipment_count') + count,
+                'price_total': F('price_total') + total,
+                'priced_count': F('priced_count') + priced,
+            }
+            if manager.filter(dimension=dimension, value=value).update(**changes):
+                continue
+            try:
+                with transaction.atomic(using=using):
+                    manager.create(
+                        dimension=dimension, value=value, equipment_count=count,
+                        price_total=total, priced_count=priced,
+                    )
+            except IntegrityError:
+                # Wiersz utworzony równolegle przez inne żądanie
+                manager.filter(dimension=dimension, value=value).update(**changes)
+
+
+def rebuild_statistics(equipment_queryset=None, statistic_model=None):
+    """Przelicza całą tabelę statystyk od nowa. Zwraca liczbę wierszy."""
+    if equipment_queryset is None or statistic_model is None:
+        from .models import Equipment, EquipmentStatistic
+        equipment_queryset = Equipment.objects.all()
+        statistic_model = EquipmentStatistic
+
+    deltas = collect_deltas(equipment_queryset)
+    rows = [
+        statistic_model(
+            dimension=dimension, value=value, equipment_count=count,
+            price_total=total, priced_count=priced,
+        )
+        for (dimension, value), (count, total, priced) in deltas.items()
+    ]
+    with transaction.atomic():
+        statistic_model.objects.all().delete()
+        statistic_model.objects.bulk_create(rows)
+    return len(rows)
+
+
+def get_equipment_count(status=None):
+    """Liczba sprzętu (opcjonalnie o danym statusie) bez skanowania tabeli Equipment"""
+    from .models import EquipmentStatistic
+
+    rows = EquipmentStatistic.objects.filter(dimension='status')
+    if status:
+        rows = rows.filter(value=status)
+    return rows.aggregate(total=Sum('equipment_count'))['total'] or 0
+
+
+async def aget_equipment_count(status=None):
+    """Asynchroniczna wersja get_equipment_count"""
+    from .models import EquipmentStatistic
+
+    rows = EquipmentStatistic.objects.filter(dimension='status')
+    if status:
+        rows = rows.filter(value=status)
+    return (await rows.aaggregate(total=Sum('equipment_count')))['total'] or 0
+
+
+def get_inventory_summary(top=5):
+    """Dane dashboardu dla całej ewidencji odczytane z tabeli statystyk"""
+    from .models import EquipmentStatistic
+
+    stats = EquipmentStatistic.objects.filter(equipment_count__gt=0)
+
+    by_status = {
+        row['value']: row
+        for row in stats.filter(dimension='status').values(
+            'value', 'equipment_count', 'price_total', 'priced_count'
+        )
+    }
+    total_value = sum((row['price_total'] for row in by_status.values()), Decimal('0'))
+    priced_count = sum(row['priced_count'] for row in by_status.values())
+
+    def top_values(dimension, key):
+        rows = stats.filter(dimension=dimension).order_by('-equipment_count', 'value')
+        return [
+            {key: row['value'], 'count': row['equipment_count']}
+            for row in rows.values('value', 'equipment_count')[:top]
+        ]
+
+    def status_count(status):
+        row = by_status.get(status)
+        return row['equipment_count'] if row else 0
+
+    return {
+        'total_equipment': sum(row['equipment_count'] for row in by_status.values()),
+        'available_count': status_count('available'),
+        'in_use_count': status_count('in_use'),
+        'service_count': status_count('service'),
+        'retired_count': status_count('retired'),
+        'total_value': total_value,
+        'avg_value': total_value / priced_count if priced_count else 0,
+        'equipment_by_type': top_values('type', 'type'),
+        'equipment_by_supplier': top_values('supplier', 'supplier'),
+    }
@@ -0,0 +1,323 @@
+"""
+Deterministyczne dane syntetyczne w dużej skali (testy wydajności).
+
+Wiersze są dodawane przez bulk_create w partiach, hasło jest haszowane
+raz dla wszystkich użytkowników, a unikalność loginów i numerów
+seryjnych zapewniają zbiory w pamięci. Generator uzupełnia dane do
+zadanej liczby - ponowne uruchomienie z tymi samymi parametrami nic nie
+dodaje, a z większymi dopisuje tylko brakujące wiersze.
+
+Daty (zakupu, gwarancji, przekazań, konserwacji) są liczone względem dnia
+odniesienia `today` (domyślnie bieżąca data) - te same ziarno i dzień
+odniesienia dają identyczne dane niezależnie od dnia uruchomienia.
+"""
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Equipment, EquipmentAssignment, EquipmentTransfer, MaintenanceSchedule
+
+
+BATCH_SIZE = 5000
+
+# Hasło wszystkich wygenerowanych użytkowników
+SYNTHETIC_PASSWORD = 'password123'
+
+SERIAL_PREFIX = 'SYN'
+
+FIRST_NAMES = [
+    "Adam", "Adrian", "Agnieszka", "Aleksander", "Alicja", "Anna", "Bartosz", "Beata",
+    "Dariusz", "Dorota", "Eryk", "Ewa", "Filip", "Grzegorz", "Iwona", "Jakub",
+    "Jan", "Joanna", "Kamil", "Karolina", "Krzysztof", "Łukasz", "Magdalena", "Marcin",
+    "Marek", "Mariusz", "Michał", "Monika", "Paweł", "Piotr", "Rafał", "Renata",
+    "Robert", "Sebastian", "Sylwia", "Tomasz", "Urszula", "Wojciech", "Zbigniew", "Żaneta",
+]
+
+LAST_NAMES = [
+    "Wilk", "Nowak", "Kowalski", "Wiśniewski", "Dąbrowski", "Lewandowski", "Wójcik",
+    "Kamiński", "Kowalczyk", "Zieliński", "Szymański", "Woźniak", "Kozłowski", "Jankowski",
+    "Mazur", "Kwiatkowski", "Krawczyk", "Piotrowski", "Grabowski", "Nowakowski", "Pawłowski",
+    "Michalski", "Król", "Nowicki", "Wieczorek", "Wróbel", "Jabłoński", "Majewski",
+    "Olszewski", "Stępień", "Malinowski", "Jaworski", "Adamczyk", "Dudek", "Pietrzak",
+]
+
+# Typ sprzętu: (modele, waga losowania, zakres ceny, dni gwarancji, opis)
+EQUIPMENT_TYPES = {
+    'Komputer stacjonarny': (
+        [
+            "Dell OptiPlex 3060", "Dell OptiPlex 3070", "Dell OptiPlex 3080", "Dell OptiPlex 3090",
+            "Dell OptiPlex 7090", "HP EliteDesk 800 G6", "HP EliteDesk 800 G7", "HP ProDesk 400 G6",
+            "HP ProDesk 400 G7", "Lenovo ThinkCentre M720", "Lenovo ThinkCentre M920",
+            "Lenovo ThinkCentre M930", "ASUS ExpertCenter D7", "ASUS ExpertCenter D5", "Acer Veriton N4660G",
+        ],
+        30, (2000, 8000), 1095, 'Komputer biurowy',
+    ),
+    'Laptop': (
+        [
+            "ASUS ExpertBook B9", "ASUS ExpertBook B7", "ASUS VivoBook S15", "Dell Latitude 5420",
+            "Dell Latitude 5520", "Dell Latitude 7420", "Dell Latitude 7520", "HP EliteBook 840 G8",
+            "HP EliteBook 850 G8", "HP ProBook 450 G8", "HP ProBook 470 G8", "Lenovo ThinkPad E14",
+            "Lenovo ThinkPad E15", "Lenovo ThinkPad T14", "Lenovo ThinkPad T15", "Lenovo ThinkPad X1 Carbon",
+            "Acer TravelMate P2", "Acer TravelMate P6", "Acer Swift 3", "Acer Aspire 5",
+        ],
+        25, (3000, 12000), 1095, 'Laptop służbowy',
+    ),
+    'Monitor': (
+        [
+            "Dell UltraSharp U2720Q", "Dell UltraSharp U2720D", "Dell UltraSharp U2422H",
+            "Dell UltraSharp U2422HE", "Dell P2419H", "Dell P2720D", "HP EliteDisplay E243",
+            "HP EliteDisplay E273q", "HP EliteDisplay E244c", "HP Z27n G2", "Lenovo ThinkVision T24i-20",
+            "Lenovo ThinkVision T27i-20", "Lenovo ThinkVision P27h-20", "ASUS ProArt PA248QV",
+            "ASUS ProArt PA278QV", "ASUS VG248QE", "ASUS VG279Q", "Acer Nitro VG240Y",
+            "Acer Predator XB271HU", "Acer CB242Y",
+        ],
+        35, (800, 3000), 1095, 'Monitor',
+    ),
+    'Telefon komórkowy': (
+        [
+            "Samsung Galaxy S21", "Samsung Galaxy S22", "Samsung Galaxy S23", "Samsung Galaxy A52",
+            "Samsung Galaxy A53", "Samsung Galaxy A73", "iPhone 12", "iPhone 13", "iPhone 14", "iPhone 15",
+            "iPhone SE (3rd gen)", "Google Pixel 6", "Google Pixel 7", "Google Pixel 8", "OnePlus 9",
+            "OnePlus 10", "OnePlus 11", "Xiaomi Mi 11", "Xiaomi Mi 12", "Xiaomi Redmi Note 11",
+            "Huawei P50", "Huawei P60", "Motorola Edge 30", "Motorola Edge 40", "Sony Xperia 1 III",
+            "Sony Xperia 5 III",
+        ],
+        30, (1500, 6000), 730, 'Telefon służbowy',
+    ),
+}
+TYPE_NAMES = list(EQUIPMENT_TYPES)
+TYPE_WEIGHTS = [EQUIPMENT_TYPES[name][1] for name in TYPE_NAMES]
+
+LOCATIONS = [
+    "Biuro - Warszawa", "Biuro - Kraków", "Biuro - Gdańsk", "Biuro - Wrocław", "Biuro - Poznań",
+    "Magazyn główny", "Siedziba centrala", "Oddział południe", "Oddział północ", "Serwis zewnętrzny",
+]
+
+SUPPLIERS = [
+    "Dell Technologies", "HP Inc.", "Lenovo", "ASUS", "Acer", "Samsung", "Apple", "Google",
+    "OnePlus", "Xiaomi", "Huawei", "Motorola", "Sony", "Komputronik", "Morele.net", "X-kom",
+    "Media Expert",
+]
+
+STATUSES = ['available', 'in_use', 'service', 'retired']
+STATUS_WEIGHTS = [40, 45, 10, 5]
+
+TRANSFER_REASONS = [
+    "Nowy pracownik", "Wymiana sprzętu", "Zmiana stanowiska", "Przeprowadzka działu",
+    "Naprawa gwarancyjna", "Zwrot sprzętu", "",
+]
+
+MAINTENANCE_DESCRIPTIONS = {
+    'preventive': "Okresowy przegląd stanu technicznego",
+    'repair': "Naprawa usterki zgłoszonej przez użytkownika",
+    'cleaning': "Czyszczenie wnętrza i wymiana pasty termoprzewodzącej",
+    'update': "Aktualizacja oprogramowania układowego i systemu",
+    'inspection': "Kontrola zgodności z ewidencją",
+}
+
+TECHNICIANS = ["Serwis wewnętrzny IT", "Serwis producenta", "Komputronik Serwis", "X-kom Serwis"]
+
+
+def _rng(seed, kind, start):
+    # Osobny generator dla każdej partii - wynik nie zależy od wcześniejszych uruchomień
+    return random.Random(f'{seed}:{kind}:{start}')
+
+
+def _reference_day(today):
+    return today or timezone.localdate()
+
+
+def _batches(start, stop, batch_size=BATCH_SIZE):
+    for batch_start in range(start, stop, batch_size):
+        yield batch_start, min(stop, batch_start + batch_size)
+
+
+def generate_users(count, seed=0, progress=None):
+    """Uzupełnia liczbę użytkowników do `count`. Zwraca liczbę dodanych."""
+    existing = User.objects.count()
+    if existing >= count:
+        return 0
+
+    password = make_password(SYNTHETIC_PASSWORD)
+    usernames = set(User.objects.values_list('username', flat=True))
+    # Kolejny numer dla każdego loginu bazowego - bez sprawdzania od 1 za każdym razem
+    next_suffix = {}
+    created = 0
+    for start, stop in _batches(existing, count):
+        rng = _rng(seed, 'users', start)
+        users = []
+        for _ in range(start, stop):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            base = f'{first_name}.{last_name}'.lower()
+            username = base
+            while username in usernames:
+                suffix = next_suffix.get(base, 1)
+                next_suffix[base] = suffix + 1
+                username = f'{base}{suffix}'
+            usernames.add(username)
+            users.append(User(
+                username=username,
+                email=f'{username}@asset-test.pl',
+                first_name=first_name,
+                last_name=last_name,
+                password=password,
+            ))
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        created += len(users)
+        if progress:
+            progress('users', existing + created, count)
+    return created
+
+
+def generate_equipment(count, seed=0, progress=None, today=None):
+    """Uzupełnia liczbę sprzętu do `count`. Zwraca liczbę dodanych."""
+    existing = Equipment.objects.count()
+    if existing >= count:
+        return 0
+
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    next_serial = Equipment.objects.filter(serial_number__startswith=f'{SERIAL_PREFIX}-').count()
+    today = _reference_day(today)
+    created = 0
+    for start, stop in _batches(existing, count):
+        rng = _rng(seed, 'equipment', start)
+        items = []
+        for _ in range(start, stop):
+            equipment_type = rng.choices(TYPE_NAMES, weights=TYPE_WEIGHTS)[0]
+            model_names, _, (min_price, max_price), warranty_days, description = EQUIPMENT_TYPES[equipment_type]
+            name = rng.choice(model_names)
+            purchase_date = today - timedelta(days=rng.randint(30, 1000))
+            status = rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+            items.append(Equipment(
+                name=name,
+                type=equipment_type,
+                serial_number=f'{SERIAL_PREFIX}-{next_serial:09d}',
+                invoice_number=f'FV/{purchase_date.year}/{rng.randint(1000, 99999)}',
+                purchase_date=purchase_date,
+                purchase_price=Decimal(rng.randint(min_price, max_price)),
+                location=rng.choice(LOCATIONS),
+                supplier=rng.choice(SUPPLIERS),
+                warranty_end_date=purchase_date + timedelta(days=warranty_days),
+                status=status,
+                assigned_to_id=rng.choice(user_ids) if status == 'in_use' and user_ids else None,
+                notes=f'{description} - {name}',
+            ))
+            next_serial += 1
+        Equipment.objects.bulk_create(items, batch_size=BATCH_SIZE)
+        created += len(items)
+        if progress:
+            progress('equipment', existing + created, count)
+    return created
+
+
+def generate_transfers(count, seed=0, progress=None, today=None):
+    """
+    Uzupełnia liczbę przekazań do `count` (w większości zaakceptowanych,
+    z wpisami osi czasu przypisań). Zwraca liczbę dodanych.
+    """
+    existing = EquipmentTransfer.objects.count()
+    if existing >= count:
+        return 0
+
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    equipment_ids = list(Equipment.objects.values_list('pk', flat=True))
+    if not (user_ids and equipment_ids):
+        return 0
+
+    # Początek dnia odniesienia - wszystkie przekazania są wcześniejsze
+    now = timezone.make_aware(datetime.combine(_reference_day(today), time.min))
+    created = 0
+    for start, stop in _batches(existing, count):
+        rng = _rng(seed, 'transfers', start)
+        transfers = []
+        for _ in range(start, stop):
+            transfer_date = now - timedelta(minutes=rng.randint(60, 3 * 365 * 24 * 60))
+            status = rng.choices(['approved', 'pending', 'rejected'], weights=[85, 10, 5])[0]
+            to_user_id = rng.choice(user_ids)
+            transfers.append(EquipmentTransfer(
+                equipment_id=rng.choice(equipment_ids),
+                from_user_id=rng.choice(user_ids) if rng.random() < 0.7 else None,
+                to_user_id=to_user_id,
+                transfer_date=transfer_date,
+                reason=rng.choice(TRANSFER_REASONS),
+                transferred_by_id=rng.choice(user_ids),
+                approval_status=status,
+                approved_at=transfer_date + timedelta(hours=rng.randint(1, 72)) if status != 'pending' else None,
+                approved_by_id=to_user_id if status != 'pending' else None,
+            ))
+        with transaction.atomic():
+            transfers = EquipmentTransfer.objects.bulk_create(transfers, batch_size=BATCH_SIZE)
+            EquipmentAssignment.objects.bulk_create(
+                [
+                    EquipmentAssignment(
+                        equipment_id=transfer.equipment_id,
+                        user_id=transfer.to_user_id,
+                        transfer_id=transfer.pk,
+                        started_at=transfer.approved_at,
+                    )
+                    for transfer in transfers
+                    if transfer.approval_status == 'approved'
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        created += len(transfers)
+        if progress:
+            progress('transfers', existing + created, count)
+    return created
+
+
+def generate_maintenance(count, seed=0, progress=None, today=None):
+    """Uzupełnia liczbę wpisów harmonogramu konserwacji do `count`. Zwraca liczbę dodanych."""
+    existing = MaintenanceSchedule.objects.count()
+    if existing >= count:
+        return 0
+
+    equipment_ids = list(Equipment.objects.values_list('pk', flat=True))
+    if not equipment_ids:
+        return 0
+
+    maintenance_types = [value for value, _ in MaintenanceSchedule.MAINTENANCE_TYPES]
+    today = _reference_day(today)
+    created = 0
+    for start, stop in _batches(existing, count):
+        rng = _rng(seed, 'maintenance', start)
+        entries = []
+        for _ in range(start, stop):
+            maintenance_type = rng.choice(maintenance_types)
+            scheduled_date = today + timedelta(days=rng.randint(-730, 180))
+            is_completed = scheduled_date < today and rng.random() < 0.9
+            entries.append(MaintenanceSchedule(
+                equipment_id=rng.choice(equipment_ids),
+                maintenance_type=maintenance_type,
+                scheduled_date=scheduled_date,
+                completed_date=scheduled_date + timedelta(days=rng.randint(0, 14)) if is_completed else None,
+                description=MAINTENANCE_DESCRIPTIONS[maintenance_type],
+                cost=Decimal(rng.randint(50, 1500)) if rng.random() < 0.6 else None,
+                technician=rng.choice(TECHNICIANS),
+                is_completed=is_completed,
+            ))
+        MaintenanceSchedule.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        created += len(entries)
+        if progress:
+            progress('maintenance', existing + created, count)
+    return created
+
+
+def ensure_dataset(users=0, equipment=0, transfers=0, maintenance=0, seed=0, progress=None, today=None):
+    """
+    Uzupełnia dane do zadanej skali. `today` - dzień odniesienia dat
+    (domyślnie bieżąca data). Zwraca słownik liczby dodanych wierszy.
+    """
+    today = _reference_day(today)
+    return {
+        'users': generate_users(users, seed, progress),
+        'equipment': generate_equipment(equipment, seed, progress, today),
+        'transfers': generate_transfers(transfers, seed, progress, today),
+        'maintenance': generate_maintenance(maintenance, seed, progress, today),
+    }
@@ -1,3 +1,168 @@
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import CANCELLED_REASON, Equipment, EquipmentAssignment, EquipmentTransfer
+from .roles import IT_GROUP_NAME
+from .sql_instrumentation import aquery_budget, query_budget
+
+
+# Próg N+1 w testach: kształt zapytania wykonany tyle razy na żądanie to błąd
+NPLUS1_THRESHOLD = 3
+
+
+class ViewQueryBudgetTests(TestCase):
+    """Limity zapytań SQL najczęściej używanych widoków (zimny cache)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.it_user = User.objects.create_user('it', password='test', first_name='Anna', last_name='IT')
+        cls.it_user.groups.add(Group.objects.create(name=IT_GROUP_NAME))
+        cls.regular_user = User.objects.create_user('user', password='test', first_name='Jan', last_name='Kowalski')
+        other_user = User.objects.create_user('other', password='test')
+
+        equipment = []
+        for i in range(20):
+            equipment.append(Equipment.objects.create(
+                name=f'Laptop {i}', type='Laptop', serial_number=f'SN-{i:04}',
+                purchase_date=date(2024, 1, 1), location='Biuro',
+                warranty_end_date=date(2025, 1, 1) if i % 2 else None,
+                status='in_use' if i % 4 else 'service',
+                assigned_to=cls.regular_user if i % 4 else None,
+            ))
+        cls.equipment = equipment[1]
+        for item in equipment:
+            for to_user in (cls.regular_user, other_user):
+                EquipmentTransfer.objects.create(
+                    equipment=item, from_user=cls.it_user, to_user=to_user,
+                    transferred_by=cls.it_user, reason='Test',
+                )
+
+    def setUp(self):
+        # Pomiar bez kontekstu dashboardu i ról zapisanych przez poprzedni test
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def assertBudget(self, user, url, max_queries):
+        self.client.force_login(user)
+        with query_budget(max_queries, nplus1_threshold=NPLUS1_THRESHOLD) as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(recorder.count, 0)
+
+    def test_dashboard_it(self):
+        self.assertBudget(self.it_user, reverse('equipment:dashboard'), 9)
+
+    def test_dashboard_regular_user(self):
+        self.assertBudget(self.regular_user, reverse('equipment:dashboard'), 7)
+
+    def test_equipment_list_it(self):
+        self.assertBudget(self.it_user, reverse('equipment:equipment_list'), 5)
+
+    def test_equipment_list_regular_user(self):
+        self.assertBudget(self.regular_user, reverse('equipment:equipment_list'), 4)
+
+    def test_equipment_detail_it(self):
+        self.assertBudget(self.it_user, reverse('equipment:equipment_detail', args=[self.equipment.pk]), 7)
+
+    def test_equipment_detail_regular_user(self):
+        self.assertBudget(self.regular_user, reverse('equipment:equipment_detail', args=[self.equipment.pk]), 8)
+
+    async def test_equipment_list_async_client(self):
+        await self.async_client.aforce_login(self.it_user)
+        async with aquery_budget(5, nplus1_threshold=NPLUS1_THRESHOLD) as recorder:
+            response = await self.async_client.get(reverse('equipment:equipment_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(recorder.count, 0)
+
+
+class EquipmentTransferDecisionTests(TestCase):
+    """Akceptacja i odrzucenie przekazania - warunkowy UPDATE"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.it_user = User.objects.create_user('it', password='test')
+        cls.first_user = User.objects.create_user('first', password='test')
+        cls.second_user = User.objects.create_user('second', password='test')
+        cls.equipment = Equipment.objects.create(
+            name='Laptop', type='Laptop', serial_number='SN-0001',
+            purchase_date=date(2024, 1, 1), location='Biuro',
+        )
+
+    def create_transfer(self, to_user):
+        return EquipmentTransfer.objects.create(
+            equipment=self.equipment, to_user=to_user, transferred_by=self.it_user, reason='Test',
+        )
+
+    def test_approve_assigns_equipment_and_cancels_other_pending(self):
+        transfer = self.create_transfer(self.first_user)
+        competing = self.create_transfer(self.second_user)
+
+        self.assertTrue(transfer.approve(self.first_user))
+
+        transfer.refresh_from_db()
+        competing.refresh_from_db()
+        self.equipment.refresh_from_db()
+        self.assertEqual(transfer.approval_status, 'approved')
+        self.assertEqual(transfer.approved_by, self.first_user)
+        self.assertEqual(competing.approval_status, 'cancelled')
+        self.assertEqual(competing.rejection_reason, CANCELLED_REASON)
+        self.assertEqual(self.equipment.assigned_to, self.first_user)
+        self.assertEqual(self.equipment.status, 'in_use')
+        assignments = EquipmentAssignment.objects.filter(equipment=self.equipment)
+        self.assertEqual(assignments.count(), 1)
+        self.assertEqual(assignments.get().transfer, transfer)
+
+    def test_second_approve_returns_false_and_changes_nothing(self):
+        transfer = self.create_transfer(self.first_user)
+        # Równoległe żądanie - kopia pobrana, gdy przekazanie jeszcze oczekiwało
+        stale = EquipmentTransfer.objects.get(pk=transfer.pk)
+        self.assertTrue(transfer.approve(self.first_user))
+        transfer.refresh_from_db()
+        approved_at = transfer.approved_at
+
+        self.assertFalse(stale.approve(self.second_user))
+        self.assertFalse(stale.reject(self.second_user, 'Za późno'))
+
+        transfer.refresh_from_db()
+        self.equipment.refresh_from_db()
+        self.assertEqual(transfer.approval_status, 'approved')
+        self.assertEqual(transfer.approved_by, self.first_user)
+        self.assertEqual(transfer.approved_at, approved_at)
+        self.assertEqual(transfer.rejection_reason, '')
+        self.assertEqual(self.equipment.assigned_to, self.first_user)
+        self.assertEqual(EquipmentAssignment.objects.filter(equipment=self.equipment).count(), 1)
+
+    def test_cancelled_transfer_cannot_be_approved(self):
+        transfer = self.create_transfer(self.first_user)
+        competing = self.create_transfer(self.second_user)
+        self.assertTrue(transfer.approve(self.first_user))
+
+        self.assertFalse(competing.approve(self.second_user))
+
+        competing.refresh_from_db()
+        self.equipment.refresh_from_db()
+        self.assertEqual(competing.approval_status, 'cancelled')
+        self.assertEqual(self.equipment.assigned_to, self.first_user)
+        self.assertEqual(EquipmentAssignment.objects.filter(equipment=self.equipment).count(), 1)
+
+    def test_reject_keeps_equipment_and_second_reject_returns_false(self):
+        transfer = self.create_transfer(self.first_user)
+        other = self.create_transfer(self.second_user)
+
+        self.assertTrue(transfer.reject(self.first_user, 'Nie potrzebuję'))
+        self.assertFalse(transfer.reject(self.first_user, 'Drugi raz'))
+        self.assertFalse(transfer.approve(self.first_user))
 
-# Create your tests here.
+        transfer.refresh_from_db()
+        other.refresh_from_db()
+        self.equipment.refresh_from_db()
+        self.assertEqual(transfer.approval_status, 'rejected')
+        self.assertEqual(transfer.rejection_reason, 'Nie potrzebuję')
+        self.assertEqual(other.approval_status, 'pending')
+        self.assertIsNone(self.equipment.assigned_to)
+        self.assertFalse(EquipmentAssignment.objects.exists())
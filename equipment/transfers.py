@@ -0,0 +1,108 @@
+"""
+Masowe operacje na przekazaniach sprzętu.
+
+Każda operacja to jedna transakcja złożona z kilku poleceń działających
+na zbiorach wierszy (bulk_create, UPDATE ... WHERE pk IN) - liczba
+zapytań nie zależy od liczby zaznaczonych pozycji. UPDATE na
+EquipmentTransfer nie wysyła sygnałów, dlatego cache dashboardu jest
+unieważniany jawnie. Transakcja przerwana blokadą SQLite jest ponawiana.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate_dashboard
+from .models import Equipment, EquipmentAssignment, EquipmentTransfer
+from .sqlite import retry_on_lock
+
+
+@retry_on_lock
+def create_transfers(equipment_ids, to_user, transferred_by, reason=''):
+    """
+    Tworzy oczekujące przekazania wskazanego sprzętu do `to_user`.
+    Pomija sprzęt, którego nie można przekazać, i ten już przypisany
+    odbiorcy. Zwraca listę utworzonych przekazań.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        equipment_rows = (
+            Equipment.objects.filter(pk__in=equipment_ids, status__in=['available', 'in_use'])
+            .exclude(assigned_to=to_user)
+            .values_list('pk', 'assigned_to_id')
+        )
+        transfers = EquipmentTransfer.objects.bulk_create([
+            EquipmentTransfer(
+                equipment_id=equipment_id,
+                from_user_id=assigned_to_id,
+                to_user=to_user,
+                transferred_by=transferred_by,
+                transfer_date=now,
+                reason=reason,
+                approval_status='pending',
+            )
+            for equipment_id, assigned_to_id in equipment_rows
+        ])
+        if transfers:
+            invalidate_dashboard()
+    return transfers
+
+
+@retry_on_lock
+def approve_transfers(transfer_ids, user):
+    """
+    Akceptuje oczekujące przekazania do `user`. Przy kilku przekazaniach
+    tego samego sprzętu akceptowane jest najnowsze, a pozostałe
+    oczekujące przekazania tego sprzętu są anulowane. Zwraca liczbę
+    zaakceptowanych przekazań.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = (
+            EquipmentTransfer.objects.select_for_update()
+            .filter(pk__in=transfer_ids, to_user=user, approval_status='pending')
+            .order_by('equipment_id', '-transfer_date', '-pk')
+            .values_list('pk', 'equipment_id')
+        )
+        winners = {}
+        for transfer_id, equipment_id in pending:
+            winners.setdefault(equipment_id, transfer_id)
+        if not winners:
+            return 0
+
+        updated = EquipmentTransfer.objects.filter(
+            pk__in=winners.values(), approval_status='pending',
+        ).update(approval_status='approved', approved_at=now, approved_by=user)
+        if updated != len(winners):
+            # Część przekazań rozpatrzono w międzyczasie - zostają tylko te zaakceptowane tutaj
+            winners = dict(
+                EquipmentTransfer.objects.filter(
+                    pk__in=winners.values(), approval_status='approved', approved_at=now, approved_by=user,
+                ).values_list('equipment_id', 'pk')
+            )
+            if not winners:
+                return 0
+
+        EquipmentTransfer.cancel_pending_for(winners.keys(), now)
+        Equipment.objects.filter(pk__in=winners.keys()).update(
+            assigned_to=user, status='in_use', updated_at=now,
+        )
+        EquipmentAssignment.objects.bulk_create([
+            EquipmentAssignment(equipment_id=equipment_id, user=user, transfer_id=transfer_id, started_at=now)
+            for equipment_id, transfer_id in winners.items()
+        ])
+        invalidate_dashboard()
+    return len(winners)
+
+
+@retry_on_lock
+def reject_transfers(transfer_ids, user, reason=''):
+    """Odrzuca oczekujące przekazania do `user`. Zwraca liczbę odrzuconych."""
+    with transaction.atomic():
+        rejected = EquipmentTransfer.objects.filter(
+            pk__in=transfer_ids, to_user=user, approval_status='pending',
+        ).update(
+            approval_status='rejected', rejection_reason=reason,
+            approved_at=timezone.now(), approved_by=user,
+        )
+        if rejected:
+            invalidate_dashboard()
+    return rejected
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'equipment'
 
@@ -10,13 +10,32 @@ urlpatterns = [
     path('equipment/', views.equipment_list, name='equipment_list'),
     path('my/', views.my_equipment, name='my_equipment'),
     path('create/', views.equipment_create, name='equipment_create'),
+    path('import/', views.equipment_import, name='equipment_import'),
+    path('import/<int:import_id>/', views.equipment_import_detail, name='equipment_import_detail'),
+    path('import/<int:import_id>/errors.csv', views.equipment_import_errors, name='equipment_import_errors'),
     path('<int:pk>/', views.equipment_detail, name='equipment_detail'),
     path('<int:pk>/edit/', views.equipment_update, name='equipment_update'),
     path('<int:pk>/delete/', views.equipment_delete, name='equipment_delete'),
+    path('<int:pk>/qr.<str:fmt>', views.equipment_qr, name='equipment_qr'),
     path('<int:pk>/transfer/', views.equipment_transfer, name='equipment_transfer'),
+    path('transfer/bulk/', views.equipment_bulk_transfer, name='equipment_bulk_transfer'),
     path('pending-transfers/', views.pending_transfers, name='pending_transfers'),
     path('approve-transfer/<int:transfer_id>/', views.approve_transfer, name='approve_transfer'),
     path('transfer-protocol/<int:transfer_id>/', views.transfer_protocol, name='transfer_protocol'),
+    path('transfer-protocols/', views.transfer_protocols_batch, name='transfer_protocols_batch'),
     path('export/equipment/', views.export_equipment_excel, name='export_equipment_excel'),
     path('export/transfers/', views.export_transfers_excel, name='export_transfers_excel'),
+    path('export/equipment.csv', views.export_equipment_csv, name='export_equipment_csv'),
+    path('export/equipment.ndjson', views.export_equipment_ndjson, name='export_equipment_ndjson'),
+    path('export-jobs/', views.export_job_create, name='export_job_create'),
+    path('export-jobs/<int:job_id>/', views.export_job_detail, name='export_job_detail'),
+    path('export-jobs/<int:job_id>/status/', views.export_job_status, name='export_job_status'),
+    path('export-jobs/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    path('api/equipment/', api.equipment_collection, name='api_equipment_list'),
+    path('api/equipment/<int:pk>/', api.equipment_item, name='api_equipment_detail'),
+    path('api/transfers/', api.transfer_collection, name='api_transfer_list'),
+    path('api/transfers/<int:pk>/', api.transfer_item, name='api_transfer_detail'),
+    path('api/maintenance/', api.maintenance_collection, name='api_maintenance_list'),
+    path('api/maintenance/<int:pk>/', api.maintenance_item, name='api_maintenance_detail'),
+    path('api/scan/', api.scan_lookup, name='api_scan'),
 ] 
\ No newline at end of file
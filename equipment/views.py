@@ -1,23 +1,54 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, aget_object_or_404, get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Count, Q
 from django.utils import timezone
-from django.http import HttpResponse, Http404
+from django.http import FileResponse, HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+import asyncio
+import os
+import tempfile
+import uuid
 from datetime import datetime, timedelta
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from .models import Equipment, EquipmentTransfer
-from .forms import EquipmentForm, EquipmentTransferForm, CustomLoginForm, EquipmentTransferApprovalForm
+from .models import Equipment, EquipmentImport, EquipmentTransfer, ExportJob
+from .forms import (
+    EquipmentForm, EquipmentImportUploadForm, EquipmentTransferForm, CustomLoginForm,
+    EquipmentTransferApprovalForm,
+)
 from .decorators import it_staff_required, can_access_equipment, get_user_equipment_queryset, can_transfer_equipment
+from .roles import aresolve_request_user
+from .stats import aget_equipment_count, get_inventory_summary
+from .pagination import CursorPaginator, aget_paginator_page
+from .exports import (
+    XLSX_CONTENT_TYPE, equipment_values, iter_csv, iter_ndjson, spooled_export,
+    write_equipment_xlsx, write_transfers_xlsx,
+)
+from .caching import aget_or_build_dashboard_context
+from .search import search_equipment
+from .filters import EQUIPMENT_FILTER_PARAMS, filter_equipment
+from .export_jobs import download_filename
+from .transfers import approve_transfers, create_transfers, reject_transfers
+from .imports import IMPORT_FIELDS, REQUIRED_FIELDS, EquipmentImporter, ImportFileError
+from .protocols import (
+    PROTOCOL_BATCH_LIMIT, PROTOCOL_FILTER_PARAMS, filter_protocol_transfers, get_protocol_pdf,
+    protocol_data, protocol_filename, protocol_generated_at, protocol_hash,
+    protocol_transfers_queryset, write_protocols_pdf, write_protocols_zip,
+)
+from .qr import QR_CACHE_MAX_AGE, QR_FORMATS, clamp_qr_size, equipment_qr_url, get_qr_image, qr_cache_key
+
+
+TRANSFER_HISTORY_PER_PAGE = 10
+
+# Najwięcej sprzętów w jednym przekazaniu zbiorczym
+BULK_TRANSFER_LIMIT = 500
 
 
 def custom_login(request):
@@ -56,134 +87,107 @@ def custom_logout(request):
 
 @login_required
 @can_access_equipment
-def dashboard(request):
+async def dashboard(request):
     """Dashboard z analityką sprzętu"""
+    roles = await aresolve_request_user(request)
+    context = await aget_or_build_dashboard_context(
+        request.user, roles.is_it_staff,
+        lambda: _build_dashboard_context(request.user, roles.is_it_staff),
+    )
+    return render(request, 'equipment/dashboard.html', context)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _build_dashboard_context(user, is_it_staff):
+    """
+    Buduje kontekst dashboardu (wszystkie querysety są wyliczane, bo trafia do cache).
+    Niezależne zapytania są wykonywane razem przez asyncio.gather.
+    """
     # Pobierz sprzęt dostępny dla użytkownika
-    equipment_list = get_user_equipment_queryset(request.user)
-    
-    # Statystyki podstawowe
-    total_equipment = equipment_list.count()
-    available_count = equipment_list.filter(status='available').count()
-    in_use_count = equipment_list.filter(status='in_use').count()
-    service_count = equipment_list.filter(status='service').count()
-    retired_count = equipment_list.filter(status='retired').count()
-    
-    # Statystyki finansowe (tylko dla IT/admin)
-    total_value = 0
-    avg_value = 0
-    if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
-        total_value = equipment_list.aggregate(
-            total=Sum('purchase_price')
-        )['total'] or 0
-        avg_value = equipment_list.aggregate(
-            avg=Avg('purchase_price')
-        )['avg'] or 0
-    
-    # Statystyki po typach sprzętu
-    equipment_by_type = equipment_list.values('type').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # Statystyki po dostawcach
-    equipment_by_supplier = equipment_list.values('supplier').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-    
-    # Alerty gwarancyjne (tylko dla IT/admin)
-    warranty_alerts = []
-    if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
-        # Sprzęt z gwarancją kończącą się w ciągu 30 dni
-        thirty_days_from_now = timezone.now().date() + timedelta(days=30)
-        warranty_alerts = equipment_list.filter(
-            warranty_end_date__lte=thirty_days_from_now,
-            warranty_end_date__gte=timezone.now().date()
-        ).order_by('warranty_end_date')[:10]
-    
-    # Ostatnie transfery (tylko dla IT/admin)
-    recent_transfers = []
-    if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
-        recent_transfers = EquipmentTransfer.objects.select_related(
-            'equipment', 'from_user', 'to_user', 'transferred_by'
-        ).order_by('-transfer_date')[:5]
-    
+    equipment_list = get_user_equipment_queryset(user)
+
     # Sprzęt w serwisie (długo)
-    long_service = equipment_list.filter(status='service').order_by('updated_at')[:5]
-    
-    context = {
-        'total_equipment': total_equipment,
-        'available_count': available_count,
-        'in_use_count': in_use_count,
-        'service_count': service_count,
-        'retired_count': retired_count,
-        'total_value': total_value,
-        'avg_value': avg_value,
-        'equipment_by_type': equipment_by_type,
-        'equipment_by_supplier': equipment_by_supplier,
-        'warranty_alerts': warranty_alerts,
-        'recent_transfers': recent_transfers,
-        'long_service': long_service,
-        'is_it_staff': request.user.is_superuser or request.user.groups.filter(name='IT').exists(),
+    queries = {
+        'long_service': _alist(equipment_list.filter(status='service').order_by('updated_at')[:5]),
+    }
+
+    if is_it_staff:
+        # IT widzi całą ewidencję - statystyki z tabeli zmaterializowanej
+        queries['summary'] = sync_to_async(get_inventory_summary)()
+        # Alerty gwarancyjne - sprzęt z gwarancją kończącą się w ciągu 30 dni
+        today = timezone.now().date()
+        queries['warranty_alerts'] = _alist(equipment_list.filter(
+            warranty_end_date__lte=today + timedelta(days=30),
+            warranty_end_date__gte=today,
+        ).order_by('warranty_end_date')[:10])
+        # Ostatnie transfery
+        queries['recent_transfers'] = _alist(EquipmentTransfer.objects.select_related(
+            'equipment', 'from_user', 'to_user', 'transferred_by'
+        ).order_by('-transfer_date')[:5])
+    else:
+        # Zwykły użytkownik - kilka przypisanych urządzeń, liczymy na bieżąco (jedno zapytanie)
+        queries['counts'] = equipment_list.aaggregate(
+            total_equipment=Count('id'),
+            available_count=Count('id', filter=Q(status='available')),
+            in_use_count=Count('id', filter=Q(status='in_use')),
+            service_count=Count('id', filter=Q(status='service')),
+            retired_count=Count('id', filter=Q(status='retired')),
+        )
+        queries['equipment_by_type'] = _alist(
+            equipment_list.values('type').annotate(count=Count('id')).order_by('-count')[:5]
+        )
+        queries['equipment_by_supplier'] = _alist(
+            equipment_list.values('supplier').annotate(count=Count('id')).order_by('-count')[:5]
+        )
+
+    results = dict(zip(queries, await asyncio.gather(*queries.values())))
+
+    if is_it_staff:
+        summary = results['summary']
+    else:
+        summary = {
+            **results['counts'],
+            # Statystyki finansowe tylko dla IT/admin
+            'total_value': 0,
+            'avg_value': 0,
+            'equipment_by_type': results['equipment_by_type'],
+            'equipment_by_supplier': results['equipment_by_supplier'],
+        }
+
+    return {
+        **summary,
+        'warranty_alerts': results.get('warranty_alerts', []),
+        'recent_transfers': results.get('recent_transfers', []),
+        'long_service': results['long_service'],
+        'is_it_staff': is_it_staff,
     }
-    
-    return render(request, 'equipment/dashboard.html', context)
 
 
 @login_required
-def equipment_list(request):
+async def equipment_list(request):
     """Lista wszystkich sprzętów z filtrowaniem i wyszukiwaniem"""
-    # Użyj funkcji pomocniczej do filtrowania sprzętu
-    equipment_list = get_user_equipment_queryset(request.user)
-    
-    # Wyszukiwanie
-    search_query = request.GET.get('search', '')
-    if search_query:
-        # Sprawdź czy wyszukiwany tekst to liczba (ID)
-        search_filters = Q(name__icontains=search_query) | \
-                        Q(serial_number__icontains=search_query) | \
-                        Q(type__icontains=search_query) | \
-                        Q(invoice_number__icontains=search_query) | \
-                        Q(location__icontains=search_query) | \
-                        Q(supplier__icontains=search_query) | \
-                        Q(notes__icontains=search_query)
-        
-        # Dodaj wyszukiwanie po ID jeśli tekst to liczba
-        try:
-            search_id = int(search_query)
-            search_filters |= Q(id=search_id)
-        except ValueError:
-            # Jeśli nie można przekonwertować na int, pomiń wyszukiwanie po ID
-            pass
-        
-        equipment_list = equipment_list.filter(search_filters)
+    roles = await aresolve_request_user(request)
+    # Użyj funkcji pomocniczej do filtrowania sprzętu (użytkownik w tym samym zapytaniu)
+    equipment_list = get_user_equipment_queryset(request.user).select_related('assigned_to')
     
-    # Filtrowanie po statusie
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        equipment_list = equipment_list.filter(status=status_filter)
-    
-    # Filtrowanie po użytkowniku (tylko dla IT)
-    user_filter = request.GET.get('user', '')
-    if user_filter and (request.user.is_superuser or request.user.groups.filter(name='IT').exists()):
-        equipment_list = equipment_list.filter(
-            Q(assigned_to__username__icontains=user_filter) |
-            Q(assigned_to__first_name__icontains=user_filter) |
-            Q(assigned_to__last_name__icontains=user_filter)
-        )
-    
-    # Filtrowanie po lokalizacji
-    location_filter = request.GET.get('location', '')
-    if location_filter:
-        equipment_list = equipment_list.filter(location__icontains=location_filter)
-    
-    # Filtrowanie po dostawcy
-    supplier_filter = request.GET.get('supplier', '')
-    if supplier_filter:
-        equipment_list = equipment_list.filter(supplier__icontains=supplier_filter)
-    
-    # Paginacja
-    paginator = Paginator(equipment_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Wyszukiwanie i filtry (search, status, user, location, supplier)
+    equipment_list, filters = filter_equipment(
+        equipment_list, request.GET, roles.is_it_staff
+    )
+    search_query = filters['search']
+    status_filter = filters['status']
+    user_filter = filters['user']
+    location_filter = filters['location']
+    supplier_filter = filters['supplier']
+    
+    # Paginacja - liczba wyników tylko gdy można ją odczytać ze statystyk
+    total = None
+    if roles.is_it_staff and not (search_query or user_filter or location_filter or supplier_filter):
+        total = await aget_equipment_count(status_filter)
+    page_obj = await _apaginate_equipment(request, equipment_list, search_query, total)
     
     context = {
         'page_obj': page_obj,
@@ -193,39 +197,81 @@ def equipment_list(request):
         'location_filter': location_filter,
         'supplier_filter': supplier_filter,
         'status_choices': Equipment.STATUS_CHOICES,
-        'is_it_staff': request.user.is_superuser or request.user.groups.filter(name='IT').exists(),
+        'is_it_staff': roles.is_it_staff,
     }
     return render(request, 'equipment/equipment_list.html', context)
 
 
+def _paginate_equipment(request, equipment_list, search_query, total=None):
+    """
+    Strona listy sprzętu. W trybie 'cursor' (EQUIPMENT_LIST_PAGINATION) używa
+    paginacji kursorowej; wyniki wyszukiwania są sortowane wg trafności,
+    więc dla nich pozostaje klasyczna paginacja numerowana.
+    """
+    mode = getattr(settings, 'EQUIPMENT_LIST_PAGINATION', 'cursor')
+    if mode == 'cursor' and not search_query:
+        paginator = CursorPaginator(equipment_list, 20, total=total)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = Paginator(equipment_list, 20)
+    return paginator.get_page(request.GET.get('page'))
+
+
+async def _apaginate_equipment(request, equipment_list, search_query, total=None):
+    """Asynchroniczna wersja _paginate_equipment"""
+    mode = getattr(settings, 'EQUIPMENT_LIST_PAGINATION', 'cursor')
+    if mode == 'cursor' and not search_query:
+        paginator = CursorPaginator(equipment_list, 20, total=total)
+        return await paginator.aget_page(request.GET.get('cursor'))
+    paginator = Paginator(equipment_list, 20)
+    return await aget_paginator_page(paginator, request.GET.get('page'))
+
+
 @login_required
 @can_access_equipment
-def equipment_detail(request, pk):
+async def equipment_detail(request, pk):
     """Szczegóły sprzętu"""
-    equipment = get_object_or_404(Equipment, pk=pk)
-    
-    # Obsługa generowania QR kodu
-    if request.method == 'POST' and request.headers.get('Content-Type') == 'application/json':
-        import json
-        data = json.loads(request.body)
-        if data.get('action') == 'generate_qr':
-            if request.user.is_superuser or request.user.groups.filter(name='IT').exists():
-                equipment.generate_qr_code()
-                return HttpResponse(json.dumps({'success': True}), content_type='application/json')
-            else:
-                return HttpResponse(json.dumps({'success': False, 'error': 'Brak uprawnień'}), content_type='application/json')
-    
-    transfer_history = equipment.get_transfer_history()
+    await aresolve_request_user(request)
+    equipment = await aget_object_or_404(Equipment.objects.select_related('assigned_to'), pk=pk)
+
+    # Historia przekazań stronicowana - długa historia nie spowalnia strony sprzętu
+    paginator = Paginator(equipment.get_transfer_history(), TRANSFER_HISTORY_PER_PAGE)
+    transfer_history, current_assignment = await asyncio.gather(
+        aget_paginator_page(paginator, request.GET.get('history_page')),
+        equipment.assignments.select_related('user').afirst(),
+    )
     
     context = {
         'equipment': equipment,
         'transfer_history': transfer_history,
+        'current_assignment': current_assignment,
         'can_transfer': can_transfer_equipment(request.user, equipment),
-        'is_it_staff': request.user.is_superuser or request.user.groups.filter(name='IT').exists(),
+        'is_it_staff': request.user_roles.is_it_staff,
     }
     return render(request, 'equipment/equipment_detail.html', context)
 
 
+def _qr_etag(request, pk, fmt):
+    size = clamp_qr_size(request.GET.get('size'))
+    return qr_cache_key(equipment_qr_url(pk), fmt, size)
+
+
+@login_required
+@can_access_equipment
+@condition(etag_func=_qr_etag)
+def equipment_qr(request, pk, fmt):
+    """Kod QR sprzętu (PNG/SVG) renderowany na żądanie, ?size= w pikselach"""
+    if fmt not in QR_FORMATS or not Equipment.objects.filter(pk=pk).exists():
+        raise Http404("Nie znaleziono kodu QR.")
+
+    size = clamp_qr_size(request.GET.get('size'))
+    response = HttpResponse(
+        get_qr_image(equipment_qr_url(pk), fmt, size), content_type=QR_FORMATS[fmt]
+    )
+    # Obraz zależy tylko od adresu URL, formatu i rozmiaru - nie zmienia się nigdy
+    patch_cache_control(response, private=True, max_age=QR_CACHE_MAX_AGE, immutable=True)
+    return response
+
+
 @login_required
 @it_staff_required
 def equipment_create(request):
@@ -242,6 +288,79 @@ def equipment_create(request):
     return render(request, 'equipment/equipment_form.html', {'form': form, 'title': 'Dodaj sprzęt'})
 
 
+@login_required
+@it_staff_required
+def equipment_import(request):
+    """Import sprzętu z pliku CSV/XLSX (istniejący numer seryjny - aktualizacja)"""
+    if request.method == 'POST':
+        form = EquipmentImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            uploaded = form.cleaned_data['file']
+            report_name = f'imports/errors_{uuid.uuid4().hex}.csv'
+            report_path = default_storage.path(report_name)
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            try:
+                with open(report_path, 'w', encoding='utf-8-sig', newline='') as error_file:
+                    importer = EquipmentImporter(error_file).run(uploaded, uploaded.name)
+            except ImportFileError as e:
+                os.remove(report_path)
+                form.add_error('file', str(e))
+            else:
+                if not importer.error_rows:
+                    os.remove(report_path)
+                equipment_import = EquipmentImport.objects.create(
+                    file_name=uploaded.name[:255],
+                    total_rows=importer.total_rows,
+                    created_rows=importer.created_rows,
+                    updated_rows=importer.updated_rows,
+                    error_rows=importer.error_rows,
+                    error_report=report_name if importer.error_rows else '',
+                    created_by=request.user,
+                )
+                return redirect('equipment:equipment_import_detail', import_id=equipment_import.pk)
+    else:
+        form = EquipmentImportUploadForm()
+
+    context = {
+        'form': form,
+        'import_fields': [Equipment._meta.get_field(name) for name in IMPORT_FIELDS],
+        'required_fields': REQUIRED_FIELDS,
+        'recent_imports': EquipmentImport.objects.filter(created_by=request.user)[:10],
+    }
+    return render(request, 'equipment/equipment_import.html', context)
+
+
+def _get_equipment_import(request, import_id):
+    """Import widoczny tylko dla importującego (i superużytkownika)"""
+    equipment_import = get_object_or_404(EquipmentImport, pk=import_id)
+    if equipment_import.created_by_id != request.user.pk and not request.user.is_superuser:
+        raise Http404("Nie znaleziono importu.")
+    return equipment_import
+
+
+@login_required
+@it_staff_required
+def equipment_import_detail(request, import_id):
+    """Podsumowanie importu"""
+    equipment_import = _get_equipment_import(request, import_id)
+    return render(request, 'equipment/equipment_import_detail.html', {'equipment_import': equipment_import})
+
+
+@login_required
+@it_staff_required
+def equipment_import_errors(request, import_id):
+    """Pobranie raportu błędów importu (CSV)"""
+    equipment_import = _get_equipment_import(request, import_id)
+    if not equipment_import.error_report:
+        raise Http404("Import nie zawiera błędów.")
+    try:
+        report = equipment_import.error_report.open('rb')
+    except FileNotFoundError:
+        raise Http404("Raport błędów nie istnieje.")
+    filename = f'import_bledy_{equipment_import.created_at.strftime("%Y%m%d_%H%M")}.csv'
+    return FileResponse(report, as_attachment=True, filename=filename, content_type='text/csv')
+
+
 @login_required
 @can_access_equipment
 def equipment_update(request, pk):
@@ -249,7 +368,7 @@ def equipment_update(request, pk):
     equipment = get_object_or_404(Equipment, pk=pk)
     
     # Sprawdź czy użytkownik może edytować sprzęt
-    if not (request.user.is_superuser or request.user.groups.filter(name='IT').exists()):
+    if not request.user_roles.is_it_staff:
         if equipment.assigned_to != request.user:
             messages.error(request, 'Nie możesz edytować tego sprzętu.')
             return redirect('equipment:my_equipment')
@@ -337,6 +456,48 @@ def equipment_transfer(request, pk):
     return render(request, 'equipment/equipment_transfer.html', context)
 
 
+@login_required
+@it_staff_required
+def equipment_bulk_transfer(request):
+    """Przekazanie wielu sprzętów jednemu użytkownikowi (jedna transakcja)"""
+    source = request.POST if request.method == 'POST' else request.GET
+    ids = [value for value in source.getlist('ids') if value.isdigit()][:BULK_TRANSFER_LIMIT]
+    equipment_list = list(
+        Equipment.objects.filter(pk__in=ids, status__in=['available', 'in_use'])
+        .select_related('assigned_to').order_by('name')
+    )
+    if not equipment_list:
+        messages.error(request, 'Zaznacz sprzęt, który można przekazać.')
+        return redirect('equipment:equipment_list')
+
+    if request.method == 'POST':
+        form = EquipmentTransferForm(request.POST)
+        if form.is_valid():
+            to_user = form.cleaned_data['to_user']
+            transfers = create_transfers(
+                [equipment.pk for equipment in equipment_list], to_user, request.user,
+                form.cleaned_data['reason'],
+            )
+            to_user_name = to_user.get_full_name() or to_user.username
+            if transfers:
+                messages.success(
+                    request,
+                    f'Wysłano {len(transfers)} wniosków o przekazanie sprzętu do użytkownika {to_user_name}. '
+                    f'Przekazania zostaną zrealizowane po akceptacji przez odbiorcę.'
+                )
+            skipped = len(equipment_list) - len(transfers)
+            if skipped:
+                messages.warning(request, f'Pominięto sprzęt już przypisany do użytkownika {to_user_name}: {skipped}.')
+            return redirect('equipment:equipment_list')
+    else:
+        form = EquipmentTransferForm()
+
+    return render(request, 'equipment/equipment_bulk_transfer.html', {
+        'form': form,
+        'equipment_list': equipment_list,
+    })
+
+
 @login_required
 def my_equipment(request):
     """Lista sprzętu przypisanego do zalogowanego użytkownika"""
@@ -345,24 +506,8 @@ def my_equipment(request):
     # Wyszukiwanie
     search_query = request.GET.get('search', '')
     if search_query:
-        # Sprawdź czy wyszukiwany tekst to liczba (ID)
-        search_filters = Q(name__icontains=search_query) | \
-                        Q(serial_number__icontains=search_query) | \
-                        Q(type__icontains=search_query) | \
-                        Q(invoice_number__icontains=search_query) | \
-                        Q(location__icontains=search_query) | \
-                        Q(supplier__icontains=search_query) | \
-                        Q(notes__icontains=search_query)
-        
-        # Dodaj wyszukiwanie po ID jeśli tekst to liczba
-        try:
-            search_id = int(search_query)
-            search_filters |= Q(id=search_id)
-        except ValueError:
-            # Jeśli nie można przekonwertować na int, pomiń wyszukiwanie po ID
-            pass
-        
-        equipment_list = equipment_list.filter(search_filters)
+        # Indeks pełnotekstowy (oraz ID, jeśli tekst to liczba), wyniki wg trafności
+        equipment_list = search_equipment(equipment_list, search_query)
     
     # Filtrowanie po statusie
     status_filter = request.GET.get('status', '')
@@ -370,16 +515,14 @@ def my_equipment(request):
         equipment_list = equipment_list.filter(status=status_filter)
     
     # Paginacja
-    paginator = Paginator(equipment_list, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = _paginate_equipment(request, equipment_list, search_query)
     
     context = {
         'page_obj': page_obj,
         'search_query': search_query,
         'status_filter': status_filter,
         'status_choices': Equipment.STATUS_CHOICES,
-        'is_it_staff': request.user.is_superuser or request.user.groups.filter(name='IT').exists(),
+        'is_it_staff': request.user_roles.is_it_staff,
     }
     return render(request, 'equipment/my_equipment.html', context)
 
@@ -387,134 +530,158 @@ def my_equipment(request):
 @login_required
 @it_staff_required
 def export_equipment_excel(request):
-    """Eksport sprzętu do pliku Excel"""
-    # Pobierz sprzęt
-    equipment_list = Equipment.objects.all().order_by('name')
-    
-    # Utwórz nowy skoroszyt
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Sprzęt IT"
-    
-    # Nagłówki
-    headers = [
-        'Nazwa', 'Typ', 'Numer seryjny', 'Numer faktury', 'Data zakupu',
-        'Cena zakupu', 'Lokalizacja', 'Dostawca', 'Koniec gwarancji',
-        'Status', 'Przypisany do', 'Uwagi', 'Data utworzenia'
-    ]
-    
-    # Styl nagłówków
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Dodaj nagłówki
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    
-    # Dodaj dane
-    for row, equipment in enumerate(equipment_list, 2):
-        ws.cell(row=row, column=1, value=equipment.name)
-        ws.cell(row=row, column=2, value=equipment.type)
-        ws.cell(row=row, column=3, value=equipment.serial_number)
-        ws.cell(row=row, column=4, value=equipment.invoice_number or '')
-        ws.cell(row=row, column=5, value=equipment.purchase_date.strftime('%d.%m.%Y') if equipment.purchase_date else '')
-        ws.cell(row=row, column=6, value=float(equipment.purchase_price) if equipment.purchase_price else '')
-        ws.cell(row=row, column=7, value=equipment.location)
-        ws.cell(row=row, column=8, value=equipment.supplier or '')
-        ws.cell(row=row, column=9, value=equipment.warranty_end_date.strftime('%d.%m.%Y') if equipment.warranty_end_date else '')
-        ws.cell(row=row, column=10, value=equipment.get_status_display())
-        ws.cell(row=row, column=11, value=equipment.assigned_to.get_full_name() if equipment.assigned_to else '')
-        ws.cell(row=row, column=12, value=equipment.notes or '')
-        ws.cell(row=row, column=13, value=equipment.created_at.strftime('%d.%m.%Y %H:%M'))
-    
-    # Dostosuj szerokość kolumn
-    column_widths = [25, 20, 20, 15, 12, 12, 15, 15, 12, 12, 20, 30, 18]
-    for col, width in enumerate(column_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
-    
-    # Utwórz odpowiedź HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    """Eksport sprzętu do pliku Excel (strumieniowo, stała ilość pamięci)"""
+    export_file = spooled_export(write_equipment_xlsx)
+    return FileResponse(
+        export_file,
+        as_attachment=True,
+        filename=f'sprzet_it_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx',
+        content_type=XLSX_CONTENT_TYPE,
     )
-    response['Content-Disposition'] = f'attachment; filename="sprzet_it_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx"'
-    
-    # Zapisz skoroszyt
-    wb.save(response)
-    return response
 
 
 @login_required
 @it_staff_required
 def export_transfers_excel(request):
-    """Eksport transferów do pliku Excel"""
-    # Pobierz transfery
-    transfers = EquipmentTransfer.objects.select_related(
-        'equipment', 'from_user', 'to_user', 'transferred_by'
-    ).order_by('-transfer_date')
-    
-    # Utwórz nowy skoroszyt
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Transfery sprzętu"
-    
-    # Nagłówki
-    headers = [
-        'Sprzęt', 'Numer seryjny', 'Od użytkownika', 'Do użytkownika',
-        'Data transferu', 'Przekazane przez', 'Powód'
-    ]
-    
-    # Styl nagłówków
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Dodaj nagłówki
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    
-    # Dodaj dane
-    for row, transfer in enumerate(transfers, 2):
-        ws.cell(row=row, column=1, value=transfer.equipment.name)
-        ws.cell(row=row, column=2, value=transfer.equipment.serial_number)
-        ws.cell(row=row, column=3, value=transfer.from_user.get_full_name() if transfer.from_user else 'System')
-        ws.cell(row=row, column=4, value=transfer.to_user.get_full_name() if transfer.to_user else 'System')
-        ws.cell(row=row, column=5, value=transfer.transfer_date.strftime('%d.%m.%Y %H:%M'))
-        ws.cell(row=row, column=6, value=transfer.transferred_by.get_full_name() if transfer.transferred_by else 'System')
-        ws.cell(row=row, column=7, value=transfer.reason or '')
-    
-    # Dostosuj szerokość kolumn
-    column_widths = [25, 20, 20, 20, 18, 20, 40]
-    for col, width in enumerate(column_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
-    
-    # Utwórz odpowiedź HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    """Eksport transferów do pliku Excel (strumieniowo, stała ilość pamięci)"""
+    export_file = spooled_export(write_transfers_xlsx)
+    return FileResponse(
+        export_file,
+        as_attachment=True,
+        filename=f'transfery_sprzetu_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx',
+        content_type=XLSX_CONTENT_TYPE,
     )
-    response['Content-Disposition'] = f'attachment; filename="transfery_sprzetu_{datetime.now().strftime("%Y%m%d_%H%M")}.xlsx"'
-    
-    # Zapisz skoroszyt
-    wb.save(response)
+
+
+@login_required
+@it_staff_required
+def export_equipment_csv(request):
+    """Eksport sprzętu do CSV z filtrami listy sprzętu, generowany strumieniowo"""
+    equipment_list, _ = filter_equipment(Equipment.objects.all(), request.GET, True)
+    response = StreamingHttpResponse(
+        iter_csv(equipment_values(equipment_list)), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="sprzet_it_{datetime.now().strftime("%Y%m%d_%H%M")}.csv"'
+    return response
+
+
+@login_required
+@it_staff_required
+def export_equipment_ndjson(request):
+    """Eksport sprzętu do NDJSON (jeden obiekt JSON na linię) z filtrami listy sprzętu"""
+    equipment_list, _ = filter_equipment(Equipment.objects.all(), request.GET, True)
+    response = StreamingHttpResponse(
+        iter_ndjson(equipment_values(equipment_list)), content_type='application/x-ndjson'
+    )
+    response['Content-Disposition'] = f'attachment; filename="sprzet_it_{datetime.now().strftime("%Y%m%d_%H%M")}.ndjson"'
     return response
 
 
+def _get_export_job(request, job_id):
+    """Eksport w tle widoczny tylko dla zlecającego (i superużytkownika)"""
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if job.created_by_id != request.user.pk and not request.user.is_superuser:
+        raise Http404("Nie znaleziono eksportu.")
+    return job
+
+
 @login_required
-def pending_transfers(request):
+@it_staff_required
+def export_job_create(request):
+    """Zlecenie eksportu w tle (wykonuje go `manage.py run_export_worker`)"""
+    if request.method != 'POST':
+        return redirect('equipment:dashboard')
+
+    kind = request.POST.get('kind')
+    if kind not in dict(ExportJob.KIND_CHOICES):
+        messages.error(request, 'Nieznany rodzaj eksportu.')
+        return redirect('equipment:dashboard')
+
+    filters = {
+        name: request.POST[name]
+        for name in EQUIPMENT_FILTER_PARAMS
+        if request.POST.get(name)
+    }
+    job = ExportJob.objects.create(kind=kind, filters=filters, created_by=request.user)
+    messages.info(request, 'Eksport został zlecony i zostanie przygotowany w tle.')
+    return redirect('equipment:export_job_detail', job_id=job.pk)
+
+
+@login_required
+@it_staff_required
+def export_job_detail(request, job_id):
+    """Strona postępu eksportu w tle"""
+    job = _get_export_job(request, job_id)
+    return render(request, 'equipment/export_job.html', {'job': job})
+
+
+@login_required
+@it_staff_required
+def export_job_status(request, job_id):
+    """Stan eksportu w tle (JSON, odpytywany przez stronę postępu)"""
+    job = _get_export_job(request, job_id)
+    data = {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'progress': job.progress_percent(),
+        'error': job.error,
+        'download_url': None,
+    }
+    if job.status == 'done':
+        data['download_url'] = reverse('equipment:export_job_download', args=[job.pk])
+    return JsonResponse(data)
+
+
+@login_required
+@it_staff_required
+def export_job_download(request, job_id):
+    """Pobranie gotowego pliku eksportu"""
+    job = _get_export_job(request, job_id)
+    if job.status != 'done' or not job.file:
+        raise Http404("Eksport nie jest jeszcze gotowy.")
+    try:
+        export_file = job.file.open('rb')
+    except FileNotFoundError:
+        raise Http404("Plik eksportu nie istnieje.")
+    return FileResponse(export_file, as_attachment=True, filename=download_filename(job))
+
+
+@login_required
+async def pending_transfers(request):
     """Lista przekazań oczekujących na akceptację przez użytkownika"""
+    await aresolve_request_user(request)
     pending_transfers = EquipmentTransfer.objects.filter(
         to_user=request.user,
         approval_status='pending'
     ).select_related('equipment', 'from_user', 'transferred_by').order_by('-transfer_date')
+
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        if action == 'approve_all':
+            # Tylko przekazania widoczne na stronie - nie te, które doszły w międzyczasie
+            ids = [value for value in request.POST.getlist('displayed_ids') if value.isdigit()]
+            approved = await sync_to_async(approve_transfers)(ids, request.user) if ids else 0
+            messages.success(request, f'Zaakceptowano przekazania: {approved}.')
+        elif action == 'reject_selected':
+            ids = [value for value in request.POST.getlist('ids') if value.isdigit()]
+            form = EquipmentTransferApprovalForm({'action': 'reject', 'reason': request.POST.get('reason', '')})
+            if not ids:
+                messages.error(request, 'Zaznacz przekazania do odrzucenia.')
+            elif not form.is_valid():
+                messages.error(request, form.errors['reason'][0])
+            else:
+                rejected = await sync_to_async(reject_transfers)(
+                    ids, request.user, form.cleaned_data['reason']
+                )
+                messages.success(request, f'Odrzucono przekazania: {rejected}.')
+        return redirect('equipment:pending_transfers')
     
     context = {
-        'pending_transfers': pending_transfers,
+        'pending_transfers': await _alist(pending_transfers),
     }
     return render(request, 'equipment/pending_transfers.html', context)
 
@@ -534,8 +701,16 @@ def approve_transfer(request, transfer_id):
             action = form.cleaned_data['action']
             reason = form.cleaned_data['reason']
             
+            decided = (
+                transfer.approve(request.user) if action == 'approve'
+                else transfer.reject(request.user, reason)
+            )
+            if not decided:
+                # Równoległe żądanie rozpatrzyło przekazanie wcześniej
+                messages.error(request, 'To przekazanie zostało już rozpatrzone.')
+                return redirect('equipment:pending_transfers')
+
             if action == 'approve':
-                transfer.approve(request.user)
                 messages.success(
                     request,
                     f'Przekazanie sprzętu "{transfer.equipment.name}" zostało zaakceptowane. '
@@ -543,7 +718,6 @@ def approve_transfer(request, transfer_id):
                 )
                 return redirect('equipment:transfer_protocol', transfer_id=transfer.id)
             else:  # reject
-                transfer.reject(request.user, reason)
                 messages.success(
                     request,
                     f'Przekazanie sprzętu "{transfer.equipment.name}" zostało odrzucone.'
@@ -562,148 +736,58 @@ def approve_transfer(request, transfer_id):
 @login_required
 def transfer_protocol(request, transfer_id):
     """Generowanie protokołu przekazania sprzętu w PDF"""
-    transfer = get_object_or_404(EquipmentTransfer, pk=transfer_id)
+    transfer = get_object_or_404(protocol_transfers_queryset(), pk=transfer_id)
     
     # Sprawdź czy użytkownik może zobaczyć protokół
-    if not (request.user == transfer.to_user or 
-            request.user.is_superuser or 
-            request.user.groups.filter(name='IT').exists()):
+    if not (request.user == transfer.to_user or request.user_roles.is_it_staff):
         raise Http404("Nie masz uprawnień do wyświetlenia tego protokołu.")
     
-    # Utwórz odpowiedź HTTP dla PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="protokol_przekazania_{transfer.equipment.serial_number}.pdf"'
-    
-    # Użyj czcionek z obsługą polskich znaków
-    # ReportLab ma wbudowane czcionki z Unicode
-    font_name = 'Helvetica'
-    font_bold = 'Helvetica-Bold'
-    
-    # Alternatywnie można użyć Times-Roman lub Courier
-    # font_name = 'Times-Roman'
-    # font_bold = 'Times-Bold'
-    
-    # Utwórz dokument PDF z marginesami
-    doc = SimpleDocTemplate(
-        response, 
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
-    
-    story = []
-    
-    # Style z polskimi znakami
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        fontName=font_bold,
-        fontSize=14,
-        spaceAfter=15,
-        alignment=TA_CENTER,
-        textColor=colors.darkblue
+    # Treść protokołu wyznacza ETag - niezmieniony protokół nie jest nawet odczytywany z dysku
+    data = protocol_data(transfer)
+    etag = quote_etag(protocol_hash(data))
+    last_modified = max(protocol_generated_at(transfer), transfer.equipment.updated_at)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
     )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        fontName=font_bold,
-        fontSize=10,
-        spaceAfter=8,
-        spaceBefore=8,
-        textColor=colors.darkblue
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        fontName=font_name,
-        fontSize=9,
-        spaceAfter=4,
-        alignment=TA_LEFT
-    )
-    
-    # Tytuł
-    story.append(Paragraph("PROTOKÓŁ PRZEKAZANIA SPRZĘTU IT", title_style))
-    story.append(Spacer(1, 10))
-    
-    # Dane przekazania w jednej tabeli
-    basic_data = [
-        ['Data przekazania:', transfer.transfer_date.strftime('%d.%m.%Y %H:%M')],
-        ['Numer protokołu:', f'PP/{transfer.id:04d}/{transfer.transfer_date.year}'],
-        ['Sprzęt:', transfer.equipment.name],
-        ['Numer seryjny:', transfer.equipment.serial_number],
-        ['Typ sprzętu:', transfer.equipment.type],
-        ['Od użytkownika:', transfer.from_user.get_full_name() if transfer.from_user else 'System'],
-        ['Do użytkownika:', transfer.to_user.get_full_name() if transfer.to_user else 'System'],
-        ['Przekazane przez:', transfer.transferred_by.get_full_name() if transfer.transferred_by else 'System'],
-        ['Lokalizacja:', transfer.equipment.location],
-        ['Dostawca:', transfer.equipment.supplier or 'Nie podano'],
-        ['Data zakupu:', transfer.equipment.purchase_date.strftime('%d.%m.%Y') if transfer.equipment.purchase_date else 'Nie podano'],
-        ['Cena zakupu:', f'{transfer.equipment.purchase_price} PLN' if transfer.equipment.purchase_price else 'Nie podano'],
-        ['Koniec gwarancji:', transfer.equipment.warranty_end_date.strftime('%d.%m.%Y') if transfer.equipment.warranty_end_date else 'Nie podano'],
-        ['Status:', transfer.equipment.get_status_display()],
-    ]
-    
-    basic_table = Table(basic_data, colWidths=[3.5*cm, 10*cm])
-    basic_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), font_name),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('FONTNAME', (0, 0), (0, -1), font_bold),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-    ]))
-    
-    story.append(basic_table)
-    story.append(Spacer(1, 10))
-    
-    # Powód przekazania (jeśli istnieje)
-    if transfer.reason:
-        story.append(Paragraph("Powód przekazania:", heading_style))
-        story.append(Paragraph(transfer.reason, normal_style))
-        story.append(Spacer(1, 8))
-    
-    # Status akceptacji
-    status_text = f"Zaakceptowane przez: {transfer.approved_by.get_full_name() if transfer.approved_by else 'System'}<br/>"
-    status_text += f"Data akceptacji: {transfer.approved_at.strftime('%d.%m.%Y %H:%M') if transfer.approved_at else 'Nie zaakceptowano'}"
-    story.append(Paragraph("Status akceptacji:", heading_style))
-    story.append(Paragraph(status_text, normal_style))
-    story.append(Spacer(1, 15))
-    
-    # Podpisy w jednej linii
-    signatures_data = [
-        ['Odbiorca sprzętu:', '', 'Data:', ''],
-        ['', '', '', ''],
-        ['Podpis:', '', 'Podpis:', ''],
-        ['', '', '', ''],
-    ]
-    
-    signatures_table = Table(signatures_data, colWidths=[3*cm, 4*cm, 2*cm, 4*cm])
-    signatures_table.setStyle(TableStyle([
-        ('LINEBELOW', (1, 1), (1, 1), 1, colors.black),
-        ('LINEBELOW', (1, 3), (1, 3), 1, colors.black),
-        ('LINEBELOW', (3, 1), (3, 1), 1, colors.black),
-        ('LINEBELOW', (3, 3), (3, 3), 1, colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), font_name),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    
-    story.append(signatures_table)
-    story.append(Spacer(1, 10))
-    
-    # Stopka
-    story.append(Paragraph(
-        f"Protokół wygenerowany automatycznie przez system AssetStorm • "
-        f"Data wygenerowania: {timezone.now().strftime('%d.%m.%Y %H:%M')}",
-        ParagraphStyle('Footer', fontName=font_name, fontSize=7, alignment=TA_CENTER)
-    ))
-    
-    # Zbuduj PDF
-    doc.build(story)
+    if response is None:
+        response = HttpResponse(get_protocol_pdf(data), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{protocol_filename(data)}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Przeglądarka zawsze pyta serwer (If-None-Match), bo dane sprzętu mogą się zmienić
+    patch_cache_control(response, private=True, no_cache=True)
     return response
+
+
+@login_required
+@it_staff_required
+def transfer_protocols_batch(request):
+    """Protokoły przekazań zbiorczo - jeden PDF lub archiwum ZIP, wg filtrów"""
+    params = {name: request.GET.get(name, '') for name in PROTOCOL_FILTER_PARAMS}
+    output = request.GET.get('output')
+    transfers = filter_protocol_transfers(params)
+
+    if output in ('pdf', 'zip'):
+        datas = [protocol_data(transfer) for transfer in transfers[:PROTOCOL_BATCH_LIMIT]]
+        if datas:
+            export_file = tempfile.TemporaryFile()
+            if output == 'zip':
+                write_protocols_zip(export_file, datas)
+            else:
+                write_protocols_pdf(export_file, datas)
+            export_file.seek(0)
+            return FileResponse(
+                export_file,
+                as_attachment=True,
+                filename=f'protokoly_przekazania_{datetime.now().strftime("%Y%m%d_%H%M")}.{output}',
+                content_type='application/zip' if output == 'zip' else 'application/pdf',
+            )
+        messages.warning(request, 'Brak przekazań spełniających kryteria.')
+
+    context = {
+        'params': params,
+        'transfer_count': transfers.count(),
+        'batch_limit': PROTOCOL_BATCH_LIMIT,
+        'status_choices': EquipmentTransfer.APPROVAL_STATUS_CHOICES,
+    }
+    return render(request, 'equipment/transfer_protocols.html', context)